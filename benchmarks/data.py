@@ -0,0 +1,70 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from src.news_ingest import format_articles
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def bar_frequency(n_bars: int) -> str:
+    """
+    Picks a bar spacing that keeps `n_bars` inside pandas' timestamp range (up to year 2262).
+    """
+    if n_bars <= 50_000:
+        return "1D"
+    return "1h" if n_bars <= 2_000_000 else "1min"
+
+
+def synthetic_ohlc(n_bars: int, seed=0, start="2000-01-03", freq=None, price=3.0, daily_vol=0.03) -> pd.DataFrame:
+    """
+    Generates a reproducible OHLCV frame (geometric random walk) shaped like the bar store output.
+
+    Args:
+        n_bars (int): Number of bars (1k to 10M).
+        seed (int): Random seed, so every run benchmarks the same data.
+        freq (str): Bar spacing of the DatetimeIndex (defaults to `bar_frequency(n_bars)`).
+
+    Returns:
+        pd.DataFrame: Open/High/Low/Close/Volume indexed by a tz-aware 'timestamp'.
+    """
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, daily_vol, n_bars)
+    close = price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([price], close[:-1]))
+    wicks = np.abs(rng.normal(0, daily_vol / 2, (2, n_bars)))
+
+    index = pd.date_range(start, periods=n_bars, freq=freq or bar_frequency(n_bars), tz="UTC", name="timestamp")
+    return pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + wicks[0]),
+        "Low": np.minimum(open_, close) * (1 - wicks[1]),
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, n_bars)
+    }, index=index)
+
+
+def synthetic_pair(n_bars: int, seed=0, correlation=0.6):
+    """
+    Generates two correlated series (gas / oil) with a few missing bars on the second one,
+    as the dashboard's correlation panel sees them.
+    """
+    rng = np.random.default_rng(seed)
+    gas = synthetic_ohlc(n_bars, seed=seed)
+    noise = rng.normal(0, 0.02, n_bars)
+    gas_returns = np.diff(np.log(gas['Close'].to_numpy()), prepend=np.log(3.0))
+    oil_close = 70 * np.exp(np.cumsum(correlation * gas_returns + noise))
+    oil = pd.DataFrame({"Close": oil_close}, index=gas.index)
+    # Holidays differ between exchanges
+    return gas, oil.drop(oil.index[rng.choice(n_bars, n_bars // 50, replace=False)])
+
+
+def news_fixture(n_articles=None) -> list:
+    """
+    Loads the recorded NewsAPI response in the loader's article format, cycled up to `n_articles`.
+    """
+    with open(os.path.join(FIXTURES_DIR, "news.json"), "r") as f:
+        articles = format_articles(json.load(f)["articles"])
+    if n_articles is None:
+        return articles
+    return [articles[i % len(articles)] for i in range(n_articles)]
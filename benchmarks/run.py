@@ -0,0 +1,296 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from benchmarks.data import synthetic_ohlc, synthetic_pair, news_fixture
+from src.agent import EnergyTradingAgent
+from src.analytics import calculate_volatility, correlation_matrix
+from src.calibration import DEFAULT_WINDOWS, calibrate_ticker
+from src import indicators
+from src.fakes import FakeSignalLLM
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+BAR_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+NEWS_SIZES = [20, 100]
+
+
+# ------------------------------------------------------------------------------
+# Benchmarked code paths. Each case takes a size, does its setup outside the
+# measurement and returns the zero-argument callable to measure.
+# ------------------------------------------------------------------------------
+
+def dashboard_rsi(close: pd.Series) -> pd.Series:
+    """
+    The pandas RSI formerly inline in dashboard.py (reference for the indicator kernels).
+    """
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def dashboard_correlation(gas: pd.DataFrame, oil: pd.DataFrame):
+    """
+    The pandas Oil vs Gas panel formerly in dashboard.py: align on common dates, then normalize to % change.
+    """
+    common_index = gas.index.intersection(oil.index)
+    gas_aligned = gas.loc[common_index]['Close']
+    oil_aligned = oil.loc[common_index]['Close']
+    gas_norm = (gas_aligned / gas_aligned.iloc[0] - 1) * 100
+    oil_norm = (oil_aligned / oil_aligned.iloc[0] - 1) * 100
+    return gas_norm, oil_norm
+
+
+def case_calculate_volatility(size, args):
+    df = synthetic_ohlc(size)
+    return lambda: calculate_volatility(df)
+
+
+def case_dashboard_rsi(size, args):
+    close = synthetic_ohlc(size)['Close']
+    return lambda: dashboard_rsi(close)
+
+
+def case_kernel_rsi(size, args, method="sma", tail=None):
+    close = synthetic_ohlc(size)['Close'].to_numpy()
+    return lambda: indicators.rsi(close, window=14, method=method, tail=tail)
+
+
+def case_kernel_rsi_wilder(size, args):
+    return case_kernel_rsi(size, args, method="wilder")
+
+
+def case_kernel_rsi_tail(size, args):
+    # What the dashboard computes: the displayed 90 bars plus warm-up
+    return case_kernel_rsi(size, args, tail=90)
+
+
+def case_pandas_bollinger(size, args):
+    close = synthetic_ohlc(size)['Close']
+
+    def bollinger():
+        middle = close.rolling(20).mean()
+        std = close.rolling(20).std()
+        return middle, middle + 2 * std, middle - 2 * std
+    return bollinger
+
+
+def case_kernel_bollinger(size, args):
+    close = synthetic_ohlc(size)['Close'].to_numpy()
+    return lambda: indicators.bollinger(close, window=20, num_std=2.0)
+
+
+def case_pandas_rolling_corr(size, args):
+    gas, oil = synthetic_pair(size)
+    gas = gas.loc[oil.index]
+    x, y = gas['Close'].pct_change(), oil['Close'].pct_change()
+    return lambda: x.rolling(30).corr(y)
+
+
+def case_kernel_rolling_corr(size, args):
+    gas, oil = synthetic_pair(size)
+    gas = gas.loc[oil.index]
+    x, y = gas['Close'].pct_change().to_numpy(), oil['Close'].pct_change().to_numpy()
+    return lambda: indicators.rolling_corr(x, y, 30)
+
+
+def case_dashboard_correlation(size, args):
+    gas, oil = synthetic_pair(size)
+    return lambda: dashboard_correlation(gas, oil)
+
+
+def case_correlation_matrix(size, args):
+    close = np.column_stack([synthetic_ohlc(size, seed=seed)['Close'].to_numpy() for seed in range(6)])
+    return lambda: correlation_matrix(close)
+
+
+def case_calibration(size, args):
+    df = synthetic_ohlc(size)
+    task = (
+        "BENCH", df.index.tz_localize(None).asi8, df['High'].to_numpy(), df['Low'].to_numpy(),
+        df['Close'].to_numpy(), DEFAULT_WINDOWS, [50, 75, 90, 95, 99], int(df.index[-1].value)
+    )
+    return lambda: calibrate_ticker(task)
+
+
+def make_agent(args, packing=False):
+    agent = EnergyTradingAgent(llm=FakeSignalLLM(latency=args.llm_latency), cache=False)
+    agent.packing = {**agent.packing, 'enabled': packing}
+    return agent
+
+
+def case_analyze_serial(size, args):
+    agent = make_agent(args)
+    texts = [article['text'] for article in news_fixture(size)]
+    return lambda: [agent.analyze_news(text) for text in texts]
+
+
+def case_analyze_faulty(size, args):
+    # 5% of calls 20x slower, 10% transient errors: hedging and retries keep the total bounded
+    llm = FakeSignalLLM(latency=args.llm_latency, slow_rate=0.05, slow_latency=20 * args.llm_latency, error_rate=0.1, seed=0)
+    agent = EnergyTradingAgent(llm=llm, cache=False)
+    agent.executor.hedge_min = agent.executor.hedge_initial = 2 * args.llm_latency
+    agent.executor.backoff_base = args.llm_latency
+    texts = [article['text'] for article in news_fixture(size)]
+    return lambda: [agent.analyze_news(text) for text in texts]
+
+
+def case_analyze_concurrent(size, args):
+    agent = make_agent(args)
+    texts = [article['text'] for article in news_fixture(size)]
+    return lambda: agent.analyze_many(texts)
+
+
+def case_analyze_packed(size, args):
+    agent = make_agent(args, packing=True)
+    texts = [article['text'] for article in news_fixture(size)]
+    return lambda: agent.analyze_many(texts)
+
+
+# name -> (case factory, size kind)
+CASES = {
+    "calculate_volatility": (case_calculate_volatility, "bars"),
+    "dashboard_rsi": (case_dashboard_rsi, "bars"),
+    "kernel_rsi": (case_kernel_rsi, "bars"),
+    "kernel_rsi_wilder": (case_kernel_rsi_wilder, "bars"),
+    "kernel_rsi_tail": (case_kernel_rsi_tail, "bars"),
+    "pandas_bollinger": (case_pandas_bollinger, "bars"),
+    "kernel_bollinger": (case_kernel_bollinger, "bars"),
+    "pandas_rolling_corr": (case_pandas_rolling_corr, "bars"),
+    "kernel_rolling_corr": (case_kernel_rolling_corr, "bars"),
+    "dashboard_correlation": (case_dashboard_correlation, "bars"),
+    "correlation_matrix": (case_correlation_matrix, "bars"),
+    "calibration_percentiles": (case_calibration, "bars"),
+    "analyze_news_serial": (case_analyze_serial, "news"),
+    "analyze_news_faulty": (case_analyze_faulty, "news"),
+    "analyze_many_concurrent": (case_analyze_concurrent, "news"),
+    "analyze_many_packed": (case_analyze_packed, "news"),
+}
+
+
+# ------------------------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------------------------
+
+def measure(func, repeat=3) -> dict:
+    """
+    Measures a callable: wall time over `repeat` runs, then one traced run for memory.
+
+    Tracing slows allocations down, so it is kept out of the timed runs.
+
+    Returns:
+        dict: time_min / time_median (s), peak_bytes (peak traced memory during the call)
+              and allocations (memory blocks allocated by the call and still alive at its end,
+              including its result).
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+
+    return {
+        "time_min": min(timings),
+        "time_median": statistics.median(timings),
+        "peak_bytes": peak,
+        "allocations": allocations,
+        "repeat": repeat
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+
+def run_suite(cases, bar_sizes, news_sizes, args) -> dict:
+    results = {}
+    for name in cases:
+        factory, kind = CASES[name]
+        for size in (bar_sizes if kind == "bars" else news_sizes):
+            func = factory(size, args)
+            key = f"{name}[{size}]"
+            results[key] = {"case": name, "size": size, **measure(func, args.repeat)}
+            r = results[key]
+            print(f"{key:<40}{r['time_median'] * 1000:>12.2f} ms{r['peak_bytes'] / 2**20:>12.1f} MiB{r['allocations']:>10} blocks")
+            del func
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Lists the cases whose median time or peak memory grew by more than `threshold` (e.g. 0.2 = +20%).
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric in ("time_median", "peak_bytes"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append((key, metric, previous[metric], current[metric]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the analytics, calibration and agent hot paths.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Cases to run (default: all).")
+    parser.add_argument("--bar-sizes", nargs="+", type=int, default=BAR_SIZES, help="Synthetic OHLC sizes (up to 10000000).")
+    parser.add_argument("--news-sizes", nargs="+", type=int, default=NEWS_SIZES, help="Number of articles for the agent cases.")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Simulated LLM round-trip time in seconds.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown / memory growth vs the baseline (0.2 = +20%%).")
+    args = parser.parse_args()
+
+    print(f"⏱️ Running {len(args.cases)} benchmark cases...")
+    results = run_suite(args.cases, args.bar_sizes, args.news_sizes, args)
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "llm_latency": args.llm_latency, "results": results}, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for key, metric, before, after in regressions:
+            print(f"❌ Regression: {key} {metric} {before:.4g} -> {after:.4g} (+{after / before - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regression above {args.threshold:.0%} vs {args.baseline}")
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.run import RESULTS_DIR, compare, environment
+
+# Each probe runs in a fresh interpreter and prints {"stage": seconds, ...} plus its peak RSS
+PROBE_PREFIX = """
+import json, resource, time
+start = time.perf_counter()
+timings = {}
+"""
+
+PROBE_SUFFIX = """
+timings["peak_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+print("PROBE" + json.dumps(timings))
+"""
+
+PROBES = {
+    # Worker process: imports, config, agent, stores
+    "worker_cold_start": """
+from src.worker import SignalWorker
+timings["import"] = time.perf_counter() - start
+SignalWorker()
+timings["total"] = time.perf_counter() - start
+""",
+    # Shared agent: first build vs cached lookup
+    "agent_cold_start": """
+from src.agent import get_agent
+get_agent()
+timings["total"] = time.perf_counter() - start
+t = time.perf_counter()
+get_agent()
+timings["cached"] = time.perf_counter() - t
+""",
+    # Dashboard: first script run in a new process, then a rerun (Streamlit re-executes the script)
+    "dashboard": """
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("dashboard.py", default_timeout=120)
+app.secrets["GROQ_API_KEY"] = "benchmark"
+app.run()
+timings["total"] = time.perf_counter() - start
+t = time.perf_counter()
+app.run()
+timings["warm_rerun"] = time.perf_counter() - t
+""",
+}
+
+
+def run_probe(name, repeat=3) -> dict:
+    """
+    Runs one probe `repeat` times in fresh interpreters and keeps the median of every stage.
+    """
+    env = {**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "benchmark")}
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE_PREFIX + PROBES[name] + PROBE_SUFFIX],
+            capture_output=True, text=True, env=env, check=True
+        ).stdout
+        line = next(line for line in output.splitlines() if line.startswith("PROBE"))
+        samples.append(json.loads(line[len("PROBE"):]))
+    return {stage: statistics.median(sample[stage] for sample in samples) for stage in samples[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start and warm-rerun times of the worker, agent and dashboard.")
+    parser.add_argument("--probes", nargs="+", choices=list(PROBES), default=list(PROBES))
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per probe.")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "startup.json"))
+    parser.add_argument("--baseline", help="Previous startup JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.probes:
+        stages = run_probe(name, args.repeat)
+        results[name] = {"time_median": stages["total"], **stages}
+        details = "  ".join(f"{stage}={value * 1000:.0f} ms" for stage, value in stages.items() if stage != "peak_bytes")
+        print(f"{name:<22}{details}  rss={stages['peak_bytes'] / 2**20:.0f} MiB")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        for key, metric, before, after in regressions:
+            print(f"❌ Regression: {key} {metric} {before:.4g} -> {after:.4g} (+{after / before - 1:.0%})")
+        if regressions:
+            sys.exit(1)
@@ -1,14 +1,18 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
+import numpy as np
 import plotly.graph_objects as go
-import yaml
 import os
+import time
 from datetime import datetime
 from dotenv import load_dotenv
-from src.agent import EnergyTradingAgent
 from src.data_loader import MarketDataLoader
-from src.analytics import calculate_volatility
+from src.analytics import calculate_volatility, classify_regime
+from src import indicators
+from src.regime import format_event
+from src.feed_store import FeedStore
+from src import metrics
+from src.config import load_config, config_version
 
 if "GROQ_API_KEY" in st.secrets:
     os.environ["GROQ_API_KEY"] = st.secrets["GROQ_API_KEY"]
@@ -17,15 +21,33 @@ if "NEWS_API_KEY" in st.secrets:
     os.environ["NEWS_API_KEY"] = st.secrets["NEWS_API_KEY"]
 
 # Configuration & Setup
-with open("config/settings.yaml", "r") as f:
-    config = yaml.safe_load(f)
+# Parsed once per process; re-read only when settings.yaml changes (e.g. after a calibration)
+config = load_config()
 
 st.set_page_config(page_title="Energy Trading Dashboard", layout="wide", page_icon="⚡")
 load_dotenv()
 
+# Per-rerun timings (see the panel at the bottom of the page)
+rerun_start = time.perf_counter()
+rerun_spans = metrics.start_recording()
 
-# Map volatility thresholds for easy access
-thresholds = config['volatility_thresholds']
+
+# Shared across reruns and sessions, rebuilt when settings.yaml changes
+@st.cache_resource(max_entries=1)
+def get_loader(version):
+    return MarketDataLoader()
+
+
+@st.cache_resource(max_entries=1)
+def get_feed(version):
+    return FeedStore.from_config(load_config())
+
+
+# Map volatility thresholds for easy access: the worker's online thresholds when available,
+# otherwise the last batch calibration written to settings.yaml
+regime_status = get_feed(config_version()).get_status('regime') or {}
+primary_regime = regime_status.get('tickers', {}).get(config['market']['primary_ticker'], {})
+thresholds = primary_regime.get('thresholds') or config['volatility_thresholds']
 VOL_THRESHOLDS = {
     "CRITICAL_WAR": thresholds['critical'],
     "HIGH_TACTICAL": thresholds['high'],
@@ -33,15 +55,24 @@ VOL_THRESHOLDS = {
 }
 
 
+REGIME_LABELS = {
+    "critical": "🔴 Extreme Stress",
+    "high": "🟠 HIGH VOLATILITY",
+    "normal": "🟡 Normal",
+    "calm": "🟢 NOISE / CALM"
+}
+
+
 st.title("⚡ Energy Trading Dashboard")
 
 # Layout: 2/3 Quantitative (Charts) | 1/3 Qualitative (AI News)
 col_charts, col_news = st.columns([2, 1], gap="medium")
 
 # Initialize Loader
-loader = MarketDataLoader()
+loader = get_loader(config_version())
 primary_ticker = config['market']['primary_ticker']
-raw_data = yf.download(primary_ticker, period="2y", progress=False)
+# Bars are refreshed by the background worker: read the local store only
+raw_data = loader.fetch_bars(primary_ticker, period="2y", refresh=False)
 
 # ==============================================================================
 # LEFT COLUMN: QUANTITATIVE ANALYSIS (Charts & Metrics)
@@ -75,14 +106,7 @@ with col_charts:
 
         
         # Market Regime Determination
-        if current_vol > VOL_THRESHOLDS["CRITICAL_WAR"]:
-            status = "🔴 Extreme Stress"
-        elif current_vol > VOL_THRESHOLDS["HIGH_TACTICAL"]:
-            status = "🟠 HIGH VOLATILITY"
-        elif current_vol > VOL_THRESHOLDS["NOISE_LEVEL"]:
-            status = "🟡 Normal"
-        else:
-            status = "🟢 NOISE / CALM"
+        status = REGIME_LABELS[classify_regime(current_vol, thresholds)]
 
        # Key Metrics Display
         c1, c2, c3, c4 = st.columns(4)
@@ -90,17 +114,34 @@ with col_charts:
         c2.metric(vol_label, f"{current_vol:.2f}%", delta=f"{current_vol - VOL_THRESHOLDS['NOISE_LEVEL']:.2f}% vs Avg", delta_color="off")
         c3.metric("Regime (1M)", f"{last_month_vol:.2f}%", delta=regi_icon)
         c4.info(f"Status : {status}")
+        events = [event for event in regime_status.get('events', []) if event['ticker'] == primary_ticker]
+        if events:
+            st.caption(f"🔀 Last regime event: {format_event(events[-1])} · thresholds {'online' if primary_regime.get('thresholds') else 'from settings.yaml'}")
         
 
         # Primary Chart (Candlestick)
         # Timeframe selector
-        time_frame = st.pills("Timeframe", ["1M", "3M", "6M", "1Y"], default="3M", selection_mode="single", label_visibility="collapsed")
+        col_tf, col_bar = st.columns([2, 1])
+        with col_tf:
+            time_frame = st.pills("Timeframe", ["1M", "3M", "6M", "1Y"], default="3M", selection_mode="single", label_visibility="collapsed")
         if not time_frame: time_frame = "3M"
-        
+
+        # Bar size: every timeframe is aggregated from the same intraday feed by the bar store
+        resample_config = config.get('resample', {})
+        bar_sizes = resample_config.get('timeframes', ["1d"]) if resample_config.get('enabled') else ["1d"]
+        with col_bar:
+            bar_size = st.pills("Bars", bar_sizes, default="1d", selection_mode="single", label_visibility="collapsed") or "1d"
+
         lookback_map = {"1M": 30, "3M": 90, "6M": 180, "1Y": 365}
         lookback = lookback_map.get(time_frame, 90)
-        
-        df_plot = df.tail(lookback)
+
+        # Regime metrics above stay on daily bars (the thresholds are calibrated on them)
+        df_bars = df
+        if bar_size != "1d":
+            bars = loader.fetch_bars(primary_ticker, period="2y", interval=bar_size, refresh=False)
+            if not bars.empty:
+                df_bars = calculate_volatility(bars)
+        df_plot = df_bars.loc[df_bars.index[-1] - pd.Timedelta(days=lookback):]
 
         fig = go.Figure(data=[go.Candlestick(x=df_plot.index, open=df_plot['Open'], high=df_plot['High'], low=df_plot['Low'], close=df_plot['Close'], name="Natural Gas")])
         
@@ -121,31 +162,34 @@ with col_charts:
             
             # Compare with Secondary Ticker (e.g., Oil)
             secondary_ticker = config['market']['secondary_ticker']
-            oil_data = yf.download(secondary_ticker, period="2y", progress=False)
-            if isinstance(oil_data.columns, pd.MultiIndex): oil_data.columns = oil_data.columns.get_level_values(0)
-            
-            # Align data on common dates
-            common_index = df_plot.index.intersection(oil_data.index)
-            gas_aligned = df_plot.loc[common_index]['Close']
-            oil_aligned = oil_data.loc[common_index]['Close']
-            
-            # Normalize to percentage change for comparison
-            gas_norm = (gas_aligned / gas_aligned.iloc[0] - 1) * 100
-            oil_norm = (oil_aligned / oil_aligned.iloc[0] - 1) * 100
+            oil_data = loader.fetch_bars(secondary_ticker, period="2y", interval=bar_size, refresh=False)
             
+            with metrics.span("dashboard.correlation"):
+                # Align data on common dates (one pass over the int64 timestamps)
+                gas_pos, oil_pos = indicators.common_positions(df_plot.index, oil_data.index)
+                common_index = df_plot.index[gas_pos]
+                gas_aligned = df_plot['Close'].to_numpy()[gas_pos]
+                oil_aligned = oil_data['Close'].to_numpy()[oil_pos]
+
+                # Normalize to percentage change for comparison
+                gas_norm = (gas_aligned / gas_aligned[0] - 1) * 100 if len(gas_pos) else gas_aligned
+                oil_norm = (oil_aligned / oil_aligned[0] - 1) * 100 if len(oil_pos) else oil_aligned
+
+                # Latest rolling correlation of bar returns
+                corr_window = 30
+                returns_corr = indicators.rolling_corr(np.diff(gas_aligned), np.diff(oil_aligned), corr_window, tail=1) if len(gas_pos) > corr_window else [np.nan]
+
+            corr_label = f" · {corr_window}-bar ρ {returns_corr[-1]:+.2f}" if not np.isnan(returns_corr[-1]) else ""
             fig_corr = go.Figure()
             fig_corr.add_trace(go.Scatter(x=common_index, y=gas_norm, mode='lines', name='Gas', line=dict(color='#00B5F7')))
             fig_corr.add_trace(go.Scatter(x=common_index, y=oil_norm, mode='lines', name='Oil', line=dict(color='#FFD700')))
-            fig_corr.update_layout(template="plotly_dark", height=200, margin=dict(l=0, r=0, t=30, b=0), showlegend=True, title="Oil (Yellow) vs Gas (Blue) - Normalized %")
+            fig_corr.update_layout(template="plotly_dark", height=200, margin=dict(l=0, r=0, t=30, b=0), showlegend=True, title=f"Oil (Yellow) vs Gas (Blue) - Normalized %{corr_label}")
             st.plotly_chart(fig_corr, use_container_width=True)
 
         with col_b: # RSI
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            rsi_plot = rsi.tail(len(df_plot))
+            with metrics.span("dashboard.rsi"):
+                # Only the displayed bars (+ warm-up) are computed, not the whole history
+                rsi_plot = indicators.rsi(df_bars['Close'].to_numpy(), window=14, tail=len(df_plot))
             
             fig_rsi = go.Figure()
             fig_rsi.add_trace(go.Scatter(x=df_plot.index, y=rsi_plot, name='RSI', line=dict(color='#9D00FF')))
@@ -153,6 +197,24 @@ with col_charts:
             fig_rsi.add_hline(y=30, line_dash="dot", line_color="green")
             fig_rsi.update_layout(template="plotly_dark", height=200, yaxis=dict(range=[0, 100]), margin=dict(l=0, r=0, t=30, b=0), showlegend=True, title="⚡ RSI Indicator (Overbought > 70)")
             st.plotly_chart(fig_rsi, use_container_width=True)
+    else:
+        st.info("No market data in the local store yet. Start the worker with: `python -m src.worker`")
+
+    # Sentiment index vs. price, maintained incrementally by the worker
+    sentiment = get_feed(config_version()).get_status('sentiment')
+    if sentiment:
+        with st.expander("🧭 Sentiment vs Price"):
+            index_cols = st.columns(len(sentiment['tickers']))
+            for col, ticker, value in zip(index_cols, sentiment['tickers'], sentiment['index']):
+                col.metric(ticker, f"{value:+.2f}")
+
+            target = st.radio("Correlated with", ["returns", "vol_pct"], horizontal=True, format_func=lambda t: "Returns" if t == "returns" else "Volatility (Vol_Pct)")
+            fig_lag = go.Figure(data=go.Heatmap(
+                z=sentiment['correlation'][target], x=sentiment['tickers'], y=sentiment['lags'],
+                zmin=-1, zmax=1, colorscale="RdBu", colorbar=dict(title="ρ")
+            ))
+            fig_lag.update_layout(template="plotly_dark", height=300, margin=dict(l=0, r=0, t=30, b=0), yaxis_title="Lag (bars, > 0: sentiment leads)", title="Rolling lead/lag correlation")
+            st.plotly_chart(fig_lag, use_container_width=True)
 
 # ==============================================================================
 # RIGHT COLUMN: QUALITATIVE ANALYSIS (AI News Feed)
@@ -160,40 +222,23 @@ with col_charts:
 with col_news:
     st.subheader("🤖 AI Intel Feed")
     
+    # The background worker (python -m src.worker) fetches and classifies news;
+    # the dashboard only reads its published feed, so reruns never trigger network or LLM work.
+    feed = get_feed(config_version())
+
     # Search controls
-    default_topic = config['agent'].get('search_topic_default', "Natural Gas OR LNG")
+    default_topic = feed.get_status('refresh_request', {}).get('topic') or config['agent'].get('search_topic_default', "Natural Gas OR LNG")
     topic = st.text_input("Topic", value=default_topic, label_visibility="collapsed")
     
-    # Refresh Button (Clears session state to force new fetch)
+    # Refresh Button (asks the worker to poll now, for the requested topic)
     if st.button("⚡ REFRESH MARKET NEWS", type="primary", use_container_width=True):
-        if 'news_signals' in st.session_state:
-            del st.session_state['news_signals']
+        feed.set_status('refresh_request', {"topic": topic, "requested_at": time.time()})
+        st.toast("Refresh requested: the worker will publish new signals shortly.")
     
     st.divider()
 
-    # News Fetching Logic
-    def fetch_and_analyze_news(search_topic):
-        agent = EnergyTradingAgent()
-        signals = []
-        with st.spinner(f"AI Agent analyzing global wires for: {search_topic}..."):
-
-            news_items = loader.fetch_real_news(topic=search_topic)
-            
-            for item in news_items:
-                signal = agent.analyze_news(item['text'])
-                # Filter out noise
-                if signal and signal.category.value != "Other / Noise":
-                    signal._published_at = item.get('publishedAt', '')
-                    signals.append(signal)
-        return signals
-
-
-    # Persistence: Load news only if not already in Session State
-    if 'news_signals' not in st.session_state:
-        st.session_state['news_signals'] = fetch_and_analyze_news(topic)
-
     # Display Logic 
-    signals_to_display = st.session_state['news_signals']
+    signals_to_display = feed.latest(limit=config.get('worker', {}).get('feed_size', 20))
 
     if signals_to_display:
         for signal in signals_to_display:
@@ -212,7 +257,8 @@ with col_news:
                 raw_date = getattr(signal, '_published_at', '')
                 date_parsed = datetime.strptime(raw_date, "%Y-%m-%dT%H:%M:%SZ")
                 date_display = date_parsed.strftime("%d %b %Y · %H:%M UTC")
-                st.caption(f"Published on: {date_display}")
+                similar = getattr(signal, '_similar', 0)
+                st.caption(f"Published on: {date_display}" + (f" · +{similar} similar reports" if similar else ""))
                 
                 # Summary
                 st.caption(signal.summary)
@@ -221,4 +267,23 @@ with col_news:
                 st.markdown(f"**👉 Action:** `{signal.trading_recommendation}`")
     else:
         st.info("No critical market signals found at this moment.")
+
+    # Pipeline health, as published by the worker
+    news_poll = feed.get_status('news_poll')
+    if news_poll is None:
+        st.warning("No worker activity yet. Start it with: `python -m src.worker`")
+    else:
+        st.caption(f"🛰️ Last news poll: {datetime.fromtimestamp(news_poll['at']).strftime('%H:%M:%S')} ({news_poll['new']} new articles)")
+
+    triage_stats = feed.get_status('pipeline', {}).get('triage')
+    if triage_stats:
+        st.caption(f"🧹 Local triage skipped {triage_stats['skip_rate']:.0%} of wires (~{triage_stats['seconds_saved']:.1f}s of LLM time saved)")
+
+    # Where did this rerun spend its time?
+    with st.expander("⏱️ Rerun timings"):
+        timings = pd.DataFrame(rerun_spans, columns=["Step", "Seconds"])
+        if not timings.empty:
+            timings = timings.groupby("Step", sort=False)["Seconds"].agg(["count", "sum"]).rename(columns={"count": "Calls", "sum": "Seconds"})
+            st.dataframe(timings.style.format({"Seconds": "{:.3f}"}), use_container_width=True)
+        st.caption(f"Total rerun: {time.perf_counter() - rerun_start:.3f}s")
                 
\ No newline at end of file
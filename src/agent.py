@@ -1,9 +1,14 @@
-import yaml
 import os
+import threading
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from src.schema import MarketSignal, EventCategory
+from pydantic import ValidationError
+from src.schema import MarketSignal, IndexedMarketSignal, MarketSignalBatch, EventCategory
+from src.cache import SignalCache
+from src.alerts import Alert
+from src.llm_exec import LLMExecutor
+from src import metrics
+from src.config import load_config, config_version
 
 load_dotenv()
 
@@ -12,18 +17,41 @@ class EnergyTradingAgent:
     AI Agent responsible for analyzing energy market news and extracting 
     structured trading signals using a Large Language Model.
     """
-    def __init__(self):
+    def __init__(self, llm=None, cache=None, dispatcher=None):
+        """
+        Args:
+            llm: Optional chat model exposing `with_structured_output` (e.g. a local fake
+                 from `src.fakes` for offline runs), or a list of them in escalation order.
+                 Defaults to one ChatGroq client per model in `model.routes`.
+            cache (SignalCache): Optional signal cache. Defaults to the `cache` section of settings;
+                                 pass False to disable caching.
+            dispatcher (AlertDispatcher): Optional alert delivery subsystem. Without it,
+                                          alerts are only printed.
+        """
         # Load configuration
-        with open("config/settings.yaml", "r") as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config()
 
-        # 1. Configure LLM
+        # 1. Configure LLM(s): the small, fast model first, larger ones for escalation
         # Set temperature to 0.0 for deterministic, logic-driven outputs
-        self.llm = ChatGroq(
-            model_name=self.config['model']['name'],
-            temperature=0.0, 
-            groq_api_key=os.getenv("GROQ_API_KEY")
-        )
+        if llm is None:
+            # Imported here: langchain_groq alone takes about a second to import
+            from langchain_groq import ChatGroq
+            llm = [
+                ChatGroq(
+                    model_name=name,
+                    temperature=0.0,
+                    groq_api_key=os.getenv("GROQ_API_KEY"),
+                    # Timeouts and retries are owned by the execution layer
+                    timeout=self.config.get('llm_exec', {}).get('timeout_seconds', 10.0),
+                    max_retries=0
+                )
+                for name in self.config['model'].get('routes') or [self.config['model']['name']]
+            ]
+        self.llms = list(llm) if isinstance(llm, (list, tuple)) else [llm]
+        self.llm = self.llms[0]
+        self.max_concurrency = self.config['agent'].get('max_concurrency', 5)
+        self.dispatcher = dispatcher
+        self.packing = self.config['agent'].get('packing', {})
         
         # 2. Define System Prompt
         # Enforces specific domain logic to override general sentiment bias        
@@ -58,24 +86,270 @@ class EnergyTradingAgent:
         ])
         
         # 4. Build Chain
-        # Binds the prompt to the LLM and enforces the Pydantic schema (MarketSignal)
-        self.chain = self.prompt | self.llm.with_structured_output(MarketSignal)
+        # Binds the prompt to each LLM and enforces the Pydantic schema (MarketSignal);
+        # the executor adds timeouts, retries, hedging and escalation across the models
+        routes = [
+            (self._model_name(llm), (self.prompt | llm.with_structured_output(MarketSignal)).with_config(callbacks=[metrics.token_usage_callback()]))
+            for llm in self.llms
+        ]
+        self.executor = LLMExecutor.from_config(self.config, routes)
+        self.chain = self.executor.as_runnable()
+
+        # Packed mode: K articles share one request (and one copy of the system prompt)
+        self.packed_prompt = ChatPromptTemplate.from_messages([
+            ("system", self.system_prompt),
+            ("human", "Classify each article below independently. Return exactly one signal per article, "
+                      "with the article's index.\n\n{articles}"),
+        ])
+        # Raw JSON output (schema only) so that each packed item can be validated on its own
+        packed_chain = (
+            self.packed_prompt | self.llm.with_structured_output(MarketSignalBatch.model_json_schema())
+        ).with_config(callbacks=[metrics.token_usage_callback()])
+        # Primary model only, never hedged (large requests); failed items are retried one by one
+        self.packed_executor = LLMExecutor.from_config(
+            self.config, [(self._model_name(self.llm), packed_chain)], hedge=False, max_retries=0, validate=None,
+            timeout=self.config.get('llm_exec', {}).get('packed_timeout_seconds', 30.0)
+        )
+        self.packed_chain = self.packed_executor.as_runnable()
+
+        # 5. Signal Cache
+        # temperature=0.0 makes outputs deterministic, so identical news never needs a second call
+        self.model_name = self._model_name(self.llm)
+        if cache is None:
+            cache = SignalCache.from_config(self.config, self.model_name, self.system_prompt)
+        self.cache = cache or None
+
+    @staticmethod
+    def _model_name(llm) -> str:
+        return getattr(llm, 'model_name', None) or type(llm).__name__
 
     def analyze_news(self, news_text: str) -> MarketSignal:
         """
         Processes raw news text through the LLM chain to return a structured signal.
         """
         
+        if self.cache:
+            cached = self.cache.get(news_text)
+            if cached is not None:
+                return cached
+
         try:
-            signal = self.chain.invoke({"text": news_text})
-            return signal
+            with metrics.span("llm_call"):
+                signal = self.chain.invoke({"text": news_text})
         except Exception as e:
             print(f"Error during analysis: {e}")
+            metrics.inc("errors_total", source="llm")
             return None
 
-    def evaluate_risk(self, signal: MarketSignal):
+        if self.cache:
+            self.cache.put(news_text, signal)
+        return signal
+
+    async def aanalyze_news(self, news_text: str) -> MarketSignal:
+        """
+        Async counterpart of `analyze_news`, built on the chain's `ainvoke`.
+        """
+        if self.cache:
+            cached = self.cache.get(news_text)
+            if cached is not None:
+                return cached
+
+        try:
+            with metrics.span("llm_call"):
+                signal = await self.chain.ainvoke({"text": news_text})
+        except Exception as e:
+            print(f"Error during analysis: {e}")
+            metrics.inc("errors_total", source="llm")
+            return None
+
+        if self.cache:
+            self.cache.put(news_text, signal)
+        return signal
+
+    def analyze_many(self, news_texts, max_concurrency=None):
+        """
+        Classifies a batch of news texts concurrently.
+
+        Args:
+            news_texts (list[str]): Raw news texts.
+            max_concurrency (int): Maximum number of in-flight LLM calls
+                                   (defaults to `agent.max_concurrency` in settings).
+
+        Returns:
+            list: One MarketSignal per input, in input order. Failed items are None.
+        """
+        signals, pending = self._lookup_cache(news_texts)
+        if not pending:
+            return signals
+        if self._should_pack(pending):
+            return self._analyze_packed(news_texts, signals, pending, max_concurrency)
+
+        with metrics.span("llm_batch"):
+            results = self.chain.batch(
+                [{"text": news_texts[i]} for i in pending],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+        return self._merge_results(news_texts, signals, pending, results)
+
+    async def aanalyze_many(self, news_texts, max_concurrency=None):
+        """
+        Async counterpart of `analyze_many`, built on the chain's `abatch`.
+        """
+        signals, pending = self._lookup_cache(news_texts)
+        if not pending:
+            return signals
+        if self._should_pack(pending):
+            return await self._aanalyze_packed(news_texts, signals, pending, max_concurrency)
+
+        with metrics.span("llm_batch"):
+            results = await self.chain.abatch(
+                [{"text": news_texts[i]} for i in pending],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+        return self._merge_results(news_texts, signals, pending, results)
+
+    def _should_pack(self, pending):
+        # Packing only pays off under load, when several articles wait for classification
+        return self.packing.get('enabled', False) and len(pending) >= self.packing.get('min_items', 4)
+
+    def build_packs(self, news_texts, indices):
+        """
+        Groups articles into packs sized to the token budget of one request.
+
+        Token counts are estimated at ~4 characters per token, plus the expected
+        size of each returned signal.
+
+        Returns:
+            list: Lists of indices, one per packed request.
+        """
+        budget = self.packing.get('token_budget', 2000)
+        max_size = self.packing.get('max_pack_size', 8)
+        output_tokens = self.packing.get('output_tokens_per_signal', 150)
+
+        packs, current, used = [], [], 0
+        for i in indices:
+            cost = len(news_texts[i]) // 4 + output_tokens
+            if current and (used + cost > budget or len(current) == max_size):
+                packs.append(current)
+                current, used = [], 0
+            current.append(i)
+            used += cost
+        if current:
+            packs.append(current)
+        return packs
+
+    def _pack_input(self, news_texts, pack):
+        return {"articles": "\n\n".join(f"[{position}] {news_texts[i]}" for position, i in enumerate(pack))}
+
+    def _unpack(self, pack, result):
+        """
+        Validates a packed answer item by item.
+
+        Returns:
+            dict: Article index -> MarketSignal, for the items that came back valid
+                  (and confident enough, when a larger model is configured).
+        """
+        if isinstance(result, Exception):
+            print(f"Error during packed analysis: {result}")
+            metrics.inc("errors_total", source="llm_packed")
+            return {}
+        if not isinstance(result, dict):
+            return {}
+
+        signals = {}
+        escalate = len(self.executor.routes) > 1
+        with metrics.span("signal_validation"):
+            for item in result.get('signals') or []:
+                try:
+                    item = IndexedMarketSignal.model_validate(item)
+                except ValidationError:
+                    metrics.inc("errors_total", source="signal_validation")
+                    continue
+
+                # Unsure items go through the routed single-article path (and may escalate)
+                if escalate and item.confidence is not None and item.confidence < self.executor.min_confidence:
+                    continue
+
+                # Ignore out-of-range or repeated indices; the missing articles get retried alone
+                if 0 <= item.index < len(pack) and pack[item.index] not in signals:
+                    signals[pack[item.index]] = MarketSignal.model_validate(item.model_dump(exclude={"index"}))
+        return signals
+
+    def _analyze_packed(self, news_texts, signals, pending, max_concurrency=None):
+        packs = self.build_packs(news_texts, pending)
+        with metrics.span("llm_packed_batch"):
+            results = self.packed_chain.batch(
+                [self._pack_input(news_texts, pack) for pack in packs],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+        resolved = self._collect_packs(news_texts, signals, packs, results)
+
+        # Only the failed items are retried, one article per call
+        failed = [i for i in pending if i not in resolved]
+        if failed:
+            retries = self.chain.batch(
+                [{"text": news_texts[i]} for i in failed],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+            self._merge_results(news_texts, signals, failed, retries)
+        return signals
+
+    async def _aanalyze_packed(self, news_texts, signals, pending, max_concurrency=None):
+        packs = self.build_packs(news_texts, pending)
+        with metrics.span("llm_packed_batch"):
+            results = await self.packed_chain.abatch(
+                [self._pack_input(news_texts, pack) for pack in packs],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+        resolved = self._collect_packs(news_texts, signals, packs, results)
+
+        failed = [i for i in pending if i not in resolved]
+        if failed:
+            retries = await self.chain.abatch(
+                [{"text": news_texts[i]} for i in failed],
+                config={"max_concurrency": max_concurrency or self.max_concurrency},
+                return_exceptions=True
+            )
+            self._merge_results(news_texts, signals, failed, retries)
+        return signals
+
+    def _collect_packs(self, news_texts, signals, packs, results):
+        resolved = {}
+        for pack, result in zip(packs, results):
+            resolved.update(self._unpack(pack, result))
+        self._merge_results(news_texts, signals, list(resolved), list(resolved.values()))
+        return resolved
+
+    def _lookup_cache(self, news_texts):
+        # Returns the cached signals (None where missing) and the indices still to classify
+        signals = [self.cache.get(text) if self.cache else None for text in news_texts]
+        pending = [i for i, signal in enumerate(signals) if signal is None]
+        return signals, pending
+
+    def _merge_results(self, news_texts, signals, pending, results):
+        for i, result in zip(pending, results):
+            # Per-item error isolation: a failed call only voids its own slot
+            if isinstance(result, Exception):
+                print(f"Error during analysis: {result}")
+                metrics.inc("errors_total", source="llm")
+                continue
+            signals[i] = result
+            if self.cache:
+                self.cache.put(news_texts[i], result)
+        return signals
+
+    def evaluate_risk(self, signal: MarketSignal, article=None):
         """
         Evaluates the category of the signal to determine if an alert is required.
+
+        Args:
+            signal (MarketSignal): Classified signal.
+            article (dict): Optional source article ('publishedAt', 'received_at') attached to the alert.
         """
         
         # Define high-priority categories from schema
@@ -86,14 +360,39 @@ class EnergyTradingAgent:
         ]
         
         if signal.category in critical_categories:
-            return self._trigger_alert(signal)
+            return self._trigger_alert(signal, article or {})
         else:
             return self._log_info(signal)
 
-    def _trigger_alert(self, signal: MarketSignal):
-        print(f"🚨 ALERT: {signal.category.value} -> {signal.headline}")
-        return "ALERT_SENT"
+    def _trigger_alert(self, signal: MarketSignal, article=None):
+        if self.dispatcher is None:
+            print(f"🚨 ALERT: {signal.category.value} -> {signal.headline}")
+            return "ALERT_SENT"
+
+        # Delivery is asynchronous: this only hands the alert over to the dispatcher
+        article = article or {}
+        alert = Alert.from_signal(signal, article.get('publishedAt'), article.get('received_at'))
+        return "ALERT_SENT" if self.dispatcher.submit(alert) else "ALERT_SUPPRESSED"
 
     def _log_info(self, signal: MarketSignal):
         print(f"ℹ️  Info: {signal.category.value} -> {signal.headline}")
-        return "LOGGED"
\ No newline at end of file
+        return "LOGGED"
+
+
+# Process-wide agent, rebuilt only when settings.yaml changes
+_shared_agent = None
+_shared_version = None
+_shared_lock = threading.Lock()
+
+
+def get_agent() -> EnergyTradingAgent:
+    """
+    Returns the shared EnergyTradingAgent (LLM client, prompts, chains and cache are built once
+    per process instead of once per refresh). A new agent is built when the config file changes.
+    """
+    global _shared_agent, _shared_version
+    version = config_version()
+    with _shared_lock:
+        if _shared_agent is None or _shared_version != version:
+            _shared_agent, _shared_version = EnergyTradingAgent(), version
+        return _shared_agent
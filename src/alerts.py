@@ -0,0 +1,327 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import List, Optional
+import numpy as np
+import requests
+from pydantic import BaseModel, Field
+from src import metrics
+from src.analytics import calculate_volatility, classify_regime
+from src.regime import RegimeDetector
+
+
+class Alert(BaseModel):
+    """
+    A deliverable alert built from a critical MarketSignal.
+    """
+    category: str
+    sentiment: str
+    headline: str
+    affected_assets: List[str]
+    summary: str
+    trading_recommendation: str
+    published_at: Optional[str] = None
+    received_at: float = Field(default_factory=time.time, description="News arrival time (epoch seconds), for latency.")
+    ticker: Optional[str] = None
+    regime: Optional[str] = None
+    vol_pct: Optional[float] = None
+
+    @classmethod
+    def from_signal(cls, signal, published_at=None, received_at=None):
+        return cls(
+            category=signal.category.value,
+            sentiment=signal.sentiment,
+            headline=signal.headline,
+            affected_assets=signal.affected_assets,
+            summary=signal.summary,
+            trading_recommendation=signal.trading_recommendation,
+            published_at=published_at,
+            received_at=received_at or time.time()
+        )
+
+
+class StdoutSink:
+    async def send(self, alert: Alert):
+        regime = f" [{alert.regime} regime, vol {alert.vol_pct:.2f}%]" if alert.regime else ""
+        print(f"🚨 ALERT: {alert.category} -> {alert.headline}{regime}")
+
+
+class JsonlSink:
+    """
+    Appends one JSON line per alert.
+    """
+    def __init__(self, path="data/alerts.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _append(self, line):
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+    async def send(self, alert: Alert):
+        await asyncio.to_thread(self._append, alert.model_dump_json())
+
+
+class WebhookSink:
+    """
+    POSTs the alert as JSON to a webhook URL (Slack/Teams relay, internal service, ...).
+    """
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _post(self, payload):
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+
+    async def send(self, alert: Alert):
+        await asyncio.to_thread(self._post, alert.model_dump(mode="json"))
+
+
+class AlertThrottle:
+    """
+    Sliding-window deduplication and throttling per (category, asset).
+
+    An alert is dropped if the same headline was already sent in the window, or if its
+    (category, asset) key already produced `max_per_window` alerts in the window.
+    """
+    def __init__(self, window_seconds=900, max_per_window=3):
+        self.window = window_seconds
+        self.max_per_window = max_per_window
+        self._sent = defaultdict(deque)
+        self._headlines = {}
+        self._lock = threading.Lock()
+
+    def allow(self, alert: Alert, now=None) -> bool:
+        now = now or time.time()
+        headline_key = hashlib.sha1(alert.headline.lower().encode("utf-8")).hexdigest()
+        keys = [(alert.category, asset.lower()) for asset in alert.affected_assets] or [(alert.category, "")]
+
+        with self._lock:
+            # Same story already alerted within the window
+            if self._headlines.get(headline_key, -np.inf) > now - self.window:
+                return False
+
+            for key in keys:
+                timestamps = self._sent[key]
+                while timestamps and timestamps[0] <= now - self.window:
+                    timestamps.popleft()
+            if any(len(self._sent[key]) >= self.max_per_window for key in keys):
+                return False
+
+            for key in keys:
+                self._sent[key].append(now)
+            self._headlines[headline_key] = now
+            if len(self._headlines) > 10_000:
+                self._headlines = {k: t for k, t in self._headlines.items() if t > now - self.window}
+        return True
+
+
+class RegimeMonitor:
+    """
+    Looks up the current volatility regime of the ticker an alert refers to, against the
+    online thresholds of the RegimeDetector (the ones the dashboard shows), or the static
+    settings.yaml thresholds while the detector warms up.
+    Results are cached until the bar store file or the detector state for that ticker changes.
+
+    Args:
+        loader (MarketDataLoader): Bar store access.
+        regime (RegimeDetector): Live detector (defaults to the state persisted by the worker).
+    """
+    def __init__(self, loader, regime=None):
+        self.loader = loader
+        self.regime = regime if regime is not None else RegimeDetector.from_config(loader.config)
+        self.asset_tickers = loader.config['market'].get('asset_tickers', {})
+        self.primary = loader.config['market']['primary_ticker']
+        self._cache = {}
+
+    def thresholds_for(self, ticker):
+        by_ticker = self.loader.config.get('volatility_thresholds_by_ticker', {})
+        return self.regime.thresholds(ticker) or by_ticker.get(ticker) or self.loader.config['volatility_thresholds']
+
+    def ticker_for(self, assets):
+        for asset in assets:
+            lowered = asset.lower()
+            for keyword, ticker in self.asset_tickers.items():
+                if keyword in lowered:
+                    return ticker
+        return self.primary
+
+    def current(self, ticker):
+        version = (self.loader.store.version(ticker, "1d"), self.regime.state.get(ticker, {}).get('last_bar'))
+        cached = self._cache.get(ticker)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        bars = self.loader.fetch_bars(ticker, period="1mo", refresh=False)
+        result = (None, None)
+        if not bars.empty:
+            df = calculate_volatility(bars)
+            if not df.empty:
+                vol_pct = float(df['Vol_Pct'].iloc[-1])
+                result = (classify_regime(vol_pct, self.thresholds_for(ticker)), vol_pct)
+        self._cache[ticker] = (version, result)
+        return result
+
+    def enrich(self, alert: Alert) -> Alert:
+        ticker = self.ticker_for(alert.affected_assets)
+        regime, vol_pct = self.current(ticker)
+        return alert.model_copy(update={"ticker": ticker, "regime": regime, "vol_pct": vol_pct})
+
+
+class AlertDispatcher:
+    """
+    Asynchronous, non-blocking alert delivery.
+
+    `submit` only runs the throttle check and hands the alert to an event loop running on a
+    background thread; enrichment and delivery to every sink (with retries and exponential
+    backoff) happen there, concurrently across alerts. End-to-end latency from news arrival
+    to delivery is recorded for every alert.
+
+    Args:
+        sinks (list): Objects exposing `async send(alert)`.
+        enrich (callable): Optional Alert -> Alert enrichment (e.g. RegimeMonitor.enrich).
+        throttle (AlertThrottle): Optional dedup/throttle policy.
+        max_retries (int): Retries per sink after the first attempt.
+        max_in_flight (int): Maximum alerts being delivered at the same time.
+    """
+    def __init__(self, sinks, enrich=None, throttle=None, max_retries=3, backoff_base=0.2, max_in_flight=100):
+        self.sinks = sinks
+        self.enrich = enrich
+        self.throttle = throttle
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_in_flight = max_in_flight
+
+        self.submitted = 0
+        self.delivered = 0
+        self.failed = 0
+        self.suppressed = 0
+        self.latencies = deque(maxlen=1000)
+
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+
+    @classmethod
+    def from_config(cls, config, loader=None, regime=None):
+        section = config.get('alerts', {})
+        sink_config = section.get('sinks', {})
+        timeout = section.get('timeout_seconds', 5)
+
+        sinks = []
+        if sink_config.get('stdout', True):
+            sinks.append(StdoutSink())
+        if sink_config.get('jsonl'):
+            sinks.append(JsonlSink(sink_config['jsonl']))
+        if sink_config.get('webhook'):
+            sinks.append(WebhookSink(sink_config['webhook'], timeout=timeout))
+
+        return cls(
+            sinks,
+            enrich=RegimeMonitor(loader, regime).enrich if loader is not None else None,
+            throttle=AlertThrottle(section.get('throttle_window_seconds', 900), section.get('max_per_window', 3)),
+            max_retries=config['agent'].get('max_retries', 3),
+            max_in_flight=section.get('max_in_flight', 100)
+        )
+
+    def start(self):
+        """
+        Starts the delivery event loop on a daemon thread.
+        """
+        if self._thread is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, alert: Alert) -> bool:
+        """
+        Queues an alert for delivery without blocking.
+
+        Returns:
+            bool: False if the alert was deduplicated or throttled.
+        """
+        if self.throttle is not None and not self.throttle.allow(alert):
+            self.suppressed += 1
+            return False
+
+        self.start()
+        self.submitted += 1
+        with self._pending_lock:
+            self._pending += 1
+            self._idle.clear()
+        asyncio.run_coroutine_threadsafe(self._deliver(alert), self._loop)
+        return True
+
+    async def _send_with_retry(self, sink, alert):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await sink.send(alert)
+                return True
+            except Exception as e:
+                print(f"⚠️ Alert delivery failed via {type(sink).__name__} (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff_base * 2 ** attempt)
+        return False
+
+    async def _deliver(self, alert):
+        try:
+            async with self._semaphore:
+                if self.enrich is not None:
+                    try:
+                        alert = await asyncio.to_thread(self.enrich, alert)
+                    except Exception as e:
+                        # The alert still goes out, without the regime context
+                        print(f"⚠️ Alert enrichment failed: {e}")
+                        metrics.inc("errors_total", source="alert_enrichment")
+                results = await asyncio.gather(*(self._send_with_retry(sink, alert) for sink in self.sinks))
+                if all(results):
+                    self.delivered += 1
+                else:
+                    self.failed += 1
+                    metrics.inc("errors_total", source="alert_delivery")
+                latency = time.time() - alert.received_at
+                self.latencies.append(latency)
+                metrics.observe("alert_latency_seconds", latency, help="News arrival to alert delivery.")
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.set()
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Waits until every submitted alert has been delivered (or has failed).
+        """
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop, self._thread = None, None
+
+    def stats(self) -> dict:
+        latencies = np.array(self.latencies)
+        return {
+            "submitted": self.submitted,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "suppressed": self.suppressed,
+            "latency_p50": float(np.percentile(latencies, 50)) if latencies.size else None,
+            "latency_p95": float(np.percentile(latencies, 95)) if latencies.size else None,
+            "latency_max": float(latencies.max()) if latencies.size else None
+        }
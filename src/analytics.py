@@ -1,5 +1,56 @@
+from collections import deque
+import numpy as np
 import pandas as pd
+from src import metrics
 
+# Field order of the last axis of a price panel
+OHLC_FIELDS = ("Open", "High", "Low", "Close")
+
+
+def classify_regime(vol_pct: float, thresholds: dict) -> str:
+    """
+    Maps a volatility reading onto the calibrated regimes.
+
+    Args:
+        vol_pct (float): Normalized True Range (%).
+        thresholds (dict): 'critical', 'high' and 'noise' levels (see settings.yaml).
+
+    Returns:
+        str: One of 'critical', 'high', 'normal' or 'calm'.
+    """
+    if vol_pct > thresholds['critical']:
+        return "critical"
+    elif vol_pct > thresholds['high']:
+        return "high"
+    elif vol_pct > thresholds['noise']:
+        return "normal"
+    return "calm"
+
+
+def volatility_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray):
+    """
+    NumPy-only fast path for the True Range and normalized volatility.
+    Works on single series or (time × ticker) matrices.
+
+    Returns:
+        tuple: (true_range, vol_pct) arrays. The first element is NaN (no previous close).
+    """
+    prev_close = np.empty(close.shape)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+
+    # True Range is the maximum of the three components
+    true_range = np.maximum(
+        np.abs(high - low),
+        np.maximum(np.abs(high - prev_close), np.abs(low - prev_close))
+    )
+
+    # Normalize volatility as a percentage of the previous close for comparability
+    vol_pct = true_range / prev_close * 100
+    return true_range, vol_pct
+
+
+@metrics.timed("calculate_volatility")
 def calculate_volatility(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculates volatility metrics based on the True Range (TR) to account for price gaps.
@@ -10,21 +61,203 @@ def calculate_volatility(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Input DataFrame with added 'True_Range' and 'Vol_Pct' columns.
     """
-    df = df.copy()
-    
     # Flatten MultiIndex columns if present (handling specific YFinance output format)
     if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-        
-    df['Prev_Close'] = df['Close'].shift(1)
-    
-    # True Range is the maximum of the three components
-    df['R1'] = abs(df['High'] - df['Low'])
-    df['R2'] = abs(df['High'] - df['Prev_Close'])
-    df['R3'] = abs(df['Low'] - df['Prev_Close'])
-    df['True_Range'] = df[['R1', 'R2', 'R3']].max(axis=1)
-    
-    # Normalize volatility as a percentage of the previous close for comparability
-    df['Vol_Pct'] = (df['True_Range'] / df['Prev_Close']) * 100
-    
-    return df.dropna()
\ No newline at end of file
+        df = df.set_axis(df.columns.get_level_values(0), axis=1)
+
+    true_range, vol_pct = volatility_arrays(
+        df['High'].to_numpy(dtype=float),
+        df['Low'].to_numpy(dtype=float),
+        df['Close'].to_numpy(dtype=float)
+    )
+
+    return df.assign(True_Range=true_range, Vol_Pct=vol_pct).dropna()
+
+
+def build_panel(frames: dict):
+    """
+    Aligns per-ticker OHLC frames into a single (time × ticker × OHLC) array.
+
+    Args:
+        frames (dict): Ticker -> OHLC DataFrame (as returned by `MarketDataLoader.fetch_bars`).
+
+    Returns:
+        tuple: (index, tickers, panel) where panel has shape (T, N, 4) in OHLC_FIELDS order.
+               Bars missing for a ticker on a given timestamp are NaN.
+    """
+    tickers = list(frames)
+    combined = pd.concat({ticker: frames[ticker] for ticker in tickers}, axis=1).sort_index()
+
+    # Flatten any nested yfinance levels, keeping (ticker, field)
+    if combined.columns.nlevels > 2:
+        combined.columns = combined.columns.droplevel(list(range(2, combined.columns.nlevels)))
+
+    columns = pd.MultiIndex.from_product([tickers, OHLC_FIELDS])
+    values = combined.reindex(columns=columns).to_numpy(dtype=float)
+    return combined.index, tickers, values.reshape(len(combined.index), len(tickers), len(OHLC_FIELDS))
+
+
+def panel_rsi(close: np.ndarray, window=14) -> np.ndarray:
+    """
+    RSI of every column of a (T, N) close matrix, computed by `indicators.rsi` over the
+    ticker's own bars: timestamps where a ticker has no bar (other trading calendars)
+    are NaN instead of flat price changes.
+    """
+    # Imported here: indicators itself builds on volatility_arrays
+    from src import indicators
+
+    out = np.full(close.shape, np.nan)
+    for column in range(close.shape[1]):
+        valid = ~np.isnan(close[:, column])
+        out[valid, column] = indicators.rsi(close[valid, column], window)
+    return out
+
+
+def normalized_returns(close: np.ndarray) -> np.ndarray:
+    """
+    Percentage change of each column relative to its first valid price.
+    """
+    first_valid = np.argmax(~np.isnan(close), axis=0)
+    base = close[first_valid, np.arange(close.shape[1])] if close.ndim == 2 else close[first_valid]
+    return (close / base - 1) * 100
+
+
+def correlation_matrix(close: np.ndarray) -> np.ndarray:
+    """
+    Pairwise correlation of daily returns for all tickers at once (pairwise-complete
+    observations, so tickers with different trading calendars can be compared).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close[1:] / close[:-1] - 1
+    mask = (~np.isnan(returns)).astype(float)
+    x = np.nan_to_num(returns)
+
+    # Every moment is restricted to the rows where both tickers have a return
+    n = mask.T @ mask
+    sum_x = x.T @ mask
+    sum_xx = (x * x).T @ mask
+    sum_xy = x.T @ x
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_x.T / n
+        var_x = sum_xx - sum_x ** 2 / n
+        return cov / np.sqrt(var_x * var_x.T)
+
+
+def analyze_panel(frames: dict, rsi_window=14) -> dict:
+    """
+    Runs the full analytics set over a multi-ticker universe in one vectorized pass.
+
+    Args:
+        frames (dict): Ticker -> OHLC DataFrame.
+        rsi_window (int): RSI lookback in bars.
+
+    Returns:
+        dict: 'true_range', 'vol_pct', 'rsi', 'normalized' (time × ticker DataFrames)
+              and 'correlation' (ticker × ticker DataFrame).
+    """
+    index, tickers, panel = build_panel(frames)
+    high, low, close = panel[:, :, 1], panel[:, :, 2], panel[:, :, 3]
+
+    true_range, vol_pct = volatility_arrays(high, low, close)
+
+    def as_frame(values):
+        return pd.DataFrame(values, index=index, columns=tickers)
+
+    return {
+        "true_range": as_frame(true_range),
+        "vol_pct": as_frame(vol_pct),
+        "rsi": as_frame(panel_rsi(close, rsi_window)),
+        "normalized": as_frame(normalized_returns(close)),
+        "correlation": pd.DataFrame(correlation_matrix(close), index=tickers, columns=tickers)
+    }
+
+
+class VolatilityStream:
+    """
+    Incremental counterpart of `calculate_volatility` for live bars.
+
+    Keeps the latest True Range, Vol_Pct and rolling Vol_Pct means in O(1) per bar
+    (running sums over fixed-size buffers), without allocating any DataFrame.
+
+    Args:
+        windows (tuple): Rolling-mean windows in bars (22 = the dashboard's 1M regime).
+        thresholds (dict): Optional 'critical'/'high'/'noise' levels used by `regime`.
+    """
+    def __init__(self, windows=(22,), thresholds=None):
+        self.thresholds = thresholds
+        self.prev_close = np.nan
+        self.true_range = np.nan
+        self.vol_pct = np.nan
+        self.count = 0
+        self._buffers = {window: deque(maxlen=window) for window in windows}
+        self._sums = {window: 0.0 for window in windows}
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        Ingests one bar and returns its Vol_Pct (NaN for the very first bar).
+        """
+        prev_close = self.prev_close
+        self.prev_close = close
+        if np.isnan(prev_close):
+            return np.nan
+
+        self.true_range = max(abs(high - low), abs(high - prev_close), abs(low - prev_close))
+        self.vol_pct = self.true_range / prev_close * 100
+        self.count += 1
+
+        for window, buffer in self._buffers.items():
+            if len(buffer) == window:
+                self._sums[window] -= buffer[0]
+            buffer.append(self.vol_pct)
+            self._sums[window] += self.vol_pct
+        return self.vol_pct
+
+    def update_many(self, high, low, close) -> np.ndarray:
+        """
+        Ingests a chunk of bars at once (vectorized) and returns their Vol_Pct values.
+        """
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        if close.size == 0:
+            return close
+
+        # Prepend the carried-over close so the first bar of the chunk gets its gap
+        true_range, vol_pct = volatility_arrays(
+            np.concatenate(([np.nan], high)),
+            np.concatenate(([np.nan], low)),
+            np.concatenate(([self.prev_close], close))
+        )
+        true_range, vol_pct = true_range[1:], vol_pct[1:]
+
+        self.prev_close = close[-1]
+        valid = vol_pct[~np.isnan(vol_pct)]
+        if valid.size:
+            self.true_range = true_range[~np.isnan(true_range)][-1]
+            self.vol_pct = valid[-1]
+            self.count += valid.size
+            for window, buffer in self._buffers.items():
+                buffer.extend(valid[-window:].tolist())
+                # Re-summing the (bounded) buffer also clears any floating-point drift
+                self._sums[window] = float(sum(buffer))
+        return vol_pct
+
+    def rolling_mean(self, window=22) -> float:
+        """
+        Mean Vol_Pct over the last `window` bars (NaN until the first bar arrives).
+        """
+        buffer = self._buffers[window]
+        return self._sums[window] / len(buffer) if buffer else np.nan
+
+    def regime(self, thresholds=None) -> str:
+        """
+        Classifies the latest Vol_Pct against `thresholds` (defaults to the ones given
+        at construction).
+
+        Raises:
+            ValueError: If no thresholds were given either way.
+        """
+        thresholds = thresholds if thresholds is not None else self.thresholds
+        if thresholds is None:
+            raise ValueError("VolatilityStream.regime() needs 'critical'/'high'/'noise' thresholds")
+        return classify_regime(self.vol_pct, thresholds)
@@ -0,0 +1,288 @@
+import json
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from src.analytics import volatility_arrays
+from src.signal_store import normalize_sentiment
+
+# Expected price direction of each sentiment
+SENTIMENT_DIRECTION = {"Bullish": 1, "Bearish": -1, "Neutral": 0}
+
+# Bar lengths for yfinance intervals that pandas cannot parse directly
+INTERVAL_LENGTHS = {"1wk": pd.Timedelta(weeks=1), "1mo": pd.Timedelta(days=30)}
+
+
+def iter_historical_news(loader, topic="energy trading", days=30):
+    """
+    Streams every historical article of the last `days` days (one concurrent, paginated backfill).
+    """
+    return loader.iter_news(topic=topic, start=datetime.now() - timedelta(days=days))
+
+
+def read_articles(path):
+    """
+    Streams recorded articles from a JSONL fixture ({"text": ..., "publishedAt": ...} per line).
+    """
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_bars(path) -> dict:
+    """
+    Loads recorded bars from a CSV fixture (one 'ticker', 'timestamp', 'Open', 'High', 'Low',
+    'Close' line per bar).
+
+    Returns:
+        dict: Ticker -> OHLC DataFrame indexed by timestamp, as the bar store serves them.
+    """
+    df = pd.read_csv(path, parse_dates=["timestamp"])
+    return {
+        ticker: group.drop(columns="ticker").set_index("timestamp").sort_index()
+        for ticker, group in df.groupby("ticker", sort=False)
+    }
+
+
+def classify_stream(agent, articles, batch_size=50):
+    """
+    Classifies a stream of articles in batches (through the agent's cache and concurrency).
+
+    Yields:
+        tuple: (article, MarketSignal or None).
+    """
+    batch = []
+    for article in articles:
+        batch.append(article)
+        if len(batch) == batch_size:
+            yield from zip(batch, agent.analyze_many([item['text'] for item in batch]))
+            batch = []
+    if batch:
+        yield from zip(batch, agent.analyze_many([item['text'] for item in batch]))
+
+
+def map_asset(asset: str, asset_tickers: dict):
+    """
+    Maps a free-form asset name from the LLM ("Natural Gas", "Brent crude") to a ticker.
+    """
+    lowered = asset.lower()
+    for keyword, ticker in asset_tickers.items():
+        if keyword in lowered:
+            return ticker
+    return None
+
+
+def signals_frame(classified, asset_tickers: dict) -> pd.DataFrame:
+    """
+    Flattens (article, signal) pairs into one row per (signal, mapped ticker).
+
+    Returns:
+        pd.DataFrame: 'published_at' (UTC), 'ticker', 'category', 'sentiment' (normalized as
+        in the SignalStore, e.g. 'Bearish (short-term)' -> 'Bearish'), 'headline'.
+    """
+    rows = {"published_at": [], "ticker": [], "category": [], "sentiment": [], "headline": []}
+    for article, signal in classified:
+        if signal is None:
+            continue
+        tickers = {map_asset(asset, asset_tickers) for asset in signal.affected_assets}
+        for ticker in tickers - {None}:
+            rows["published_at"].append(article['publishedAt'])
+            rows["ticker"].append(ticker)
+            rows["category"].append(signal.category.value)
+            rows["sentiment"].append(normalize_sentiment(signal.sentiment))
+            rows["headline"].append(signal.headline)
+
+    df = pd.DataFrame(rows)
+    df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
+    return df
+
+
+def store_signals_frame(store, asset_tickers: dict, start=None, end=None) -> pd.DataFrame:
+    """
+    Same output as `signals_frame`, read from the SignalStore instead of re-classifying
+    articles (each distinct asset name is mapped to a ticker once, not once per signal).
+    """
+    rows = store.query(start=start, end=end)
+    pairs = store.asset_pairs(rows)
+    tickers = {asset: map_asset(asset, asset_tickers) for asset in pairs['asset'].cat.categories}
+    pairs['ticker'] = pairs['asset'].astype(str).map(tickers)
+    pairs = pairs.dropna(subset=['ticker']).drop_duplicates(["row", "ticker"])
+
+    signals = store.frame(pairs['row'].unique(), text=True)
+    df = pairs.join(signals, on="row")
+    df['category'] = df['category'].astype(str)
+    df['sentiment'] = df['sentiment'].astype(str)
+    df = df.sort_values("published_at", kind="stable")
+    return df[["published_at", "ticker", "category", "sentiment", "headline"]].reset_index(drop=True)
+
+
+def align_to_bars(signal_times: np.ndarray, bar_close_times: np.ndarray) -> np.ndarray:
+    """
+    Vectorized as-of join: index of the first bar closing strictly after each signal.
+    Both inputs are int64 ns timestamps; only the bar close times need to be sorted.
+    """
+    return np.searchsorted(bar_close_times, signal_times, side="right")
+
+
+def forward_metrics(close: np.ndarray, vol_pct: np.ndarray, entry: np.ndarray, horizons) -> dict:
+    """
+    Forward returns and volatility after each entry bar, for every horizon at once.
+
+    The reference price is the last close known before the news (bar `entry - 1`), so a
+    horizon of h bars measures the reaction from that close to the close of bar `entry + h - 1`.
+    Signals without enough history before or bars after are NaN.
+    """
+    n = len(close)
+    # Prefix sums give the mean Vol_Pct over any bar range in O(1)
+    vol_cumsum = np.concatenate(([0.0], np.cumsum(np.nan_to_num(vol_pct))))
+    valid_entry = (entry >= 1) & (entry < n)
+    reference = close[np.clip(entry - 1, 0, n - 1)]
+
+    metrics = {}
+    for h in horizons:
+        exit_idx = entry + h - 1
+        valid = valid_entry & (exit_idx < n)
+        exit_clipped = np.clip(exit_idx, 0, n - 1)
+        entry_clipped = np.clip(entry, 0, n - 1)
+
+        metrics[f"ret_{h}"] = np.where(valid, close[exit_clipped] / reference - 1, np.nan)
+        metrics[f"vol_{h}"] = np.where(valid, (vol_cumsum[exit_clipped + 1] - vol_cumsum[entry_clipped]) / h, np.nan)
+    return metrics
+
+
+def bar_length(interval: str) -> pd.Timedelta:
+    return INTERVAL_LENGTHS.get(interval) or pd.Timedelta(interval)
+
+
+def bar_close_times(index: pd.DatetimeIndex, interval="1d", timezone="America/New_York",
+                    session_close="17h") -> pd.DatetimeIndex:
+    """
+    UTC close time of every bar.
+
+    Intraday bars close `bar_length` after their (UTC) timestamp. Daily and longer bars are
+    trade dates of the exchange: they close at `session_close` local time on the last day of
+    the bar (17:00 New York for CME energy), not at the next UTC midnight, so news published
+    after the settlement is credited to the next bar.
+    """
+    length = bar_length(interval)
+    if length < pd.Timedelta(days=1):
+        utc = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+        return utc + length
+
+    dates = index.tz_convert(timezone).tz_localize(None) if index.tz is not None else index
+    last_day = dates.normalize() + length - pd.Timedelta(days=1)
+    local_close = (last_day + pd.Timedelta(session_close)).tz_localize(timezone)
+    return local_close.tz_convert("UTC")
+
+
+def event_study(signals: pd.DataFrame, bars_by_ticker: dict, horizons=(1, 5, 10), interval="1d",
+                neutral_band=0.01, timezone="America/New_York", session_close="17h") -> pd.DataFrame:
+    """
+    Joins signals to the price reaction of their ticker.
+
+    Args:
+        signals (pd.DataFrame): Output of `signals_frame`.
+        bars_by_ticker (dict): Ticker -> OHLC DataFrame.
+        horizons (tuple): Forward horizons in bars.
+        interval (str): Bar size of `bars_by_ticker` (used to compute bar close times).
+        neutral_band (float): Absolute return below which a 'Neutral' call counts as a hit.
+        timezone (str): Exchange timezone of daily and weekly bars.
+        session_close (str): Local close time of a daily bar (see `bar_close_times`).
+
+    Returns:
+        pd.DataFrame: Signals with 'ret_<h>', 'vol_<h>' and 'hit_<h>' columns (empty, with
+        these columns, when no signal has bars).
+    """
+    parts = []
+
+    # One vectorized join per ticker, whatever the number of signals
+    for ticker, group in signals.groupby("ticker", sort=False):
+        bars = bars_by_ticker.get(ticker)
+        if bars is None or bars.empty:
+            continue
+
+        close = bars['Close'].to_numpy(dtype=float)
+        _, vol_pct = volatility_arrays(bars['High'].to_numpy(dtype=float), bars['Low'].to_numpy(dtype=float), close)
+
+        signal_times = pd.DatetimeIndex(group['published_at']).as_unit("ns").asi8
+        close_times = bar_close_times(bars.index, interval, timezone, session_close)
+        entry = align_to_bars(signal_times, close_times.as_unit("ns").asi8)
+        parts.append(group.assign(**forward_metrics(close, vol_pct, entry, horizons)))
+
+    if not parts:
+        columns = [f"{name}_{h}" for h in horizons for name in ("ret", "vol", "hit")]
+        return signals.iloc[0:0].assign(**{column: pd.Series(dtype=float) for column in columns})
+
+    results = pd.concat(parts).sort_values("published_at")
+    direction = results['sentiment'].map(SENTIMENT_DIRECTION).fillna(0).to_numpy()
+    for h in horizons:
+        returns = results[f"ret_{h}"].to_numpy()
+        hit = np.where(direction == 0, np.abs(returns) < neutral_band, np.sign(returns) == direction)
+        results[f"hit_{h}"] = np.where(np.isnan(returns), np.nan, hit)
+    return results
+
+
+def hit_rates(results: pd.DataFrame, horizons=(1, 5, 10)) -> pd.DataFrame:
+    """
+    Reports hit rate, mean forward return and mean forward volatility by category and sentiment.
+    """
+    aggregations = {"signals": ("ticker", "size")}
+    for h in horizons:
+        aggregations[f"hit_rate_{h}"] = (f"hit_{h}", "mean")
+        aggregations[f"mean_ret_{h}"] = (f"ret_{h}", "mean")
+        aggregations[f"mean_vol_{h}"] = (f"vol_{h}", "mean")
+    return results.groupby(["category", "sentiment"]).agg(**aggregations)
+
+
+def run_backtest(articles, agent, bars_by_ticker: dict, asset_tickers: dict, horizons=(1, 5, 10),
+                 interval="1d", batch_size=50):
+    """
+    Full pipeline: stream articles -> classify (cached, batched) -> align to bars -> report.
+
+    Args:
+        articles: Iterable of {"text", "publishedAt"} dicts (live via `iter_historical_news`
+                  or recorded via `read_articles`).
+        agent (EnergyTradingAgent): Classifier (a fake LLM keeps the run offline).
+        bars_by_ticker (dict): Ticker -> OHLC DataFrame.
+        asset_tickers (dict): Asset keyword -> ticker (see `market.asset_tickers`).
+
+    Returns:
+        tuple: (per-signal results DataFrame, hit-rate report DataFrame).
+    """
+    signals = signals_frame(classify_stream(agent, articles, batch_size), asset_tickers)
+    results = event_study(signals, bars_by_ticker, horizons, interval)
+    return results, hit_rates(results, horizons)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.agent import EnergyTradingAgent
+    from src.data_loader import MarketDataLoader
+
+    parser = argparse.ArgumentParser(description="Event study of the AI signals against forward price moves.")
+    parser.add_argument("--from-store", action="store_true", help="Use the signals recorded by the worker instead of re-classifying news.")
+    parser.add_argument("--articles", help="Recorded articles (JSONL, see read_articles) instead of the NewsAPI backfill.")
+    parser.add_argument("--bars", help="Recorded bars (CSV, see read_bars) instead of the bar store.")
+    parser.add_argument("--fake-llm", action="store_true", help="Classify with the offline keyword model of src.fakes (no API key).")
+    args = parser.parse_args()
+
+    loader = MarketDataLoader()
+    asset_tickers = loader.config['market']['asset_tickers']
+    topic = loader.config['agent'].get('search_topic_default', "Natural Gas OR LNG")
+
+    bars = read_bars(args.bars) if args.bars else loader.fetch_panel(sorted(set(asset_tickers.values())), period="1y")
+    if args.from_store:
+        from src.signal_store import SignalStore
+        signals = store_signals_frame(SignalStore.from_config(loader.config), asset_tickers)
+        results = event_study(signals, bars)
+        report = hit_rates(results)
+    else:
+        articles = read_articles(args.articles) if args.articles else iter_historical_news(loader, topic)
+        if args.fake_llm:
+            from src.fakes import FakeSignalLLM
+            agent = EnergyTradingAgent(llm=FakeSignalLLM(), cache=False)
+        else:
+            agent = EnergyTradingAgent()
+        results, report = run_backtest(articles, agent, bars, asset_tickers)
+    print(f"📊 Event study over {len(results)} signals")
+    print(report.to_string())
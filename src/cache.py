@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from src import metrics
+from src.schema import MarketSignal
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes news text so that trivial formatting differences share a cache entry.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def prompt_fingerprint(system_prompt: str) -> str:
+    """
+    Hashes the system prompt together with the MarketSignal JSON schema.
+    Any edit to either one changes the fingerprint and invalidates old entries.
+    """
+    schema = json.dumps(MarketSignal.model_json_schema(), sort_keys=True)
+    return hashlib.sha256((system_prompt + "\0" + schema).encode("utf-8")).hexdigest()
+
+
+class SignalCache:
+    """
+    Content-addressed, on-disk cache of LLM market signals (SQLite).
+
+    Entries are keyed by the normalized news text, the model name and the prompt/schema
+    fingerprint. Expired entries (TTL) are dropped on read, and the least recently used
+    entries are evicted once the cache exceeds `max_entries`.
+    """
+    def __init__(self, path="data/signal_cache.sqlite", model_name="", fingerprint="",
+                 ttl_seconds=None, max_entries=5000):
+        self.path = path
+        self.namespace = f"{model_name}\0{fingerprint}"
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS signals (
+                   key TEXT PRIMARY KEY,
+                   payload TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON signals(last_access)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config, model_name, system_prompt):
+        """
+        Builds the cache from the `cache` section of settings.yaml (None if disabled).
+        """
+        section = config.get('cache', {})
+        if not section.get('enabled', False):
+            return None
+
+        ttl_hours = section.get('ttl_hours')
+        return cls(
+            path=section.get('path', "data/signal_cache.sqlite"),
+            model_name=model_name,
+            fingerprint=prompt_fingerprint(system_prompt),
+            ttl_seconds=ttl_hours * 3600 if ttl_hours else None,
+            max_entries=section.get('max_entries', 5000)
+        )
+
+    def make_key(self, news_text: str) -> str:
+        text_hash = hashlib.sha256(normalize_text(news_text).encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{self.namespace}\0{text_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, news_text: str):
+        """
+        Returns the cached MarketSignal for this text, or None on a miss.
+        """
+        key = self.make_key(news_text)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM signals WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                # Expired entry: drop it and count as a miss
+                self._conn.execute("DELETE FROM signals WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                metrics.inc("cache_requests_total", help="Signal cache lookups.", result="miss")
+                return None
+
+            self._conn.execute("UPDATE signals SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            metrics.inc("cache_requests_total", help="Signal cache lookups.", result="hit")
+
+        return MarketSignal.model_validate_json(row[0])
+
+    def put(self, news_text: str, signal: MarketSignal):
+        """
+        Stores a signal and evicts least recently used entries beyond `max_entries`.
+        """
+        if signal is None:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signals (key, payload, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (self.make_key(news_text), signal.model_dump_json(), now, now)
+            )
+            if self.max_entries:
+                self._conn.execute(
+                    """DELETE FROM signals WHERE key IN (
+                           SELECT key FROM signals ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the current number of stored entries.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM signals")
+            self._conn.commit()
@@ -1,76 +1,179 @@
-import yfinance as yf
+import os
 import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from ruamel.yaml import YAML
-from datetime import datetime, timedelta
-from analytics import calculate_volatility
+from src.analytics import volatility_arrays
+from src.data_loader import MarketDataLoader
 
-def run_calibration(ticker="NG=F"):
+CONFIG_PATH = "config/settings.yaml"
+
+# Default grid, used when settings.yaml has no `calibration` section
+DEFAULT_WINDOWS = {"long_term": 1825, "short_term": 180}
+DEFAULT_PERCENTILES = [95]
+DEFAULT_LEVELS = {"critical": "long_term.p95", "high": "short_term.p95", "noise": "short_term.mean"}
+
+
+def sorted_percentiles(sorted_values: np.ndarray, percentiles) -> dict:
     """
-    Calculates volatility thresholds (Noise, High, Critical) based on historical data
-    and automatically updates the settings.yaml configuration.
+    Reads several percentiles from an already sorted array (same linear
+    interpolation as np.percentile, but a single sort for the whole grid).
+    """
+    positions = np.asarray(percentiles, dtype=float) / 100 * (len(sorted_values) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(sorted_values) - 1)
+    fraction = positions - lower
+    values = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+    return {f"p{p:g}": round(float(v), 2) for p, v in zip(percentiles, values)}
+
+
+def calibrate_ticker(task):
+    """
+    Computes the threshold grid of one ticker (runs inside a worker process).
+
+    Args:
+        task (tuple): (ticker, timestamps as int64 ns, high, low, close, windows, percentiles, now as int64 ns).
+
+    Returns:
+        tuple: (ticker, {window_name: {'mean': ..., 'p95': ..., 'bars': ...}}).
+    """
+    ticker, timestamps, high, low, close, windows, percentiles, now = task
+
+    _, vol_pct = volatility_arrays(high, low, close)
+    valid = ~np.isnan(vol_pct)
+    timestamps, vol_pct = timestamps[valid], vol_pct[valid]
+
+    results = {}
+    for name, days in windows.items():
+        window_vol = vol_pct[timestamps >= now - days * 86_400_000_000_000]
+
+        # Safety check for insufficient recent data
+        if window_vol.size == 0:
+            print(f"⚠️ {ticker}: no data in '{name}' window. Fallback to full history.")
+            window_vol = vol_pct
+        if window_vol.size == 0:
+            continue
+
+        stats = sorted_percentiles(np.sort(window_vol), percentiles)
+        stats['mean'] = round(float(window_vol.mean()), 2)
+        stats['bars'] = int(window_vol.size)
+        results[name] = stats
+    return ticker, results
+
+
+def resolve_levels(grid: dict, levels: dict) -> dict:
+    """
+    Maps the grid onto the dashboard's threshold levels (e.g. critical = 'long_term.p95').
+    """
+    thresholds = {}
+    for level, reference in levels.items():
+        window, stat = reference.split(".")
+        thresholds[level] = round(grid[window][stat], 2)
+    return thresholds
+
+
+def write_thresholds(results: dict, primary_ticker: str, config_path=CONFIG_PATH):
+    """
+    Writes every ticker's thresholds in a single atomic config update.
+    """
+    yaml = YAML()
+    with open(config_path, "r") as f:
+        config = yaml.load(f)
+
+    by_ticker = config.setdefault('volatility_thresholds_by_ticker', {})
+    for ticker, result in results.items():
+        by_ticker[ticker] = result
+
+    # The dashboard's default regime stays tied to the primary ticker
+    if primary_ticker in results:
+        vol_section = config.setdefault('volatility_thresholds', {})
+        for level in ("critical", "high", "noise"):
+            vol_section[level] = results[primary_ticker][level]
+
+    # Write to a temporary file, then swap it in so readers never see a partial config
+    tmp_path = config_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        yaml.dump(config, f)
+    os.replace(tmp_path, config_path)
+
+
+def calibrate_universe(tickers=None, workers=None, write=True, loader=None):
+    """
+    Calibrates volatility thresholds for every ticker over a grid of lookback windows
+    and percentiles, in parallel, then updates settings.yaml once.
+
+    Args:
+        tickers (list): Tickers to calibrate (defaults to `market.tickers`).
+        workers (int): Process pool size (defaults to `calibration.workers`).
+        write (bool): If False, only returns the results.
+        loader (MarketDataLoader): Optional loader (e.g. backed by an offline store).
+
+    Returns:
+        dict: Ticker -> {'critical', 'high', 'noise', 'windows': grid}.
     """
-    print(f"📉 Starting Calibration: Double Regime + Gaps ({ticker})...")
-    
-    # 1. Download 5 years of data to capture long-term tail risks
-    df = yf.download(ticker, period="5y", progress=False)
-    
-    # Flatten MultiIndex columns (YFinance specific fix)
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    
-    df = df.dropna()
-    df = calculate_volatility(df)
-
-    
-    # 2. Statistical Analysis
-    # A. Long Term: 95th percentile over 5 years (Defines "Crisis/War" threshold)
-    long_term_95 = np.percentile(df['Vol_Pct'], 95)
-    
-    # B. Short Term: Recent 6 months market regime (Defines "Tactical" thresholds)
-    start_date_short = datetime.now() - timedelta(days=180)
-    df_short = df[df.index >= start_date_short]
-    
-    # Safety check for insufficient recent data
-    if df_short.empty:
-        print("⚠️ Insufficient recent data. Fallback to long-term metrics.")
-        short_term_95 = long_term_95
-        short_term_avg = np.mean(df['Vol_Pct'])
+    loader = loader or MarketDataLoader()
+    section = loader.config.get('calibration', {})
+    windows = dict(section.get('windows', DEFAULT_WINDOWS))
+    percentiles = list(section.get('percentiles', DEFAULT_PERCENTILES))
+    levels = dict(section.get('levels', DEFAULT_LEVELS))
+    workers = workers or section.get('workers', os.cpu_count())
+    tickers = tickers or loader.get_tickers()
+
+    print(f"📉 Starting Calibration: {len(tickers)} tickers × {len(windows)} windows...")
+
+    # 1. Load history from the local bar store (only missing bars are downloaded)
+    now = pd.Timestamp.now().value
+    tasks = []
+    for ticker in tickers:
+        df = loader.fetch_bars(ticker, period=section.get('history_period', "5y")).dropna()
+        if df.empty:
+            print(f"⚠️ {ticker}: no market data, skipped.")
+            continue
+        index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        tasks.append((
+            ticker, index.asi8, df['High'].to_numpy(dtype=float), df['Low'].to_numpy(dtype=float),
+            df['Close'].to_numpy(dtype=float), windows, percentiles, now
+        ))
+
+    # 2. Statistical Analysis (one process per ticker)
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            grids = dict(pool.map(calibrate_ticker, tasks))
     else:
-        short_term_95 = np.percentile(df_short['Vol_Pct'], 95)
-        short_term_avg = np.mean(df_short['Vol_Pct'])
+        grids = dict(map(calibrate_ticker, tasks))
+
+    results = {}
+    for ticker, grid in grids.items():
+        try:
+            results[ticker] = {**resolve_levels(grid, levels), 'windows': grid}
+        except KeyError as e:
+            print(f"⚠️ {ticker}: missing statistic {e} for the configured levels, skipped.")
 
     # 3. Console Output
     print("\n" + "="*60)
     print("📊 CALIBRATION RESULTS")
     print("="*60)
-    print(f"1. Noise Level (Avg)      : {short_term_avg:.2f}%")
-    print(f"2. High Volatility (Tactical): {short_term_95:.2f}%  <-- Pour l'alerte 'High Volatility'")
-    print(f"3. Critical Level (Crisis)   : {long_term_95:.2f}%  <-- Pour l'alerte 'CRITICAL'")
+    print(f"{'Ticker':<10}{'Noise (Avg)':>15}{'High':>15}{'Critical':>15}")
+    for ticker, result in results.items():
+        print(f"{ticker:<10}{result['noise']:>14.2f}%{result['high']:>14.2f}%{result['critical']:>14.2f}%")
     print("-" * 60)
     print("👉 Metrics account for Monday morning gaps.")
     print("="*60)
-    
-    # 4. Update Configuration File
-    file_path = "config/settings.yaml"
-    yaml = YAML()
 
-    # Load config
-    with open(file_path, "r") as f:
-        config = yaml.load(f)
+    # 4. Update Configuration File
+    if write and results:
+        write_thresholds(results, loader.config['market']['primary_ticker'])
+        print(f"✅ Configuration updated successfully: {CONFIG_PATH}")
+    return results
 
-    # Update values
-    vol_section = config.setdefault('volatility_thresholds', {})
 
-    vol_section['critical'] = float(f"{long_term_95:.2f}")
-    vol_section['high']     = float(f"{short_term_95:.2f}")
-    vol_section['noise']    = float(f"{short_term_avg:.2f}")
+def run_calibration(ticker="NG=F"):
+    """
+    Calculates volatility thresholds (Noise, High, Critical) for a single ticker
+    and automatically updates the settings.yaml configuration.
+    """
+    return calibrate_universe(tickers=[ticker], workers=1)
 
-    # Save changes
-    with open(file_path, "w") as f:
-        yaml.dump(config, f)
 
-    print(f"✅ Configuration updated successfully: {file_path}")
-          
 if __name__ == "__main__":
-    run_calibration()
\ No newline at end of file
+    calibrate_universe()
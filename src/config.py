@@ -0,0 +1,38 @@
+import copy
+import os
+import threading
+import yaml
+
+CONFIG_PATH = "config/settings.yaml"
+
+# path -> (mtime, parsed config)
+_cache = {}
+_lock = threading.Lock()
+
+
+def config_version(path=CONFIG_PATH) -> float:
+    """
+    Returns the modification time of the config file, used as a cache key by the
+    shared objects built from it (0.0 if the file is missing).
+    """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def load_config(path=CONFIG_PATH) -> dict:
+    """
+    Returns settings.yaml, parsed once per process and re-read only when the file changes
+    (e.g. after a calibration run rewrote the thresholds).
+
+    Returns:
+        dict: A private copy, so callers may modify it freely.
+    """
+    version = config_version(path)
+    with _lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != version:
+            with open(path, "r") as f:
+                cached = _cache[path] = (version, yaml.safe_load(f))
+    return copy.deepcopy(cached[1])
@@ -1,84 +1,80 @@
 import os
-import requests
-import yfinance as yf
-import yaml
+import pandas as pd
 from datetime import datetime, timedelta  # <--- INDISPENSABLE pour le voyage dans le temps
+from functools import cached_property
+from src import metrics
+from src.config import load_config
+from src.market_store import BarStore
 
 class MarketDataLoader:
     """
     Handles data ingestion from external APIs:
     1. NewsAPI for textual market intelligence.
-    2. Yahoo Finance for quantitative market data.
+    2. Yahoo Finance for quantitative market data (persisted in a local BarStore).
     """
-    def __init__(self):
+    def __init__(self, store=None, price_backend=None):
+        """
+        Args:
+            store (BarStore): Optional bar store. Defaults to the `data_store` section of settings.
+            price_backend (callable): Optional fetch backend for the default store
+                                      (e.g. an offline fixture reader).
+        """
         # Load API keys
         self.news_api_key = os.getenv("NEWS_API_KEY")
 
         # Load configuration settings
-        with open("config/settings.yaml", "r") as f:
-            self.config = yaml.safe_load(f)
+        self.config = load_config()
+
+        self.store = store or BarStore.from_config(self.config, backend=price_backend)
+
+    @cached_property
+    def news(self):
+        """
+        NewsAPI client, built on first use (the dashboard only reads local stores and never needs it).
+        """
+        from src.news_ingest import NewsIngestor
+        return NewsIngestor.from_config(self.config, self.news_api_key)
     
-    def fetch_real_news(self, topic="energy trading", days_ago=0):
+    @metrics.timed("fetch_real_news")
+    def fetch_real_news(self, topic="energy trading", days_ago=0, page_size=5):
         """
         Fetches news articles from NewsAPI.
 
         Args:
             topic (str): The search query (e.g., "Natural Gas").
             days_ago (int): 0 for real-time news, >0 for historical simulation (backtesting).
+            page_size (int): Number of articles to return.
+
+        Returns:
+            list: Formatted articles ([] if the request failed).
         """
-        url = "https://newsapi.org/v2/everything"
-        
-        
-        
         # 1. Date Management (Real-time vs Backtesting)
+        date_str = None
         if days_ago > 0:
             # Historical Mode: Calculate specific past date
             target_date = datetime.now() - timedelta(days=days_ago)
             date_str = target_date.strftime('%Y-%m-%d')
-            
-            
-            
-            
-            params = {
-                "q": topic,
-                "language": "en",
-                "sortBy": "relevancy", 
-                "apiKey": self.news_api_key,
-                "pageSize": 5,
-                "from": date_str,  
-                "to": date_str
-            }
-        else:
-            # Real-time Mode (Default)
-            params = {
-                "q": topic,
-                "language": "en",
-                "sortBy": "relevancy",
-                "apiKey": self.news_api_key,
-                "pageSize": 5
-            }
-        
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
-            
-            if data.get("status") != "ok":
-                print(f"⚠️ API Error: {data.get('message')}")
-                return []
-
-            # 2. Format Results
-            formatted_news = []
-            for article in data.get('articles', []):
-                formatted_news.append({
-                    "text": article['title'] + ". " + (article['description'] or ""),
-                    "publishedAt": article['publishedAt']
-                })
-                
-            return formatted_news
 
+        # 2. Single page through the pooled, rate-limited client (never raises: [] on failure)
+        try:
+            articles, _ = self.news.fetch_page(topic, date_from=date_str, date_to=date_str, page_size=page_size)
         except Exception as e:
-            print(f"Error fetching news: {e}")
+            print(f"⚠️ Error fetching news: {e}")
+            metrics.inc("errors_total", source="newsapi")
             return []
+        return articles
+
+    def iter_news(self, topic="energy trading", start=None, end=None):
+        """
+        Streams every article between `start` and `end` (all pages, fetched concurrently).
+        A single call backfills a whole period for backtests.
+
+        Args:
+            topic (str): The search query.
+            start (datetime): First day of the backfill (None for real-time news).
+            end (datetime): Last day (defaults to today).
+        """
+        return self.news.iter_articles(topic, start=start, end=end)
 
     def fetch_market_prices(self):
         """
@@ -91,6 +87,40 @@ class MarketDataLoader:
         secondary = self.config['market']['secondary_ticker']
         tickers = [primary, secondary]
         
-        # Download 5 days of hourly data for correlation analysis
-        data = yf.download(tickers, period="5d", interval="1h", progress=False)
-        return data['Close']
\ No newline at end of file
+        # Serve 5 days of hourly data for correlation analysis
+        closes = {ticker: self.fetch_bars(ticker, period="5d", interval="1h")['Close'] for ticker in tickers}
+        return pd.DataFrame(closes)
+
+    @metrics.timed("fetch_bars")
+    def fetch_bars(self, ticker, period="2y", interval="1d", refresh=True):
+        """
+        Returns OHLCV bars from the local store, downloading only the missing bars.
+
+        Args:
+            ticker (str): Yahoo Finance symbol (e.g., "NG=F").
+            period (str): Lookback window (e.g., "2y", "5d").
+            interval (str): Bar size (e.g., "1d", "1h").
+            refresh (bool): If False, never touches the network.
+        """
+        return self.store.get(ticker, interval=interval, period=period, refresh=refresh)
+
+    def get_tickers(self):
+        """
+        Returns the monitored universe (`market.tickers`, or the primary/secondary pair).
+        """
+        market = self.config['market']
+        return market.get('tickers') or [market['primary_ticker'], market['secondary_ticker']]
+
+    def fetch_panel(self, tickers=None, period="2y", interval="1d", refresh=True):
+        """
+        Returns the OHLC bars of every ticker of the universe, ready for `analytics.build_panel`.
+
+        Returns:
+            dict: Ticker -> OHLC DataFrame (tickers without data are skipped).
+        """
+        frames = {}
+        for ticker in tickers or self.get_tickers():
+            bars = self.fetch_bars(ticker, period=period, interval=interval, refresh=refresh)
+            if not bars.empty:
+                frames[ticker] = bars
+        return frames
\ No newline at end of file
@@ -0,0 +1,147 @@
+import hashlib
+import re
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
+
+# Mersenne prime used by the universal hash family (2^61 - 1)
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+def shingles(text: str, size=3) -> set:
+    """
+    Word n-grams of the normalized text (the whole token list if it is shorter than `size`).
+    """
+    tokens = re.findall(r"\w+", text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index that clusters syndicated copies of the same story.
+
+    Each article is reduced to a MinHash signature of its word shingles. Signatures are
+    split into `bands`; articles sharing any band bucket are candidates, and a candidate
+    joins the cluster of its closest match when their estimated Jaccard similarity
+    reaches `threshold`. The index keeps the signal of each cluster's representative, so
+    later refreshes can reuse it without another LLM call.
+
+    Args:
+        num_perm (int): Signature length (must be divisible by `bands`).
+        bands (int): Number of LSH bands.
+        threshold (float): Minimum estimated Jaccard similarity to merge into a cluster.
+        shingle_size (int): Words per shingle.
+        max_items (int): Oldest articles are forgotten beyond this size.
+    """
+    def __init__(self, num_perm=64, bands=16, threshold=0.6, shingle_size=3, max_items=10000, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.max_items = max_items
+
+        # Universal hash family: h(x) = (a * x + b) mod p, with 32-bit a, b and x (no uint64 overflow)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+        self._signatures = OrderedDict()
+        self._buckets = defaultdict(set)
+        self._cluster_of = {}
+        self._cluster_sizes = Counter()
+        self._cluster_signals = {}
+        self.duplicates = 0
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('dedup', {})
+        if not section.get('enabled', False):
+            return None
+        return cls(
+            num_perm=section.get('num_perm', 64),
+            bands=section.get('bands', 16),
+            threshold=section.get('threshold', 0.6),
+            max_items=section.get('max_items', 10000)
+        )
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of the text's shingles.
+        """
+        # blake2b gives stable hashes across processes (unlike the salted built-in hash)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in shingles(text, self.shingle_size)],
+            dtype=np.uint64
+        )
+        permuted = (hashes[:, None] * self._a + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature):
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, key, text: str):
+        """
+        Indexes an article and returns the key of its cluster representative
+        (the article's own key if it starts a new cluster).
+        """
+        if key in self._cluster_of:
+            return self._cluster_of[key]
+
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+
+        # 1. Candidates share at least one band bucket; keep the most similar one
+        candidates = set().union(*(self._buckets.get(band_key, ()) for band_key in band_keys))
+        best_key, best_score = None, self.threshold
+        for candidate in candidates:
+            score = float(np.mean(self._signatures[candidate] == signature))
+            if score >= best_score:
+                best_key, best_score = candidate, score
+
+        # 2. Join the candidate's cluster, or start a new one
+        if best_key is not None:
+            cluster = self._cluster_of[best_key]
+            self.duplicates += 1
+        else:
+            cluster = key
+
+        self._signatures[key] = signature
+        self._cluster_of[key] = cluster
+        self._cluster_sizes[cluster] += 1
+        for band_key in band_keys:
+            self._buckets[band_key].add(key)
+
+        self._evict()
+        return cluster
+
+    def _evict(self):
+        while len(self._signatures) > self.max_items:
+            old_key, signature = self._signatures.popitem(last=False)
+            for band_key in self._band_keys(signature):
+                self._buckets[band_key].discard(old_key)
+                if not self._buckets[band_key]:
+                    del self._buckets[band_key]
+            cluster = self._cluster_of.pop(old_key)
+            self._cluster_sizes[cluster] -= 1
+            if not self._cluster_sizes[cluster]:
+                del self._cluster_sizes[cluster]
+                self._cluster_signals.pop(cluster, None)
+
+    def get_signal(self, cluster):
+        return self._cluster_signals.get(cluster)
+
+    def set_signal(self, cluster, signal):
+        if signal is not None:
+            self._cluster_signals[cluster] = signal
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._signatures),
+            "clusters": len(self._cluster_sizes),
+            "duplicates": self.duplicates
+        }
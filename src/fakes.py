@@ -0,0 +1,134 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from langchain_core.runnables import RunnableLambda
+from src.schema import MarketSignal, EventCategory
+
+
+# Keyword heuristics used by the default responder (first match wins)
+KEYWORD_CATEGORIES = [
+    (("explosion", "leak", "strike", "outage", "shutdown", "embargo"), EventCategory.SUPPLY_SHOCK, "Bullish"),
+    (("hurricane", "cold snap", "heatwave", "freeze", "storm"), EventCategory.WEATHER_EVENT, "Bullish"),
+    (("storage", "inventory", "inventories", "eia"), EventCategory.INVENTORY, "Neutral"),
+    (("war", "sanction", "treaty", "export deal"), EventCategory.GEOPOLITICAL, "Bullish"),
+    (("inflation", "gdp", "fed", "recession", "carbon"), EventCategory.MACRO_ECONOMIC, "Bearish"),
+]
+
+
+def keyword_signal(news_text: str) -> MarketSignal:
+    """
+    Builds a deterministic MarketSignal from simple keyword rules.
+    """
+    lowered = news_text.lower()
+    category, sentiment = EventCategory.OTHER, "Neutral"
+    for keywords, candidate, candidate_sentiment in KEYWORD_CATEGORIES:
+        if any(keyword in lowered for keyword in keywords):
+            category, sentiment = candidate, candidate_sentiment
+            break
+
+    return MarketSignal(
+        headline=news_text.split(".")[0][:80],
+        affected_assets=["Natural Gas"],
+        category=category,
+        sentiment=sentiment,
+        summary=news_text[:200],
+        trading_recommendation="Monitor spreads"
+    )
+
+
+class FakeSignalLLM:
+    """
+    Offline stand-in for ChatGroq, used to exercise EnergyTradingAgent without network access.
+
+    Args:
+        responder (callable): Maps the human message text to a MarketSignal (defaults to keyword rules).
+        latency (float): Simulated round-trip time in seconds.
+        fail_on (callable): Predicate on the text; matching items raise a RuntimeError.
+        error_rate (float): Share of calls failing with a transient RuntimeError (rate limit, 5xx).
+        slow_rate (float): Share of calls taking `slow_latency` instead of `latency` (tail latency).
+        slow_latency (float): Round-trip time of the slow calls.
+        invalid_rate (float): Share of calls answering None, like a model that skipped the tool call.
+        confidence (float): Confidence attached to every signal, or a callable of the text.
+        model_name (str): Name reported to the agent (cache namespace, routing metrics).
+        seed (int): Seed of the injected faults.
+    """
+    def __init__(self, responder=None, latency=0.0, fail_on=None, error_rate=0.0, slow_rate=0.0,
+                 slow_latency=0.0, invalid_rate=0.0, confidence=None, model_name=None, seed=None):
+        self.responder = responder or keyword_signal
+        self.latency = latency
+        self.fail_on = fail_on
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.invalid_rate = invalid_rate
+        self.confidence = confidence
+        if model_name is not None:
+            self.model_name = model_name
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def with_structured_output(self, schema, **kwargs):
+        # A JSON schema (dict) requests the packed, raw-JSON mode of the agent
+        packed = isinstance(schema, dict)
+
+        def respond(prompt_value):
+            latency, fault = self._draw()
+            if latency:
+                time.sleep(latency)
+            return self._answer(self._extract_text(prompt_value), packed, fault)
+
+        async def arespond(prompt_value):
+            latency, fault = self._draw()
+            if latency:
+                await asyncio.sleep(latency)
+            return self._answer(self._extract_text(prompt_value), packed, fault)
+
+        return RunnableLambda(respond, afunc=arespond)
+
+    def _draw(self):
+        # Latency and injected fault ("error", "invalid" or None) of one call
+        with self._lock:
+            self.calls += 1
+            slow = self.slow_rate and self._random.random() < self.slow_rate
+            draw = self._random.random()
+        if draw < self.error_rate:
+            fault = "error"
+        elif draw < self.error_rate + self.invalid_rate:
+            fault = "invalid"
+        else:
+            fault = None
+        return (self.slow_latency if slow else self.latency), fault
+
+    def _extract_text(self, prompt_value):
+        # The agent's prompt always ends with the human message holding the news text
+        return prompt_value.to_messages()[-1].content
+
+    def _classify(self, text):
+        if self.fail_on and self.fail_on(text):
+            raise RuntimeError(f"Simulated LLM failure for: {text[:40]}")
+        signal = self.responder(text)
+        if self.confidence is not None:
+            confidence = self.confidence(text) if callable(self.confidence) else self.confidence
+            signal = signal.model_copy(update={"confidence": confidence})
+        return signal
+
+    def _answer(self, text, packed=False, fault=None):
+        if fault == "error":
+            raise RuntimeError("Simulated transient LLM error (429 Too Many Requests)")
+        if fault == "invalid":
+            return None
+        if not packed:
+            return self._classify(text)
+
+        # Packed request: one "[i] text" block per article; failing items are left out
+        signals = []
+        for index, article in re.findall(r"^\[(\d+)\] (.*)$", text, flags=re.MULTILINE):
+            try:
+                signal = self._classify(article)
+            except RuntimeError:
+                continue
+            signals.append({**signal.model_dump(mode="json"), "index": int(index)})
+        return {"signals": signals}
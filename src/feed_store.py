@@ -0,0 +1,124 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from src import metrics
+from src.schema import MarketSignal, EventCategory
+
+
+class FeedStore:
+    """
+    Local store (SQLite) where the background worker publishes classified signals and
+    pipeline status, and from which the dashboard reads without any network or LLM work.
+    """
+    def __init__(self, path="data/feed.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL lets the dashboard read while the worker writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS signals (
+                   cluster TEXT PRIMARY KEY,
+                   published_at TEXT NOT NULL,
+                   category TEXT NOT NULL,
+                   action TEXT,
+                   similar INTEGER NOT NULL DEFAULT 0,
+                   payload TEXT NOT NULL,
+                   stored_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_published_at ON signals(published_at)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS status (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Keys of the articles already ingested, so restarts and --once runs skip them
+        self._conn.execute("CREATE TABLE IF NOT EXISTS seen_articles (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)")
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(path=config.get('worker', {}).get('feed_path', "data/feed.sqlite"))
+
+    def publish(self, cluster, signal: MarketSignal, published_at: str, action=None):
+        """
+        Publishes a signal once per near-duplicate cluster; later copies only bump `similar`.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """INSERT OR IGNORE INTO signals (cluster, published_at, category, action, payload, stored_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (cluster, published_at, signal.category.value, action, signal.model_dump_json(), time.time())
+            )
+            if cursor.rowcount == 0:
+                self._conn.execute("UPDATE signals SET similar = similar + 1 WHERE cluster = ?", (cluster,))
+            self._conn.commit()
+
+    def contains(self, cluster) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM signals WHERE cluster = ?", (cluster,)).fetchone() is not None
+
+    def mark_seen(self, keys, limit=None) -> list:
+        """
+        Records article keys and returns those never seen before (in order, without repeats).
+        Only the `limit` most recent keys are kept.
+        """
+        fresh = []
+        with self._lock:
+            now = time.time()
+            for key in keys:
+                cursor = self._conn.execute("INSERT OR IGNORE INTO seen_articles (key, seen_at) VALUES (?, ?)", (key, now))
+                if cursor.rowcount:
+                    fresh.append(key)
+            if fresh and limit:
+                self._conn.execute(
+                    "DELETE FROM seen_articles WHERE rowid NOT IN (SELECT rowid FROM seen_articles ORDER BY rowid DESC LIMIT ?)",
+                    (limit,)
+                )
+            self._conn.commit()
+        return fresh
+
+    def unmark_seen(self, keys):
+        """
+        Forgets article keys, so the next poll ingests those articles again (e.g. after a failed
+        classification).
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM seen_articles WHERE key = ?", [(key,) for key in keys])
+            self._conn.commit()
+
+    def latest(self, limit=20, include_noise=False):
+        """
+        Returns the most recent signals, newest first, with the dashboard's display attributes.
+        """
+        query = "SELECT payload, published_at, similar FROM signals"
+        params = []
+        if not include_noise:
+            query += " WHERE category != ?"
+            params.append(EventCategory.OTHER.value)
+        query += " ORDER BY published_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        signals = []
+        with metrics.span("signal_validation"):
+            for payload, published_at, similar in rows:
+                signal = MarketSignal.model_validate_json(payload)
+                signal._published_at = published_at
+                signal._similar = similar
+                signals.append(signal)
+        return signals
+
+    def set_status(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO status (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            self._conn.commit()
+
+    def get_status(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM status WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
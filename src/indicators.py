@@ -0,0 +1,409 @@
+import importlib.util
+import math
+import numpy as np
+from src.analytics import volatility_arrays
+
+# Numba is optional: every kernel has a NumPy fallback (pip install numba for the compiled loops)
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+# Switch used by the benchmarks to compare both backends
+USE_NUMBA = NUMBA_AVAILABLE
+# Below this many bars NumPy is about as fast, and skips importing Numba and the JIT warm-up
+NUMBA_MIN_BARS = 100_000
+
+# Extra bars fed to exponentially smoothed indicators when only a tail is requested:
+# with alpha = 1 / window, the weight left on older bars is (1 - 1/window) ** (20 * window) < 2e-9
+EWM_WARMUP_WINDOWS = 20
+
+
+_compiled = {}
+
+
+def _kernel(func, n):
+    """
+    Compiled version of a loop kernel for inputs of `n` bars, or None to use NumPy.
+    Numba is imported and the kernel compiled on first use.
+    """
+    if not (USE_NUMBA and NUMBA_AVAILABLE) or n < NUMBA_MIN_BARS:
+        return None
+    kernel = _compiled.get(func)
+    if kernel is None:
+        import numba
+        kernel = _compiled[func] = numba.njit(cache=True, nogil=True)(func)
+    return kernel
+
+
+# ------------------------------------------------------------------------------
+# Kernels. Inputs are finite float64 1-D arrays; outputs are preallocated and
+# NaN during the warm-up of each window.
+# ------------------------------------------------------------------------------
+
+def _rolling_mean_loop(x, window):
+    out = np.empty(len(x))
+    out[:window - 1] = np.nan
+    total = 0.0
+    for i in range(len(x)):
+        total += x[i]
+        if i >= window:
+            total -= x[i - window]
+        if i >= window - 1:
+            out[i] = total / window
+    return out
+
+
+def _rolling_mean_std_loop(x, window, ddof):
+    # Sliding Welford update: numerically stable on long, trending price series
+    n = len(x)
+    mean_out = np.empty(n)
+    std_out = np.empty(n)
+    mean = 0.0
+    m2 = 0.0
+    for i in range(n):
+        if i < window:
+            delta = x[i] - mean
+            mean += delta / (i + 1)
+            m2 += delta * (x[i] - mean)
+        else:
+            old = x[i - window]
+            new_mean = mean + (x[i] - old) / window
+            m2 += (x[i] - old) * (x[i] - new_mean + old - mean)
+            mean = new_mean
+        if i >= window - 1:
+            mean_out[i] = mean
+            std_out[i] = math.sqrt(max(m2, 0.0) / (window - ddof))
+        else:
+            mean_out[i] = np.nan
+            std_out[i] = np.nan
+    return mean_out, std_out
+
+
+def _rolling_corr_loop(x, y, window):
+    n = len(x)
+    out = np.empty(n)
+    mx = my = sxx = syy = sxy = 0.0
+    count = 0
+    for i in range(n):
+        if i >= window:
+            # Remove the oldest pair (Welford downdate)
+            ox, oy = x[i - window], y[i - window]
+            count -= 1
+            dx = ox - mx
+            dy = oy - my
+            mx -= dx / count
+            my -= dy / count
+            sxx -= dx * (ox - mx)
+            syy -= dy * (oy - my)
+            sxy -= dx * (oy - my)
+        count += 1
+        dx = x[i] - mx
+        dy = y[i] - my
+        mx += dx / count
+        my += dy / count
+        sxx += dx * (x[i] - mx)
+        syy += dy * (y[i] - my)
+        sxy += dx * (y[i] - my)
+        if i >= window - 1 and sxx > 0 and syy > 0:
+            out[i] = sxy / math.sqrt(sxx * syy)
+        else:
+            out[i] = np.nan
+    return out
+
+
+def _ewm_loop(x, alpha):
+    out = np.empty(len(x))
+    value = x[0]
+    out[0] = value
+    for i in range(1, len(x)):
+        value += alpha * (x[i] - value)
+        out[i] = value
+    return out
+
+
+def _rolling_sums(x, window, block=4096):
+    """
+    Trailing window sums (first `window - 1` values are NaN).
+
+    Prefix sums restart every `block` bars, so rounding errors stay bounded by two blocks
+    instead of growing with the length of the history.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < window:
+        return out
+    block = max(block, window)
+    n_blocks = -(-n // block)
+
+    padded = np.zeros(n_blocks * block)
+    padded[:n] = x
+    prefix = np.zeros((n_blocks, block + 1))
+    np.cumsum(padded.reshape(n_blocks, block), axis=1, out=prefix[:, 1:])
+
+    sums = np.full((n_blocks, block), np.nan)
+    sums[:, window - 1:] = prefix[:, window:] - prefix[:, :block + 1 - window]
+    if window > 1 and n_blocks > 1:
+        # Windows straddling two blocks: suffix of the previous block + prefix of the current one
+        sums[1:, :window - 1] = (prefix[:-1, block:] - prefix[:-1, block - window + 1:block]) + prefix[1:, 1:window]
+    out[window - 1:] = sums.ravel()[window - 1:n]
+    return out
+
+
+def _window_moments(x, y, window, block=256):
+    """
+    Means and centered second moments (sum of squared / cross deviations) of every full
+    trailing window of two aligned series, vectorized.
+
+    Raw sums of squares over a long trending series cancel catastrophically, so sums are
+    taken relative to the mean of each `block`-bar block; a window overlaps at most two
+    blocks, whose moments are merged with Chan's parallel formula. Everything is computed
+    on (blocks × block) views with slices only.
+
+    Returns:
+        tuple: (mean_x, mean_y, m2_x, m2_y, c_xy) for the windows ending at window-1 .. n-1.
+    """
+    n = len(x)
+    block = max(block, window)
+    n_blocks = -(-n // block)
+
+    def blocks_of(values):
+        padded = np.empty(n_blocks * block)
+        padded[:n] = values
+        padded[n:] = values[-1]
+        return padded.reshape(n_blocks, block)
+
+    def prefix(values):
+        # Per-block running sums with a leading 0 column
+        sums = np.zeros((n_blocks, block + 1))
+        np.cumsum(values, axis=1, out=sums[:, 1:])
+        return sums
+
+    bx, by = blocks_of(x), blocks_of(y)
+    cx, cy = bx.mean(axis=1), by.mean(axis=1)
+    dx, dy = bx - cx[:, None], by - cy[:, None]
+    sums = [prefix(dx), prefix(dy), prefix(dx * dx), prefix(dy * dy), prefix(dx * dy)]
+
+    shape = (n_blocks, block)
+    mean_x, mean_y, m2_x, m2_y, c_xy = (np.full(shape, np.nan) for _ in range(5))
+
+    # 1. Windows inside a single block (ending at column window-1 or later)
+    sx, sy, sxx, syy, sxy = (e[:, window:] - e[:, :block + 1 - window] for e in sums)
+    mean_x[:, window - 1:] = cx[:, None] + sx / window
+    mean_y[:, window - 1:] = cy[:, None] + sy / window
+    m2_x[:, window - 1:] = sxx - sx * sx / window
+    m2_y[:, window - 1:] = syy - sy * sy / window
+    c_xy[:, window - 1:] = sxy - sx * sy / window
+
+    # 2. Windows straddling the previous block: merge both parts
+    if window > 1 and n_blocks > 1:
+        nb = np.arange(1, window, dtype=float)
+        na = window - nb
+        ax, ay, axx, ayy, axy = (e[:-1, block:] - e[:-1, block - window + 1:block] for e in sums)
+        bx_, by_, bxx, byy, bxy = (e[1:, 1:window] for e in sums)
+
+        mxa, mya = cx[:-1, None] + ax / na, cy[:-1, None] + ay / na
+        mxb, myb = cx[1:, None] + bx_ / nb, cy[1:, None] + by_ / nb
+        weight = na * nb / window
+        mean_x[1:, :window - 1] = (na * mxa + nb * mxb) / window
+        mean_y[1:, :window - 1] = (na * mya + nb * myb) / window
+        m2_x[1:, :window - 1] = (axx - ax * ax / na) + (bxx - bx_ * bx_ / nb) + (mxb - mxa) ** 2 * weight
+        m2_y[1:, :window - 1] = (ayy - ay * ay / na) + (byy - by_ * by_ / nb) + (myb - mya) ** 2 * weight
+        c_xy[1:, :window - 1] = (axy - ax * ay / na) + (bxy - bx_ * by_ / nb) + (mxb - mxa) * (myb - mya) * weight
+
+    return tuple(values.ravel()[window - 1:n] for values in (mean_x, mean_y, m2_x, m2_y, c_xy))
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    kernel = _kernel(_rolling_mean_loop, len(x))
+    if kernel is not None:
+        return kernel(x, window)
+    return _rolling_sums(x, window) / window
+
+
+def rolling_mean_std(x: np.ndarray, window: int, ddof=1):
+    """
+    Trailing rolling mean and standard deviation (ddof=1, like pandas).
+    """
+    x = np.asarray(x, dtype=float)
+    kernel = _kernel(_rolling_mean_std_loop, len(x))
+    if kernel is not None:
+        return kernel(x, window, ddof)
+
+    mean = np.full(len(x), np.nan)
+    std = np.full(len(x), np.nan)
+    if len(x) >= window:
+        mean_x, _, m2_x, _, _ = _window_moments(x, x, window)
+        mean[window - 1:] = mean_x
+        std[window - 1:] = np.sqrt(np.maximum(m2_x, 0.0) / (window - ddof))
+    return mean, std
+
+
+def rolling_corr(x: np.ndarray, y: np.ndarray, window: int, tail=None) -> np.ndarray:
+    """
+    Trailing Pearson correlation of two aligned series (pandas `x.rolling(window).corr(y)`).
+    """
+    x, y, start = _tail_inputs(tail, window, np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+    kernel = _kernel(_rolling_corr_loop, len(x))
+    if kernel is not None:
+        return kernel(x, y, window)[start:]
+
+    corr = np.full(len(x), np.nan)
+    if len(x) >= window:
+        _, _, sxx, syy, sxy = _window_moments(x, y, window)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr[window - 1:] = np.where((sxx > 0) & (syy > 0), np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0), np.nan)
+    return corr[start:]
+
+
+def ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Recursive exponential average y[i] = y[i-1] + alpha * (x[i] - y[i-1]), y[0] = x[0]
+    (pandas `ewm(alpha=alpha, adjust=False)`).
+
+    Without Numba, the recursion is solved in closed form over blocks short enough for
+    (1 - alpha) ** -block to stay well conditioned; only the block carries are sequential.
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) == 0:
+        return x.copy()
+    kernel = _kernel(_ewm_loop, len(x))
+    if kernel is not None:
+        return kernel(x, alpha)
+
+    beta = 1.0 - alpha
+    block = int(np.clip(7.0 / -math.log(beta), 1, 256)) if 0 < beta < 1 else 1
+    if block == 1:
+        return _ewm_loop(x, alpha)
+
+    padded = np.zeros(-(-len(x) // block) * block)
+    padded[:len(x)] = x
+    blocks = padded.reshape(-1, block)
+    k = np.arange(block)
+
+    # 1. Every block from a zero starting value, all at once
+    local = alpha * beta ** k * np.cumsum(blocks * beta ** -k, axis=1)
+    # 2. Starting value of each block (sequential, one step per block)
+    carries = np.empty(len(blocks))
+    carry = x[0]
+    decay = beta ** block
+    for b in range(len(blocks)):
+        carries[b] = carry
+        carry = local[b, -1] + decay * carry
+    # 3. Each block's starting value decays through the block
+    return (local + carries[:, None] * beta ** (k + 1)).ravel()[:len(x)]
+
+
+def _tail_inputs(tail, warmup, *arrays):
+    """
+    Trims the inputs to the last `tail + warmup` bars.
+
+    Returns:
+        tuple: (*trimmed arrays, offset of the first requested output in the trimmed arrays).
+    """
+    n = len(arrays[0])
+    if tail is None or tail + warmup >= n:
+        return (*arrays, 0 if tail is None else max(n - tail, 0))
+    start = n - tail - warmup
+    return (*(array[start:] for array in arrays), warmup)
+
+
+def _ewm_warmup(window, warmup):
+    return EWM_WARMUP_WINDOWS * window if warmup is None else warmup
+
+
+# ------------------------------------------------------------------------------
+# Indicators
+# ------------------------------------------------------------------------------
+
+def rsi(close: np.ndarray, window=14, method="sma", tail=None, warmup=None) -> np.ndarray:
+    """
+    Relative Strength Index.
+
+    Args:
+        close (np.ndarray): Close prices.
+        window (int): Lookback in bars.
+        method (str): 'sma' (rolling means, as the dashboard's pandas code) or 'wilder'
+                      (exponential smoothing with alpha = 1 / window, pandas `ewm(adjust=False)`).
+        tail (int): Only compute the last `tail` values (plus warm-up) instead of the full history.
+        warmup (int): Extra bars for 'wilder' tails (default: 20 windows); 'sma' tails are exact.
+
+    Returns:
+        np.ndarray: RSI values (length `tail`, or the full length), NaN during the warm-up.
+    """
+    if method == "sma":
+        close, start = _tail_inputs(tail, window, np.asarray(close, dtype=float))
+        delta = np.zeros(len(close))
+        delta[1:] = np.diff(close)
+        gain = rolling_mean(np.maximum(delta, 0.0), window)
+        loss = rolling_mean(np.maximum(-delta, 0.0), window)
+    elif method == "wilder":
+        close, start = _tail_inputs(tail, _ewm_warmup(window, warmup), np.asarray(close, dtype=float))
+        gain = np.full(len(close), np.nan)
+        loss = np.full(len(close), np.nan)
+        if len(close) > 1:
+            delta = np.diff(close)
+            gain[1:] = ewm(np.maximum(delta, 0.0), 1.0 / window)
+            loss[1:] = ewm(np.maximum(-delta, 0.0), 1.0 / window)
+        gain[:window] = np.nan
+    else:
+        raise ValueError(f"Unknown RSI method: {method}")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (100 - 100 / (1 + gain / loss))[start:]
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window=14, method="wilder", tail=None, warmup=None) -> np.ndarray:
+    """
+    Average True Range (same True Range as `calculate_volatility`; the first bar has none).
+
+    Args:
+        method (str): 'wilder' (pandas `ewm(alpha=1/window, adjust=False)`) or 'sma'.
+    """
+    extra = window + 1 if method == "sma" else _ewm_warmup(window, warmup)
+    high, low, close, start = _tail_inputs(tail, extra, *(np.asarray(a, dtype=float) for a in (high, low, close)))
+    true_range, _ = volatility_arrays(high, low, close)
+
+    out = np.full(len(close), np.nan)
+    if method == "sma":
+        out[1:] = rolling_mean(true_range[1:], window)
+    elif method == "wilder":
+        if len(close) > 1:
+            out[1:] = ewm(true_range[1:], 1.0 / window)
+        out[:window] = np.nan
+    else:
+        raise ValueError(f"Unknown ATR method: {method}")
+    return out[start:]
+
+
+def bollinger(close: np.ndarray, window=20, num_std=2.0, tail=None):
+    """
+    Bollinger Bands around the rolling mean (sample standard deviation, like pandas).
+
+    Returns:
+        tuple: (middle, upper, lower) arrays.
+    """
+    close, start = _tail_inputs(tail, window, np.asarray(close, dtype=float))
+    middle, std = rolling_mean_std(close, window)
+    return middle[start:], (middle + num_std * std)[start:], (middle - num_std * std)[start:]
+
+
+def zscore(x: np.ndarray, window=20, tail=None) -> np.ndarray:
+    """
+    Distance of each value from its rolling mean, in rolling standard deviations.
+    """
+    x, start = _tail_inputs(tail, window, np.asarray(x, dtype=float))
+    mean, std = rolling_mean_std(x, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((x - mean) / std)[start:]
+
+
+def common_positions(index_a, index_b):
+    """
+    Positions of the timestamps shared by two sorted DatetimeIndexes, in one pass over
+    their int64 values (instead of `intersection` followed by two `.loc` lookups).
+
+    Returns:
+        tuple: (positions in index_a, positions in index_b).
+    """
+    _, positions_a, positions_b = np.intersect1d(
+        index_a.as_unit("ns").asi8, index_b.as_unit("ns").asi8, assume_unique=True, return_indices=True
+    )
+    return positions_a, positions_b
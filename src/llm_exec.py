@@ -0,0 +1,354 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError
+from src import metrics
+from src.schema import MarketSignal
+
+
+class LLMTimeout(TimeoutError):
+    """
+    Raised when a call (or the whole routed request) exceeds its time budget.
+    """
+
+
+class InvalidOutput(ValueError):
+    """
+    Raised when a model answer does not validate against the expected schema.
+    """
+
+
+def validate_signal(result) -> MarketSignal:
+    """
+    Default output check: a MarketSignal (or a dict that validates as one).
+    """
+    if isinstance(result, MarketSignal):
+        return result
+    if isinstance(result, dict):
+        try:
+            return MarketSignal.model_validate(result)
+        except ValidationError as e:
+            raise InvalidOutput(str(e)) from e
+    raise InvalidOutput(f"Expected a MarketSignal, got {type(result).__name__}")
+
+
+def is_invalid(error) -> bool:
+    # The model answered, but not in the expected shape: escalate instead of retrying
+    return isinstance(error, (InvalidOutput, ValidationError, OutputParserException))
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies of one model, used to decide when to hedge.
+    """
+    def __init__(self, history=200):
+        self.samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, q, min_samples=20):
+        """
+        The q-th percentile, or None while fewer than `min_samples` calls were recorded.
+        """
+        with self._lock:
+            if len(self.samples) < min_samples:
+                return None
+            return float(np.percentile(self.samples, q))
+
+
+class ModelRoute:
+    """
+    One model of the routing policy: its name, the chain that calls it and its latency history.
+    """
+    def __init__(self, name, chain, history=200):
+        self.name = name
+        self.chain = chain
+        self.latency = LatencyTracker(history)
+
+
+class LLMExecutor:
+    """
+    Runs an LLM chain with per-call timeouts, jittered retries, hedged requests and
+    model escalation.
+
+    Routes are tried in order (small, fast model first). Each call is bounded by `timeout`;
+    a call still pending past the `hedge_percentile` of that model's recent latencies gets
+    a duplicate request, and the first answer wins. Transient errors and timeouts are retried
+    up to `max_retries` times with full-jitter exponential backoff. An answer that fails
+    validation, or reports a confidence below `min_confidence`, escalates to the next route.
+    The whole request never takes longer than `deadline`, which bounds the feed's tail latency.
+
+    Args:
+        routes (list): (model name, chain) pairs, in escalation order.
+        timeout (float): Per-attempt budget, in seconds.
+        deadline (float): Budget of the whole request (retries and escalation included).
+        max_retries (int): Retries per route after the first attempt.
+        backoff_base (float): First backoff ceiling, doubled at every retry.
+        backoff_max (float): Backoff ceiling.
+        hedge (bool): Whether slow calls get a duplicate request.
+        hedge_percentile (float): Latency percentile after which a call is hedged.
+        hedge_min (float): Never hedge earlier than this.
+        hedge_initial (float): Hedge delay while a model has too little latency history.
+        hedge_min_samples (int): Latencies needed before the percentile is used.
+        min_confidence (float): Escalate below this confidence (ignored when the model reports none).
+        validate (callable): Maps a raw answer to the accepted result, raising InvalidOutput otherwise
+                             (None accepts any answer).
+        workers (int): Threads available to the synchronous calls (hedges included).
+        seed (int): Seed of the backoff jitter (reproducible offline runs).
+    """
+    def __init__(self, routes, timeout=10.0, deadline=30.0, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, hedge=True, hedge_percentile=95, hedge_min=0.5, hedge_initial=3.0,
+                 hedge_min_samples=20, min_confidence=0.0, validate=validate_signal, workers=16, seed=None):
+        if not routes:
+            raise ValueError("LLMExecutor needs at least one route")
+        self.routes = [ModelRoute(name, chain) for name, chain in routes]
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min = hedge_min
+        self.hedge_initial = hedge_initial
+        self.hedge_min_samples = hedge_min_samples
+        self.min_confidence = min_confidence
+        self.validate = validate or (lambda result: result)
+        self.workers = workers
+        self._random = random.Random(seed)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, routes, **overrides):
+        section = config.get('llm_exec', {})
+        options = dict(
+            timeout=section.get('timeout_seconds', 10.0),
+            deadline=section.get('deadline_seconds', 30.0),
+            max_retries=config['agent'].get('max_retries', 3),
+            backoff_base=section.get('backoff_base_seconds', 0.5),
+            backoff_max=section.get('backoff_max_seconds', 8.0),
+            hedge=section.get('hedge', True),
+            hedge_percentile=section.get('hedge_percentile', 95),
+            hedge_min=section.get('hedge_min_seconds', 0.5),
+            hedge_initial=section.get('hedge_initial_seconds', 3.0),
+            hedge_min_samples=section.get('hedge_min_samples', 20),
+            min_confidence=section.get('min_confidence', 0.0),
+            workers=section.get('workers', 16)
+        )
+        options.update(overrides)
+        return cls(routes, **options)
+
+    def as_runnable(self) -> RunnableLambda:
+        """
+        Exposes the executor as a Runnable, so `batch` / `abatch` keep their concurrency limits.
+        """
+        return RunnableLambda(self.invoke, afunc=self.ainvoke, name="LLMExecutor")
+
+    # ------------------------------------------------------------------------------
+    # Policy (shared by the sync and async paths)
+    # ------------------------------------------------------------------------------
+
+    def hedge_delay(self, route):
+        if not self.hedge:
+            return None
+        observed = route.latency.percentile(self.hedge_percentile, self.hedge_min_samples)
+        return max(self.hedge_min, observed if observed is not None else self.hedge_initial)
+
+    def backoff(self, attempt, remaining):
+        # Full jitter: uniform between 0 and the exponential ceiling, capped by the deadline
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return min(self._random.uniform(0, ceiling), max(remaining, 0.0))
+
+    def _confident(self, route, result):
+        confidence = getattr(result, 'confidence', None)
+        if confidence is None or confidence >= self.min_confidence:
+            return True
+        if route is not self.routes[-1]:
+            metrics.inc("llm_escalations_total", model=route.name, reason="low_confidence")
+        return False
+
+    def _record(self, route, outcome, seconds=None):
+        metrics.inc("llm_attempts_total", model=route.name, outcome=outcome, help="LLM attempts by outcome.")
+        if seconds is not None:
+            route.latency.record(seconds)
+            metrics.observe("llm_call_seconds", seconds, model=route.name, help="Successful LLM call latency.")
+
+    @staticmethod
+    def _best(candidates):
+        # Every route was unsure: keep the most confident answer
+        return max(candidates, key=lambda result: result.confidence)
+
+    # ------------------------------------------------------------------------------
+    # Synchronous path
+    # ------------------------------------------------------------------------------
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="llm-exec")
+            return self._pool
+
+    def _call(self, route, payload, timeout):
+        """
+        One attempt against one model, hedged once if it runs past the hedge delay.
+        """
+        pool = self._executor()
+        start = time.monotonic()
+        hedge_at = self.hedge_delay(route)
+        started = {pool.submit(route.chain.invoke, payload): start}
+        error = None
+
+        while started:
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                break
+            wait_for = timeout - elapsed
+            if hedge_at is not None:
+                wait_for = min(wait_for, max(hedge_at - elapsed, 0.0))
+
+            done, _ = wait(started, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                submitted = started.pop(future)
+                if future.exception() is None:
+                    self._record(route, "ok", time.monotonic() - submitted)
+                    for other in started:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+
+            # Still pending past the hedge delay: send one duplicate request
+            if hedge_at is not None and not done and time.monotonic() - start >= hedge_at:
+                metrics.inc("llm_hedges_total", model=route.name, help="Duplicate requests sent for slow calls.")
+                started[pool.submit(route.chain.invoke, payload)] = time.monotonic()
+                hedge_at = None
+
+        if started:
+            # Abandoned calls finish in the background (the client has its own timeout)
+            for future in started:
+                future.cancel()
+            raise LLMTimeout(f"{route.name} did not answer within {timeout:.1f}s")
+        raise error
+
+    def invoke(self, payload):
+        """
+        Runs one request through the routing policy.
+
+        Returns:
+            The validated result of the first route that answers confidently.
+
+        Raises:
+            The last error when no route produced a valid answer within the deadline.
+        """
+        deadline = time.monotonic() + self.deadline
+        candidates, error = [], None
+
+        for route in self.routes:
+            for attempt in range(self.max_retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    result = self.validate(self._call(route, payload, min(self.timeout, remaining)))
+                except Exception as e:
+                    error = e
+                    if is_invalid(e):
+                        self._record(route, "invalid")
+                        metrics.inc("llm_escalations_total", model=route.name, reason="invalid")
+                        break
+                    self._record(route, "timeout" if isinstance(e, LLMTimeout) else "error")
+                    if attempt < self.max_retries:
+                        time.sleep(self.backoff(attempt, deadline - time.monotonic()))
+                    continue
+
+                if self._confident(route, result):
+                    return result
+                candidates.append(result)
+                break
+
+        if candidates:
+            return self._best(candidates)
+        raise error or LLMTimeout(f"No answer within the {self.deadline:.1f}s deadline")
+
+    # ------------------------------------------------------------------------------
+    # Asynchronous path
+    # ------------------------------------------------------------------------------
+
+    async def _acall(self, route, payload, timeout):
+        start = time.monotonic()
+        hedge_at = self.hedge_delay(route)
+        started = {asyncio.ensure_future(route.chain.ainvoke(payload)): start}
+        error = None
+
+        try:
+            while started:
+                elapsed = time.monotonic() - start
+                if elapsed >= timeout:
+                    break
+                wait_for = timeout - elapsed
+                if hedge_at is not None:
+                    wait_for = min(wait_for, max(hedge_at - elapsed, 0.0))
+
+                done, _ = await asyncio.wait(started, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    submitted = started.pop(task)
+                    if task.exception() is None:
+                        self._record(route, "ok", time.monotonic() - submitted)
+                        return task.result()
+                    error = task.exception()
+
+                if hedge_at is not None and not done and time.monotonic() - start >= hedge_at:
+                    metrics.inc("llm_hedges_total", model=route.name, help="Duplicate requests sent for slow calls.")
+                    started[asyncio.ensure_future(route.chain.ainvoke(payload))] = time.monotonic()
+                    hedge_at = None
+        finally:
+            # Losing and timed-out requests are cancelled
+            for task in started:
+                task.cancel()
+
+        if started:
+            raise LLMTimeout(f"{route.name} did not answer within {timeout:.1f}s")
+        raise error
+
+    async def ainvoke(self, payload):
+        """
+        Async counterpart of `invoke`.
+        """
+        deadline = time.monotonic() + self.deadline
+        candidates, error = [], None
+
+        for route in self.routes:
+            for attempt in range(self.max_retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    result = self.validate(await self._acall(route, payload, min(self.timeout, remaining)))
+                except Exception as e:
+                    error = e
+                    if is_invalid(e):
+                        self._record(route, "invalid")
+                        metrics.inc("llm_escalations_total", model=route.name, reason="invalid")
+                        break
+                    self._record(route, "timeout" if isinstance(e, LLMTimeout) else "error")
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.backoff(attempt, deadline - time.monotonic()))
+                    continue
+
+                if self._confident(route, result):
+                    return result
+                candidates.append(result)
+                break
+
+        if candidates:
+            return self._best(candidates)
+        raise error or LLMTimeout(f"No answer within the {self.deadline:.1f}s deadline")
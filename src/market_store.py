@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import time
+import pandas as pd
+from src import metrics
+from src.resample import BarResampler
+
+# Approximate calendar length of each yfinance period unit
+PERIOD_UNITS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+# Aggregates yfinance cannot serve natively (history limited to the intraday source)
+INTRADAY_ONLY = ("2h", "4h")
+
+
+def period_start(period: str, tz=None) -> pd.Timestamp:
+    """
+    Converts a yfinance-style period ("5d", "6mo", "2y", "max") into a start timestamp.
+    """
+    if period == "max":
+        return pd.Timestamp.min.tz_localize(tz) if tz else pd.Timestamp.min
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    offset = pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+    return pd.Timestamp.now(tz=tz).normalize() - offset
+
+
+@metrics.timed("yfinance_download")
+def yfinance_backend(ticker, interval="1d", start=None, period=None) -> pd.DataFrame:
+    """
+    Default fetch backend: downloads OHLCV bars from Yahoo Finance.
+
+    Args:
+        ticker (str): Yahoo Finance symbol (e.g., "NG=F").
+        interval (str): Bar size ("1h", "1d", ...).
+        start: First bar to fetch (incremental mode). Takes precedence over `period`.
+        period (str): Lookback used for the initial download (e.g., "5y").
+    """
+    import yfinance as yf
+
+    if start is not None:
+        df = yf.download(ticker, start=start, interval=interval, progress=False)
+    else:
+        df = yf.download(ticker, period=period, interval=interval, progress=False)
+
+    # Flatten MultiIndex columns (YFinance specific fix)
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+class BarStore:
+    """
+    Local columnar (Parquet) store of OHLCV bars, one file per ticker and interval.
+
+    Only the bars missing since the last stored timestamp are requested from the backend,
+    and reads within `max_staleness` seconds of the last refresh never touch the network.
+    The backend is any callable with the signature of `yfinance_backend`, which lets
+    tests and backtests run fully offline.
+
+    With a resampler, only its source interval (e.g. 1h) is downloaded: the other timeframes
+    (4h, 1d, 1wk) are aggregated from it and updated incrementally after every refresh. Daily
+    or weekly history older than the intraday source is downloaded natively, once.
+    """
+    def __init__(self, root="data/bars", backend=None, max_staleness=900, resampler=None):
+        self.root = root
+        self.backend = backend or yfinance_backend
+        self.max_staleness = max_staleness
+        self.resampler = resampler
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config, backend=None):
+        section = config.get('data_store', {})
+        resample = config.get('resample', {})
+        return cls(
+            root=section.get('path', "data/bars"),
+            backend=backend,
+            max_staleness=section.get('max_staleness_minutes', 15) * 60,
+            resampler=BarResampler.from_config(config) if resample.get('enabled', False) else None
+        )
+
+    def _path(self, ticker, interval):
+        safe_ticker = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        return os.path.join(self.root, f"{safe_ticker}_{interval}.parquet")
+
+    def _read_meta(self, ticker, interval):
+        meta_path = self._path(ticker, interval) + ".json"
+        if not os.path.exists(meta_path):
+            return {}
+        with open(meta_path, "r") as f:
+            return json.load(f)
+
+    def _write(self, ticker, interval, df, meta):
+        path = self._path(ticker, interval)
+
+        # Write to a temporary file first so readers never see a partial file
+        df.to_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self._write_meta(ticker, interval, meta)
+
+    def _write_meta(self, ticker, interval, meta):
+        path = self._path(ticker, interval) + ".json"
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def read(self, ticker, interval="1d", start=None, end=None) -> pd.DataFrame:
+        """
+        Serves a range query from disk (empty DataFrame if nothing is stored yet).
+        """
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        df = pd.read_parquet(path)
+        if start is not None or end is not None:
+            df = df.loc[start:end]
+        return df
+
+    def refresh(self, ticker, interval="1d", period="2y") -> int:
+        """
+        Fetches the bars missing since the last stored timestamp.
+
+        Returns:
+            int: Number of bars added to the store.
+        """
+        if self.resampler is not None and self.resampler.derives(interval):
+            return self._refresh_derived(ticker, interval, period)
+
+        stored = self.read(ticker, interval)
+        meta = self._read_meta(ticker, interval)
+        covered_from = meta.get('covered_from')
+        requested_from = period_start(period).isoformat()
+
+        # 1. Full download when nothing is stored or the requested history is longer
+        if stored.empty or covered_from is None or requested_from < covered_from:
+            fetched = self.backend(ticker, interval=interval, period=period)
+            covered_from = requested_from if covered_from is None else min(requested_from, covered_from)
+        else:
+            # 2. Incremental download: re-fetch from the last stored bar, which may still be partial
+            fetched = self.backend(ticker, interval=interval, start=stored.index[-1].strftime('%Y-%m-%d'))
+
+        if fetched.empty:
+            # Nothing new (e.g. market closed): the stored bars are still up to date, so reads
+            # within max_staleness must not hit the network again. An empty full download
+            # extends nothing, so the longer history is retried by the next refresh.
+            if not stored.empty:
+                self._write_meta(ticker, interval, {"covered_from": meta.get('covered_from'), "fetched_at": time.time()})
+            return 0
+
+        merged = pd.concat([stored, fetched]) if not stored.empty else fetched
+
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        merged.index.name = "timestamp"
+        self._write(ticker, interval, merged, {"covered_from": covered_from, "fetched_at": time.time()})
+
+        if self.resampler is not None and interval == self.resampler.source:
+            self._propagate(ticker, merged, fetched.index.min(), covered_from)
+        return len(merged) - len(stored)
+
+    def _propagate(self, ticker, source_bars, changed_from, covered_from):
+        """
+        Updates every derived timeframe from the refreshed source bars (latest buckets only).
+        """
+        for timeframe in self.resampler.timeframes:
+            if not self.resampler.derives(timeframe):
+                continue
+            meta = self._read_meta(ticker, timeframe)
+            merged = self.resampler.merge(self.read(ticker, timeframe), source_bars, changed_from, timeframe)
+            merged.index.name = "timestamp"
+            meta = {"covered_from": meta.get('covered_from', covered_from), "fetched_at": time.time()}
+            self._write(ticker, timeframe, merged, meta)
+
+    def _refresh_derived(self, ticker, interval, period) -> int:
+        """
+        Refreshes a derived timeframe: the source feed first (if stale), then a one-time
+        native download for history older than the source covers.
+        """
+        source = self.resampler.source
+        before = len(self.read(ticker, interval))
+        if self.is_stale(ticker, source):
+            self.refresh(ticker, source, period=self.resampler.source_period)
+
+        stored = self.read(ticker, interval)
+        meta = self._read_meta(ticker, interval)
+        covered_from = meta.get('covered_from')
+        requested_from = period_start(period).isoformat()
+
+        if interval not in INTRADAY_ONLY and (covered_from is None or requested_from < covered_from):
+            native = self.backend(ticker, interval=interval, period=period)
+            # A failed or empty download keeps the history uncovered, so the next refresh retries it
+            if not native.empty:
+                if not stored.empty:
+                    # Aggregated bars win wherever both exist
+                    native = native[native.index < stored.index[0]][stored.columns.intersection(native.columns)]
+                stored = pd.concat([native, stored]).sort_index() if not stored.empty else native
+                stored.index.name = "timestamp"
+                covered_from = requested_from
+
+        # Also marks the timeframe fresh when the source had nothing new
+        self._write(ticker, interval, stored, {"covered_from": covered_from, "fetched_at": time.time()})
+        return len(stored) - before
+
+    def version(self, ticker, interval="1d") -> float:
+        """
+        Returns the modification time of the stored bars, used as a cache key by readers
+        (0.0 if nothing is stored yet).
+        """
+        try:
+            return os.path.getmtime(self._path(ticker, interval))
+        except OSError:
+            return 0.0
+
+    def is_stale(self, ticker, interval="1d") -> bool:
+        fetched_at = self._read_meta(ticker, interval).get('fetched_at', 0)
+        return time.time() - fetched_at > self.max_staleness
+
+    def covers(self, ticker, interval="1d", period="2y") -> bool:
+        """
+        Whether the stored history already goes back `period` (intraday-only aggregates are
+        limited by their source and always count as covered).
+        """
+        if interval in INTRADAY_ONLY:
+            return True
+        covered_from = self._read_meta(ticker, interval).get('covered_from')
+        return covered_from is not None and covered_from <= period_start(period).isoformat()
+
+    def get(self, ticker, interval="1d", period="2y", refresh=True) -> pd.DataFrame:
+        """
+        Returns the bars covering `period`, refreshing the store first if it is stale or
+        holds a shorter history than requested.
+        """
+        if refresh and (self.is_stale(ticker, interval) or not self.covers(ticker, interval, period)):
+            try:
+                self.refresh(ticker, interval=interval, period=period)
+            except Exception as e:
+                print(f"⚠️ Refresh failed for {ticker} ({interval}), serving stored bars: {e}")
+
+        df = self.read(ticker, interval)
+        if df.empty:
+            return df
+        return df.loc[period_start(period, tz=df.index.tz):]
@@ -0,0 +1,315 @@
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets (seconds) shared by every span histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Spans finished inside `record_spans()` (e.g. one dashboard rerun) are also appended here
+_recorded_spans = ContextVar("recorded_spans", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra=()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms, rendered in the Prometheus text format.
+
+    Every recording call starts with a single `enabled` check, so instrumentation left
+    in the hot paths costs close to nothing while metrics are disabled.
+
+    Args:
+        enabled (bool): Whether recording calls do anything.
+        buckets (tuple): Histogram upper bounds, in seconds.
+        prefix (str): Prepended to every metric name.
+    """
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS, prefix="energy_"):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config: dict):
+        """
+        Applies the `metrics` section of settings.yaml.
+        """
+        section = config.get('metrics', {})
+        self.enabled = section.get('enabled', False)
+        self.buckets = tuple(sorted(section.get('buckets', self.buckets)))
+        return self
+
+    def inc(self, name, value=1, help=None, **labels):
+        """
+        Increments a counter (e.g. inc("cache_requests_total", result="hit")).
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name, value, help=None, **labels):
+        """
+        Records one observation in a histogram.
+        """
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                # One count per bucket, plus +Inf, sum and count
+                counts = series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-2] += value
+            counts[-1] += 1
+            if help:
+                self._help.setdefault(name, help)
+
+    def span(self, name, **labels):
+        """
+        Times a block: `with REGISTRY.span("newsapi_request"): ...`.
+        """
+        if not self.enabled and _recorded_spans.get() is None:
+            return _NOOP_SPAN
+        return Span(self, name, labels)
+
+    def timed(self, name=None, **labels):
+        """
+        Decorator version of `span`; the span name defaults to the function's qualified name.
+        """
+        def decorator(func):
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled and _recorded_spans.get() is None:
+                    return func(*args, **kwargs)
+                with Span(self, span_name, labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of every series, for tests and status pages.
+        """
+        with self._lock:
+            return {
+                "counters": {name: dict(series) for name, series in self._counters.items()},
+                "histograms": {name: {k: list(v) for k, v in series.items()} for name, series in self._histograms.items()}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full_name = self.prefix + name
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full_name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                full_name = self.prefix + name
+                if name in self._help:
+                    lines.append(f"# HELP {full_name} {self._help[name]}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, counts in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip([*self.buckets, "+Inf"], counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {counts[-2]}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {counts[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+class Span:
+    """
+    Context manager timing one block into the `span_seconds` histogram.
+    Exceptions raised inside the block are counted in `errors_total`.
+    """
+    __slots__ = ("registry", "name", "labels", "start", "duration")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        self.registry.observe("span_seconds", self.duration, help="Duration of instrumented code paths.", span=self.name, **self.labels)
+        if exc_type is not None:
+            self.registry.inc("errors_total", help="Exceptions raised inside instrumented code paths.", source=self.name)
+
+        recorded = _recorded_spans.get()
+        if recorded is not None:
+            recorded.append((self.name, self.duration))
+        return False
+
+
+class _NoopSpan:
+    duration = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class record_spans:
+    """
+    Collects every span finished in the current context, even while metrics are disabled
+    (used by the dashboard's per-rerun timing panel).
+
+        with record_spans() as spans:
+            ...
+        # spans == [("yfinance_download", 0.41), ...]
+    """
+    def __enter__(self):
+        self.spans = []
+        self._token = _recorded_spans.set(self.spans)
+        return self.spans
+
+    def __exit__(self, exc_type, exc, tb):
+        _recorded_spans.reset(self._token)
+        return False
+
+
+def start_recording() -> list:
+    """
+    Starts collecting spans for the rest of the current context (e.g. a Streamlit script run)
+    and returns the list they are appended to.
+    """
+    spans = []
+    _recorded_spans.set(spans)
+    return spans
+
+
+def record_token_usage(response, registry=None):
+    """
+    Counts the prompt / completion tokens of one LangChain LLMResult, per model.
+    """
+    registry = registry or REGISTRY
+    if not registry.enabled:
+        return
+    usage = (response.llm_output or {}).get('token_usage') or {}
+    prompt, completion = usage.get('prompt_tokens'), usage.get('completion_tokens')
+    model = (response.llm_output or {}).get('model_name', "unknown")
+
+    # Newer chat models report usage on the message itself
+    if prompt is None and response.generations and response.generations[0]:
+        message = getattr(response.generations[0][0], 'message', None)
+        metadata = getattr(message, 'usage_metadata', None) or {}
+        prompt, completion = metadata.get('input_tokens'), metadata.get('output_tokens')
+
+    if prompt is not None:
+        registry.inc("llm_tokens_total", prompt, help="LLM tokens consumed.", kind="prompt", model=model)
+    if completion is not None:
+        registry.inc("llm_tokens_total", completion, help="LLM tokens consumed.", kind="completion", model=model)
+
+
+_callback_class = None
+
+
+def token_usage_callback(registry=None):
+    """
+    Returns a LangChain callback handler feeding `record_token_usage`.
+
+    The handler class is created on first use, so importing this module (e.g. from the
+    dashboard) does not pull in LangChain.
+    """
+    global _callback_class
+    if _callback_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class TokenUsageCallback(BaseCallbackHandler):
+            def __init__(self, registry=None):
+                self.registry = registry
+
+            def on_llm_end(self, response, **kwargs):
+                record_token_usage(response, self.registry)
+
+        _callback_class = TokenUsageCallback
+    return _callback_class(registry)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=9108, host="127.0.0.1", registry=None):
+    """
+    Serves the registry at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call `shutdown()` to stop it).
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# Process-wide registry used by the instrumented modules
+REGISTRY = MetricsRegistry()
+span = REGISTRY.span
+timed = REGISTRY.timed
+inc = REGISTRY.inc
+observe = REGISTRY.observe
@@ -0,0 +1,252 @@
+import math
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from src import metrics
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# NewsAPI error codes that will not succeed on retry
+FATAL_CODES = {"apiKeyInvalid", "apiKeyDisabled", "apiKeyMissing", "parameterInvalid", "parametersMissing"}
+
+
+def format_article(article: dict) -> dict:
+    """
+    Converts a raw NewsAPI article into the loader's {"text", "publishedAt"} format.
+    NewsAPI sends null titles and descriptions, read as empty strings.
+    """
+    return {
+        "text": (article.get('title') or "") + ". " + (article.get('description') or ""),
+        "publishedAt": article['publishedAt'],
+        "url": article.get('url')
+    }
+
+
+def format_articles(raw_articles) -> list:
+    """
+    Formats a page of raw articles, skipping malformed items (no date, no title or description).
+    """
+    articles = []
+    for article in raw_articles or []:
+        if not isinstance(article, dict) or not article.get('publishedAt') \
+                or not (article.get('title') or article.get('description')):
+            metrics.inc("errors_total", source="newsapi_article")
+            continue
+        articles.append(format_article(article))
+    return articles
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second (sustained request rate).
+        capacity (int): Maximum burst size.
+    """
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until a token is available, then consumes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+class NewsIngestor:
+    """
+    Paginated, concurrent NewsAPI client.
+
+    Requests share a pooled HTTP session and a token-bucket rate limiter. Failed calls are
+    retried with exponential backoff (up to `max_retries`), and articles are yielded as
+    soon as their page arrives. Days left incomplete by pages that kept failing are listed
+    in `failed_days` once a stream ends.
+    """
+    def __init__(self, api_key, page_size=100, max_pages=5, timeout=10, max_retries=3,
+                 rate_per_sec=1.0, burst=5, workers=4, backoff_base=0.5, session=None):
+        self.api_key = api_key
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.workers = workers
+        self.backoff_base = backoff_base
+        self.limiter = TokenBucket(rate_per_sec, burst)
+        self.failed_days = []
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_config(cls, config, api_key, session=None):
+        section = config.get('news', {})
+        return cls(
+            api_key,
+            page_size=section.get('page_size', 100),
+            max_pages=section.get('max_pages', 5),
+            timeout=section.get('timeout_seconds', 10),
+            max_retries=config['agent'].get('max_retries', 3),
+            rate_per_sec=section.get('requests_per_second', 1.0),
+            burst=section.get('burst', 5),
+            workers=section.get('workers', 4),
+            session=session
+        )
+
+    def _backoff(self, attempt, retry_after=None):
+        # Honour the server's Retry-After, otherwise exponential backoff with jitter
+        delay = float(retry_after) if retry_after else self.backoff_base * 2 ** attempt
+        time.sleep(delay * (1 + random.random() * 0.1))
+
+    def request(self, params: dict) -> dict:
+        """
+        Performs one rate-limited API call with retries.
+
+        Returns:
+            dict: The JSON payload ({} past the last available page, None if the call
+                  ultimately failed).
+        """
+        params = {**params, "apiKey": self.api_key}
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                with metrics.span("newsapi_request"):
+                    response = self.session.get(NEWS_API_URL, params=params, timeout=self.timeout)
+                    data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️ NewsAPI request failed (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    self._backoff(attempt)
+                continue
+
+            if data.get("status") == "ok":
+                return data
+
+            code = data.get("code")
+            if code == "maximumResultsReached":
+                return {}
+            if code in FATAL_CODES:
+                print(f"⚠️ API Error: {data.get('message')}")
+                return None
+
+            # Rate limited or server-side error: retry
+            print(f"⚠️ API Error (attempt {attempt + 1}): {data.get('message')}")
+            metrics.inc("errors_total", source="newsapi")
+            if attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get("Retry-After"))
+        return None
+
+    def fetch_page(self, topic, page=1, date_from=None, date_to=None, page_size=None, sort_by="relevancy"):
+        """
+        Fetches one page of results.
+
+        Returns:
+            tuple: (formatted articles, total number of results for the query, or None if
+                   the request failed).
+        """
+        params = {
+            "q": topic,
+            "language": "en",
+            "sortBy": sort_by,
+            "pageSize": page_size or self.page_size,
+            "page": page
+        }
+        if date_from:
+            params["from"] = date_from
+        if date_to:
+            params["to"] = date_to
+
+        data = self.request(params)
+        if data is None:
+            return [], None
+        return format_articles(data.get('articles')), data.get('totalResults', 0)
+
+    def iter_articles(self, topic, start=None, end=None, sort_by="publishedAt"):
+        """
+        Streams every article for `topic` between `start` and `end`, one query per day,
+        with all pages and days fetched concurrently.
+
+        A page failing through all its retries is requeued once; if it fails again its day is
+        reported (and kept in `failed_days`) instead of being silently dropped. Closing the
+        stream early cancels the pages not fetched yet.
+
+        Args:
+            topic (str): The search query.
+            start (datetime): First day (None for a single real-time query).
+            end (datetime): Last day (defaults to today).
+
+        Yields:
+            dict: Formatted articles, de-duplicated by URL, as their page arrives.
+        """
+        if start is None:
+            days = [None]
+        else:
+            end = end or datetime.now()
+            days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+        seen_urls = set()
+        requeued, failed = set(), set()
+        pending = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        def submit(day, page):
+            pending[pool.submit(self.fetch_page, topic, page, day, day, None, sort_by)] = (day, page)
+
+        try:
+            # 1. First page of every day; it also tells how many pages exist
+            for day in days:
+                submit(day, 1)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    day, page = pending.pop(future)
+                    articles, total = future.result()
+
+                    # 2. Failed pages get one more round, then their day is reported
+                    if total is None:
+                        if (day, page) not in requeued:
+                            requeued.add((day, page))
+                            submit(day, page)
+                        else:
+                            failed.add(day or "latest")
+                            metrics.inc("errors_total", source="newsapi_page")
+                        continue
+
+                    # 3. Fan out the remaining pages of this day
+                    if page == 1:
+                        pages = min(self.max_pages, math.ceil(total / self.page_size))
+                        for next_page in range(2, pages + 1):
+                            submit(day, next_page)
+
+                    for article in articles:
+                        key = article['url'] or article['text']
+                        if key in seen_urls:
+                            continue
+                        seen_urls.add(key)
+                        yield article
+        finally:
+            # Also runs when the consumer stops early: drop the queued pages rather than
+            # waiting for them (requests already in flight finish in the background)
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.failed_days = sorted(failed)
+            if failed:
+                print(f"⚠️ NewsAPI pages kept failing, incomplete days: {', '.join(self.failed_days)}")
@@ -0,0 +1,72 @@
+import time
+
+
+def article_key(article: dict) -> str:
+    """
+    Stable identity of an article (its URL when available, otherwise its text).
+    """
+    return article.get('url') or article['text']
+
+
+def classify_articles(agent, articles, dedup=None, triage=None):
+    """
+    Classifies articles, sending only plausibly relevant ones, and only one representative
+    per near-duplicate cluster, to the LLM.
+
+    Args:
+        agent (EnergyTradingAgent): Classifier.
+        articles (list): {"text", "publishedAt", ...} dicts.
+        dedup (NearDuplicateIndex): Optional incremental index; clusters already classified
+                                    in a previous refresh reuse their stored signal.
+        triage (NewsTriage): Optional local pre-filter; skipped articles get no signal.
+
+    Returns:
+        tuple: (signals, clusters, failed). `signals` and `clusters` are aligned with `articles`:
+               duplicates receive a copy of their representative's MarketSignal, `clusters`
+               holds each article's cluster key. `failed` lists the indices of the relevant
+               articles the LLM could not classify (to retry later).
+    """
+    signals = [None] * len(articles)
+    clusters = [article_key(article) for article in articles]
+
+    # 1. Local triage: obvious noise never reaches the LLM (except audit samples)
+    if triage is not None:
+        selected, audits = triage.route(articles)
+    else:
+        selected, audits = list(range(len(articles))), []
+
+    # 2. Cluster the selected articles against everything seen so far
+    if dedup is not None:
+        for i in selected:
+            clusters[i] = dedup.add(clusters[i], articles[i]['text'])
+
+    # 3. Classify one representative per cluster that has no signal yet
+    known = {}
+    pending = {}
+    for i in selected:
+        cluster = clusters[i]
+        signal = dedup.get_signal(cluster) if dedup is not None else None
+        if signal is not None:
+            known[cluster] = signal
+        elif cluster not in pending:
+            pending[cluster] = articles[i]['text']
+
+    start = time.perf_counter()
+    results = agent.analyze_many(list(pending.values()))
+    if triage is not None and pending:
+        triage.record_llm_time(time.perf_counter() - start, len(pending))
+
+    for cluster, signal in zip(pending, results):
+        known[cluster] = signal
+        if dedup is not None:
+            dedup.set_signal(cluster, signal)
+
+    # 4. Fan the representative's signal out to every member (copies, so per-article fields stay separate)
+    for i in selected:
+        signal = known.get(clusters[i])
+        signals[i] = signal.model_copy() if signal is not None else None
+    if triage is not None:
+        for i in audits:
+            triage.record_audit(signals[i])
+    failed = [i for i in selected if signals[i] is None and i not in audits]
+    return signals, clusters, failed
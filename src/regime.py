@@ -0,0 +1,543 @@
+import argparse
+import json
+import math
+import os
+from collections import deque
+import numpy as np
+import pandas as pd
+from src.analytics import classify_regime, volatility_arrays
+from src.calibration import DEFAULT_LEVELS, DEFAULT_PERCENTILES, DEFAULT_WINDOWS, resolve_levels, write_thresholds
+from src.backtest import bar_length
+
+DAY_SECONDS = 86_400
+
+# Regimes from the calmest to the most volatile (see analytics.classify_regime)
+REGIME_ORDER = ("calm", "normal", "high", "critical")
+
+# Scalar per-ticker fields persisted as they are
+STATE_FIELDS = ("last_bar", "prev_close", "regime", "candidate", "candidate_bars", "level", "vol_pct")
+
+
+class DecayingHistogram:
+    """
+    Exponentially weighted distribution of a positive series on log-spaced bins.
+
+    Every observation's weight decays with its age (time constant `tau` seconds), so the
+    histogram follows the recent distribution like a rolling window, in constant memory and
+    O(bins) per update. Quantiles are read with geometric interpolation inside a bin
+    (bins are ~2% wide with the defaults).
+
+    Args:
+        tau (float): Decay time constant, in seconds.
+        bins (int): Number of log-spaced bins between `low` and `high`.
+    """
+    def __init__(self, tau, bins=600, low=1e-3, high=1e3):
+        self.tau = tau
+        self.edges = np.geomspace(low, high, bins + 1)
+        # Underflow and overflow bins on both ends
+        self.counts = np.zeros(bins + 2)
+        self.total = 0.0
+        self.weighted_sum = 0.0
+        self.observations = 0
+        self.last = None
+
+    def update(self, value, at):
+        """
+        Adds one observation made at `at` (epoch seconds).
+        """
+        if self.last is not None and at > self.last:
+            decay = math.exp(-(at - self.last) / self.tau)
+            self.counts *= decay
+            self.total *= decay
+            self.weighted_sum *= decay
+        self.last = at if self.last is None else max(self.last, at)
+
+        self.counts[np.searchsorted(self.edges, value, side="right")] += 1.0
+        self.total += 1.0
+        self.weighted_sum += value
+        self.observations += 1
+
+    def mean(self):
+        return self.weighted_sum / self.total if self.total else float("nan")
+
+    def quantile(self, q):
+        """
+        The q-th percentile (0-100) of the weighted distribution.
+        """
+        if not self.total:
+            return float("nan")
+        target = q / 100 * self.total
+        cumulative = np.cumsum(self.counts)
+        i = min(int(np.searchsorted(cumulative, target)), len(self.counts) - 1)
+        if i == 0:
+            return float(self.edges[0])
+        if i == len(self.counts) - 1:
+            return float(self.edges[-1])
+        # Bin i spans edges[i - 1] .. edges[i]
+        fraction = (target - (cumulative[i - 1])) / self.counts[i] if self.counts[i] else 0.0
+        lower, upper = self.edges[i - 1], self.edges[i]
+        return float(lower * (upper / lower) ** min(max(fraction, 0.0), 1.0))
+
+    def to_dict(self) -> dict:
+        # Sparse counts: most bins stay empty
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "tau": self.tau, "bins": len(self.edges) - 1, "low": float(self.edges[0]), "high": float(self.edges[-1]),
+            "counts": {int(i): float(self.counts[i]) for i in nonzero},
+            "total": self.total, "weighted_sum": self.weighted_sum, "observations": self.observations, "last": self.last
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "DecayingHistogram":
+        histogram = cls(data['tau'], data['bins'], data['low'], data['high'])
+        for i, count in data['counts'].items():
+            histogram.counts[int(i)] = count
+        histogram.total = data['total']
+        histogram.weighted_sum = data['weighted_sum']
+        histogram.observations = data['observations']
+        histogram.last = data['last']
+        return histogram
+
+
+class Cusum:
+    """
+    Two-sided CUSUM on log volatility, standardized against a slow exponentially weighted
+    baseline. An alarm means the volatility level shifted (up or down); the baseline then
+    restarts at the new level, given by a fast moving average.
+
+    Args:
+        k (float): Allowance, in baseline standard deviations.
+        h (float): Decision threshold, in baseline standard deviations.
+        baseline_bars (float): Time constant of the baseline, in bars.
+        fast_bars (float): Time constant of the level used to restart the baseline, in bars.
+    """
+    def __init__(self, k=0.5, h=8.0, baseline_bars=60, fast_bars=5):
+        self.k = k
+        self.h = h
+        self.alpha = 1 - math.exp(-1 / baseline_bars)
+        self.fast_alpha = 1 - math.exp(-1 / fast_bars)
+        self.mean = None
+        self.var = 0.0
+        self.fast = None
+        self.upper = 0.0
+        self.lower = 0.0
+        self.bars = 0
+
+    def update(self, value) -> int:
+        """
+        Returns:
+            int: +1 on an upward shift, -1 on a downward shift, 0 otherwise.
+        """
+        x = math.log(max(value, 1e-6))
+        self.bars += 1
+        if self.mean is None:
+            self.mean = self.fast = x
+            return 0
+
+        # 1. Score against the baseline as it stood before this bar
+        std = math.sqrt(self.var)
+        signal = 0
+        if self.bars > 1 / self.alpha and std > 0:
+            z = (x - self.mean) / std
+            self.upper = max(0.0, self.upper + z - self.k)
+            self.lower = max(0.0, self.lower - z - self.k)
+            if self.upper > self.h or self.lower > self.h:
+                signal = 1 if self.upper > self.h else -1
+                self.upper = self.lower = 0.0
+
+        # 2. Update the baseline (restarted at the recent level after an alarm)
+        self.fast += self.fast_alpha * (x - self.fast)
+        if signal:
+            self.mean = self.fast
+        else:
+            delta = x - self.mean
+            self.mean += self.alpha * delta
+            self.var = (1 - self.alpha) * (self.var + self.alpha * delta * delta)
+        return signal
+
+    def to_dict(self) -> dict:
+        return {k: getattr(self, k) for k in ("k", "h", "alpha", "fast_alpha", "mean", "var", "fast", "upper", "lower", "bars")}
+
+    @classmethod
+    def from_dict(cls, data) -> "Cusum":
+        cusum = cls.__new__(cls)
+        for key, value in data.items():
+            setattr(cusum, key, value)
+        return cusum
+
+
+class RegimeDetector:
+    """
+    Online volatility regime detector: thresholds, regime and change points of every ticker,
+    updated per closed bar in constant memory.
+
+    For each calibration window (e.g. long_term = 1825 days) a DecayingHistogram with the
+    same mean age tracks the distribution of `Vol_Pct`; thresholds are read from it with the
+    calibration levels (e.g. critical = long_term.p95) instead of a 5-year batch recompute.
+    These are the thresholds the dashboard and the alerts classify single readings with.
+
+    The regime follows a smoothed volatility level. Its own thresholds come from a second set
+    of histograms of that level (the smoothed series is far less dispersed than single bars,
+    so raw quantiles would almost never be crossed), with the same calibration levels.
+    Moving to another regime requires crossing the threshold by a `hysteresis` margin and
+    holding there for `confirm_bars` bars. Only transitions from or to `event_regimes`
+    (high / critical by default) are reported; calm <-> normal changes update the state
+    silently. A CUSUM flags shifts in the volatility level. Events are returned and kept
+    (last `max_events`) in the persisted state, which survives restarts.
+
+    Args:
+        windows (dict): Window name -> days (see `calibration.windows`).
+        percentiles (list): Percentiles tracked per window.
+        levels (dict): Threshold level -> '<window>.<statistic>'.
+        interval (str): Bar size (used to find the closed bars).
+        min_bars (int): Bars needed before thresholds are used and transitions reported.
+        smoothing_bars (float): Time constant of the volatility level the regime follows, in bars.
+        confirm_bars (int): Consecutive bars a new regime must hold before the transition.
+        hysteresis (float): Relative margin beyond a threshold needed to change regime (0.1 = 10%).
+        event_regimes (tuple): Transitions are reported only when they leave or enter one of these.
+        path (str): JSON state file (None keeps the state in memory only).
+    """
+    def __init__(self, windows=DEFAULT_WINDOWS, percentiles=DEFAULT_PERCENTILES, levels=DEFAULT_LEVELS,
+                 interval="1d", min_bars=60, smoothing_bars=10, confirm_bars=3, hysteresis=0.1,
+                 event_regimes=("high", "critical"), cusum_k=0.5, cusum_h=8.0, baseline_bars=60,
+                 max_events=100, path=None):
+        self.windows = dict(windows)
+        self.percentiles = list(percentiles)
+        self.levels = dict(levels)
+        self.interval = interval
+        self.bar_length = bar_length(interval)
+        self.min_bars = min_bars
+        self.smoothing = 1 - math.exp(-1 / smoothing_bars)
+        self.confirm_bars = confirm_bars
+        self.hysteresis = hysteresis
+        self.event_regimes = set(event_regimes)
+        self.cusum_params = {"k": cusum_k, "h": cusum_h, "baseline_bars": baseline_bars}
+        self.path = path
+        self.state = {}
+        self.events = deque(maxlen=max_events)
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('regime', {})
+        calibration = config.get('calibration', {})
+        detector = cls(
+            windows=calibration.get('windows', DEFAULT_WINDOWS),
+            percentiles=calibration.get('percentiles', DEFAULT_PERCENTILES),
+            levels=calibration.get('levels', DEFAULT_LEVELS),
+            interval=section.get('interval', "1d"),
+            min_bars=section.get('min_bars', 60),
+            smoothing_bars=section.get('smoothing_bars', 10),
+            confirm_bars=section.get('confirm_bars', 3),
+            hysteresis=section.get('hysteresis', 0.1),
+            event_regimes=section.get('event_regimes', ("high", "critical")),
+            cusum_k=section.get('cusum_k', 0.5),
+            cusum_h=section.get('cusum_h', 8.0),
+            baseline_bars=section.get('baseline_bars', 60),
+            max_events=section.get('max_events', 100),
+            path=section.get('path', "data/regime_state.json")
+        )
+        detector.load()
+        return detector
+
+    # ------------------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------------------
+
+    def _new_ticker(self):
+        return {
+            # Same mean age as the batch window (W / 2)
+            "histograms": {name: DecayingHistogram(days * DAY_SECONDS / 2) for name, days in self.windows.items()},
+            # Same windows, over the smoothed level the regime follows
+            "level_histograms": {name: DecayingHistogram(days * DAY_SECONDS / 2) for name, days in self.windows.items()},
+            "cusum": Cusum(**self.cusum_params),
+            "last_bar": None,
+            "prev_close": None,
+            "regime": None,
+            "candidate": None,
+            "candidate_bars": 0,
+            "level": None,
+            "vol_pct": None
+        }
+
+    def on_bar(self, ticker, at, high, low, close) -> list:
+        """
+        Feeds one closed bar.
+
+        Returns:
+            list: Events (dicts) raised by this bar.
+        """
+        state = self.state.setdefault(ticker, self._new_ticker())
+        at = pd.Timestamp(at)
+        prev_close, state['prev_close'] = state['prev_close'], float(close)
+        state['last_bar'] = at.value
+        if prev_close is None:
+            return []
+
+        _, vol_pct = volatility_arrays(np.array([np.nan, high]), np.array([np.nan, low]), np.array([prev_close, close]))
+        vol_pct = float(vol_pct[1])
+        if not np.isfinite(vol_pct):
+            return []
+
+        events = []
+        level = vol_pct if state['level'] is None else state['level'] + self.smoothing * (vol_pct - state['level'])
+        state['level'], state['vol_pct'] = level, vol_pct
+
+        # 1. Classify against the thresholds before this bar, then learn from it
+        thresholds = self.thresholds(ticker)
+        level_thresholds = self.regime_thresholds(ticker)
+        if level_thresholds is not None:
+            regime = self._with_hysteresis(level, level_thresholds, state['regime'])
+            if regime == state['regime']:
+                state['candidate'], state['candidate_bars'] = None, 0
+            else:
+                if regime != state['candidate']:
+                    state['candidate'], state['candidate_bars'] = regime, 0
+                state['candidate_bars'] += 1
+                if state['regime'] is None or state['candidate_bars'] >= self.confirm_bars:
+                    if state['regime'] is not None and {state['regime'], regime} & self.event_regimes:
+                        events.append(self._event(
+                            "transition", ticker, at, vol_pct, previous=state['regime'], regime=regime,
+                            level=round(level, 2), thresholds=level_thresholds
+                        ))
+                    state['regime'], state['candidate'], state['candidate_bars'] = regime, None, 0
+
+        seconds = at.value / 1e9
+        for histogram in state['histograms'].values():
+            histogram.update(vol_pct, seconds)
+        for histogram in state['level_histograms'].values():
+            histogram.update(level, seconds)
+
+        # 2. Shift in the volatility level
+        shift = state['cusum'].update(vol_pct)
+        if shift and thresholds is not None:
+            events.append(self._event("changepoint", ticker, at, vol_pct, direction="up" if shift > 0 else "down"))
+
+        self.events.extend(events)
+        return events
+
+    def _with_hysteresis(self, level, thresholds, current):
+        """
+        Regime of the smoothed level; leaving `current` takes a margin beyond the threshold.
+        """
+        regime = classify_regime(level, thresholds)
+        if current is None or regime == current:
+            return regime
+        rank = REGIME_ORDER.index
+        up = rank(regime) > rank(current)
+        factor = 1 + self.hysteresis if up else 1 - self.hysteresis
+        shifted = classify_regime(level, {name: value * factor for name, value in thresholds.items()})
+        moved = rank(shifted) > rank(current) if up else rank(shifted) < rank(current)
+        return shifted if moved else current
+
+    def _event(self, kind, ticker, at, vol_pct, **details) -> dict:
+        return {"type": kind, "ticker": ticker, "at": at.isoformat(), "vol_pct": round(vol_pct, 2), **details}
+
+    def on_frame(self, ticker, df: pd.DataFrame, now=None) -> list:
+        """
+        Feeds the closed bars of one OHLC frame newer than the last one seen.
+        """
+        if df is None or df.empty:
+            return []
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        index = df.index.tz_convert("UTC") if df.index.tz is not None else df.index.tz_localize("UTC")
+        closed = index + self.bar_length <= now
+        last_bar = self.state.get(ticker, {}).get('last_bar')
+        if last_bar is not None:
+            closed &= index.as_unit("ns").asi8 > last_bar
+
+        high, low, close = (df[column].to_numpy(dtype=float) for column in ("High", "Low", "Close"))
+        events = []
+        for i in np.flatnonzero(closed & ~np.isnan(close)):
+            events.extend(self.on_bar(ticker, index[i], high[i], low[i], close[i]))
+        return events
+
+    def on_frames(self, frames: dict, now=None) -> list:
+        events = []
+        for ticker, df in frames.items():
+            events.extend(self.on_frame(ticker, df, now))
+        return events
+
+    # ------------------------------------------------------------------------------
+    # Readings
+    # ------------------------------------------------------------------------------
+
+    def grid(self, ticker, histograms="histograms") -> dict:
+        """
+        Current statistics per window, in the shape of `calibration.calibrate_ticker`
+        ('level_histograms' for the smoothed level).
+        """
+        state = self.state.get(ticker)
+        if state is None:
+            return {}
+        grid = {}
+        for name, histogram in state[histograms].items():
+            stats = {f"p{p:g}": round(histogram.quantile(p), 2) for p in self.percentiles}
+            stats['mean'] = round(histogram.mean(), 2)
+            stats['bars'] = histogram.observations
+            grid[name] = stats
+        return grid
+
+    def thresholds(self, ticker) -> dict:
+        """
+        Current 'critical' / 'high' / 'noise' levels, or None while warming up.
+        """
+        state = self.state.get(ticker)
+        if state is None or state['cusum'].bars < self.min_bars:
+            return None
+        return resolve_levels(self.grid(ticker), self.levels)
+
+    def regime_thresholds(self, ticker) -> dict:
+        """
+        Levels the smoothed volatility is classified with (same calibration levels, computed
+        on the smoothed series), or None while warming up.
+        """
+        state = self.state.get(ticker)
+        if state is None or state['cusum'].bars < self.min_bars:
+            return None
+        return resolve_levels(self.grid(ticker, "level_histograms"), self.levels)
+
+    def classify(self, ticker, vol_pct, fallback=None):
+        """
+        Regime of a reading (e.g. the still open bar), with static `fallback` thresholds while warming up.
+        """
+        thresholds = self.thresholds(ticker) or fallback
+        return classify_regime(vol_pct, thresholds) if thresholds is not None else None
+
+    def results(self) -> dict:
+        """
+        Ticker -> {'critical', 'high', 'noise', 'windows'}, as returned by `calibrate_universe`.
+        """
+        return {
+            ticker: {**thresholds, 'windows': self.grid(ticker)}
+            for ticker in self.state if (thresholds := self.thresholds(ticker)) is not None
+        }
+
+    def snapshot(self) -> dict:
+        """
+        JSON-ready summary for the feed store / dashboard.
+        """
+        tickers = {}
+        for ticker, state in self.state.items():
+            last_bar = pd.Timestamp(state['last_bar'], tz="UTC").isoformat() if state['last_bar'] is not None else None
+            tickers[ticker] = {
+                "regime": state['regime'], "level": state['level'], "vol_pct": state['vol_pct'], "last_bar": last_bar,
+                "thresholds": self.thresholds(ticker)
+            }
+        return {"tickers": tickers, "events": list(self.events)[-20:]}
+
+    # ------------------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------------------
+
+    def save(self, path=None):
+        """
+        Writes the state atomically (a few KB per ticker).
+        """
+        path = path or self.path
+        if path is None:
+            return
+        data = {
+            "interval": self.interval,
+            "windows": self.windows,
+            "tickers": {
+                ticker: {
+                    "histograms": {name: histogram.to_dict() for name, histogram in state['histograms'].items()},
+                    "level_histograms": {name: histogram.to_dict() for name, histogram in state['level_histograms'].items()},
+                    "cusum": state['cusum'].to_dict(),
+                    **{key: state[key] for key in STATE_FIELDS}
+                }
+                for ticker, state in self.state.items()
+            },
+            "events": list(self.events)
+        }
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path=None) -> bool:
+        """
+        Restores a saved state. A state saved with other windows or another interval is ignored
+        (the detector then rebuilds from the bar history).
+        """
+        path = path or self.path
+        if path is None or not os.path.exists(path):
+            return False
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get('interval') != self.interval or data.get('windows') != self.windows \
+                or any('level_histograms' not in saved for saved in data['tickers'].values()):
+            print("⚠️ Regime state saved with other windows, interval or format, rebuilding it.")
+            return False
+
+        for ticker, saved in data['tickers'].items():
+            self.state[ticker] = {
+                "histograms": {name: DecayingHistogram.from_dict(h) for name, h in saved['histograms'].items()},
+                "level_histograms": {name: DecayingHistogram.from_dict(h) for name, h in saved['level_histograms'].items()},
+                "cusum": Cusum.from_dict({**saved['cusum'], "k": self.cusum_params['k'], "h": self.cusum_params['h']}),
+                **{key: saved[key] for key in STATE_FIELDS}
+            }
+        self.events.extend(data.get('events', []))
+        return True
+
+
+def format_event(event: dict) -> str:
+    """
+    One-line description of a regime event.
+    """
+    if event['type'] == "transition":
+        change = f"{event['previous']} -> {event['regime']}"
+    else:
+        change = f"volatility shift {event['direction']}"
+    return f"{event['at'][:10]} {event['ticker']}: {change} ({event['vol_pct']}%)"
+
+
+def update_from_store(detector: RegimeDetector, loader, tickers=None, history_period="5y") -> list:
+    """
+    Brings the detector up to date from the bar store. Tickers the detector has never seen
+    are bootstrapped from `history_period` of bars, downloaded once if the store holds less
+    (the worker's price polls only keep 2 years); known tickers read the stored bars since
+    their last processed bar, however long ago that was.
+
+    Returns:
+        list: Events raised by the new bars of already known tickers.
+    """
+    events = []
+    now = pd.Timestamp.now(tz="UTC")
+    for ticker in tickers or loader.get_tickers():
+        last_bar = detector.state.get(ticker, {}).get('last_bar')
+        if last_bar is None:
+            bars = loader.fetch_bars(ticker, period=history_period, interval=detector.interval, refresh=True)
+            detector.on_frame(ticker, bars)
+            continue
+        days = (now - pd.Timestamp(last_bar, tz="UTC")).days + 2
+        bars = loader.fetch_bars(ticker, period=f"{days}d", interval=detector.interval, refresh=False)
+        events.extend(detector.on_frame(ticker, bars))
+    return events
+
+
+if __name__ == "__main__":
+    from src.config import load_config
+    from src.data_loader import MarketDataLoader
+
+    parser = argparse.ArgumentParser(description="Online volatility thresholds: update from the local bar store, print, optionally write.")
+    parser.add_argument("--write", action="store_true", help="Write the online thresholds to settings.yaml (like calibration.py).")
+    args = parser.parse_args()
+
+    loader = MarketDataLoader()
+    config = load_config()
+    detector = RegimeDetector.from_config(config)
+    update_from_store(detector, loader, history_period=config.get('calibration', {}).get('history_period', "5y"))
+    detector.save()
+
+    results = detector.results()
+    print(f"{'Ticker':<10}{'Regime':>10}{'Noise':>10}{'High':>10}{'Critical':>10}")
+    for ticker, result in results.items():
+        print(f"{ticker:<10}{detector.state[ticker]['regime'] or '-':>10}{result['noise']:>9.2f}%{result['high']:>9.2f}%{result['critical']:>9.2f}%")
+    for event in list(detector.events)[-5:]:
+        print(f"🔀 {format_event(event)}")
+
+    if args.write and results:
+        write_thresholds(results, config['market']['primary_ticker'])
+        print("✅ Online thresholds written to settings.yaml")
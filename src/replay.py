@@ -0,0 +1,585 @@
+import argparse
+import asyncio
+import copy
+import gzip
+import heapq
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from src.agent import EnergyTradingAgent
+from src.alerts import AlertDispatcher, AlertThrottle
+from src.cache import normalize_text
+from src.config import load_config
+from src.data_loader import MarketDataLoader
+from src.fakes import FakeSignalLLM, keyword_signal
+from src.feed_store import FeedStore
+from src.market_store import BarStore, period_start
+from src.pipeline import article_key
+from src.schema import MarketSignal
+from src.signal_store import SignalStore
+from src.worker import SignalWorker, STOP
+
+FORMAT_VERSION = 1
+
+
+def _utc(value) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize("UTC") if timestamp.tz is None else timestamp.tz_convert("UTC")
+
+
+class Scenario:
+    """
+    Recorded news, bars and LLM answers of one session, stored as a gzip JSON-lines fixture.
+
+    One record per line: a header, then "news" (one article), "bars" (one ticker/interval,
+    columnar) and "signal" (the answer and latency of one LLM call, keyed by normalized text).
+    Adding is thread-safe, so a live worker can record while it runs.
+    """
+    def __init__(self, meta=None):
+        self.meta = meta or {}
+        self.news = {}
+        self.bars = {}
+        self.signals = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------------------
+
+    def add_news(self, articles):
+        with self._lock:
+            for article in articles:
+                self.news.setdefault(article_key(article), {k: v for k, v in article.items() if k != 'received_at'})
+
+    def add_bars(self, ticker, interval, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        with self._lock:
+            stored = self.bars.get((ticker, interval))
+            if stored is not None:
+                df = pd.concat([stored, df])
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+            self.bars[(ticker, interval)] = df
+
+    def add_signal(self, text, signal, latency=None, model=None):
+        with self._lock:
+            self.signals[normalize_text(text)] = (signal, model)
+            if latency is not None:
+                self.latencies.append(latency)
+
+    # ------------------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------------------
+
+    def signal_for(self, text) -> MarketSignal:
+        entry = self.signals.get(normalize_text(text))
+        return entry[0] if entry is not None else None
+
+    def articles(self) -> list:
+        """
+        Recorded articles in publication order.
+        """
+        return sorted(self.news.values(), key=lambda article: _utc(article['publishedAt']))
+
+    def span(self):
+        """
+        (first, last) publication time of the recorded news.
+        """
+        times = [_utc(article['publishedAt']) for article in self.news.values()]
+        return (min(times), max(times)) if times else (None, None)
+
+    # ------------------------------------------------------------------------------
+    # Fixture files
+    # ------------------------------------------------------------------------------
+
+    def save(self, path):
+        """
+        Writes the fixture atomically (gzip JSON lines).
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock, gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "scenario", "version": FORMAT_VERSION, **self.meta}) + "\n")
+            for article in self.news.values():
+                f.write(json.dumps({"kind": "news", "article": article}) + "\n")
+            for (ticker, interval), df in self.bars.items():
+                f.write(json.dumps({
+                    "kind": "bars", "ticker": ticker, "interval": interval,
+                    "tz": str(df.index.tz) if df.index.tz is not None else None,
+                    "index": df.index.as_unit("ns").asi8.tolist(),
+                    "columns": {column: df[column].astype(float).tolist() for column in df.columns}
+                }) + "\n")
+            for key, (signal, model) in self.signals.items():
+                f.write(json.dumps({"kind": "signal", "text": key, "model": model, "signal": signal.model_dump(mode="json")}) + "\n")
+            f.write(json.dumps({"kind": "latencies", "seconds": self.latencies}) + "\n")
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path) -> "Scenario":
+        scenario = cls()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                kind = record.pop('kind')
+                if kind == "scenario":
+                    scenario.meta = record
+                elif kind == "news":
+                    scenario.add_news([record['article']])
+                elif kind == "bars":
+                    index = pd.DatetimeIndex(pd.to_datetime(record['index'], unit="ns"), name="timestamp")
+                    if record['tz']:
+                        index = index.tz_localize("UTC").tz_convert(record['tz'])
+                    scenario.bars[(record['ticker'], record['interval'])] = pd.DataFrame(record['columns'], index=index)
+                elif kind == "signal":
+                    scenario.signals[record['text']] = (MarketSignal.model_validate(record['signal']), record['model'])
+                elif kind == "latencies":
+                    scenario.latencies = record['seconds']
+        return scenario
+
+    def amplify(self, factor, jitter_seconds=3600, seed=0, syndicated=False) -> "Scenario":
+        """
+        A news storm built from this scenario: every article is published `factor` times,
+        spread over `jitter_seconds` after the original.
+
+        By default the copies are distinct stories for the dedup stage (their words are
+        shuffled, which keeps triage keywords but shares no shingles), each answered with the
+        original's recorded signal, so the storm loads classification. With `syndicated`,
+        copies are verbatim reposts with their own URL, which near-duplicate dedup collapses:
+        that measures dedup, not LLM throughput.
+        """
+        rng = random.Random(seed)
+        storm = Scenario({**self.meta, "amplified": factor, "syndicated": syndicated})
+        storm.bars, storm.latencies = self.bars, self.latencies
+        storm.signals = dict(self.signals)
+        for article in self.news.values():
+            published = _utc(article['publishedAt'])
+            recorded = self.signals.get(normalize_text(article['text']))
+            for copy in range(factor):
+                offset = timedelta(seconds=rng.uniform(0, jitter_seconds)) if copy else timedelta(0)
+                text = article['text']
+                if copy and not syndicated:
+                    words = text.split()
+                    rng.shuffle(words)
+                    text = " ".join(words)
+                    if recorded is not None:
+                        storm.signals[normalize_text(text)] = recorded
+                storm.add_news([{
+                    **article,
+                    "text": text,
+                    "url": f"{article.get('url') or article['text'][:40]}#copy-{copy}",
+                    "publishedAt": (published + offset).strftime("%Y-%m-%dT%H:%M:%SZ")
+                }])
+        return storm
+
+
+# ------------------------------------------------------------------------------
+# Recording wrappers
+# ------------------------------------------------------------------------------
+
+class RecordingLoader:
+    """
+    Wraps a MarketDataLoader and records every article and bar it returns.
+    """
+    def __init__(self, loader, scenario: Scenario):
+        self.loader = loader
+        self.scenario = scenario
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def fetch_real_news(self, *args, **kwargs):
+        articles = self.loader.fetch_real_news(*args, **kwargs)
+        self.scenario.add_news(articles)
+        return articles
+
+    def iter_news(self, *args, **kwargs):
+        for article in self.loader.iter_news(*args, **kwargs):
+            self.scenario.add_news([article])
+            yield article
+
+    def fetch_bars(self, ticker, period="2y", interval="1d", refresh=True):
+        df = self.loader.fetch_bars(ticker, period=period, interval=interval, refresh=refresh)
+        self.scenario.add_bars(ticker, interval, df)
+        return df
+
+    def fetch_panel(self, tickers=None, period="2y", interval="1d", refresh=True):
+        # Goes through the recording fetch_bars
+        return MarketDataLoader.fetch_panel(self, tickers, period, interval, refresh)
+
+
+class RecordingChain:
+    """
+    Wraps one model's structured-output chain and records each answer with its latency.
+    """
+    def __init__(self, chain, scenario: Scenario, model=None):
+        self.chain = chain
+        self.scenario = scenario
+        self.model = model
+
+    def invoke(self, payload, config=None):
+        start = time.perf_counter()
+        result = self.chain.invoke(payload, config)
+        if isinstance(result, MarketSignal):
+            self.scenario.add_signal(payload['text'], result, time.perf_counter() - start, self.model)
+        return result
+
+    async def ainvoke(self, payload, config=None):
+        start = time.perf_counter()
+        result = await self.chain.ainvoke(payload, config)
+        if isinstance(result, MarketSignal):
+            self.scenario.add_signal(payload['text'], result, time.perf_counter() - start, self.model)
+        return result
+
+
+def record_agent(agent: EnergyTradingAgent, scenario: Scenario) -> EnergyTradingAgent:
+    """
+    Makes the agent record every LLM answer. The cache and packing are turned off, so that
+    each article gets its own recorded call.
+    """
+    agent.cache = None
+    agent.packing = {**agent.packing, 'enabled': False}
+    for route in agent.executor.routes:
+        route.chain = RecordingChain(route.chain, scenario, route.name)
+    return agent
+
+
+# ------------------------------------------------------------------------------
+# Replay doubles
+# ------------------------------------------------------------------------------
+
+class ReplayClock:
+    """
+    Simulated time: starts at `start` and advances `speedup` times faster than the wall clock
+    (speedup=None runs as fast as possible, jumping straight to each event).
+    """
+    def __init__(self, start: pd.Timestamp, speedup=None):
+        self.start = start
+        self.speedup = speedup
+        self.current = start
+        self._wall_start = time.monotonic()
+
+    def now(self) -> pd.Timestamp:
+        return self.current
+
+    async def wait_until(self, at: pd.Timestamp):
+        if self.speedup:
+            due = self._wall_start + (at - self.start).total_seconds() / self.speedup
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.current = max(self.current, at)
+
+
+class ReplayLoader(MarketDataLoader):
+    """
+    MarketDataLoader serving recorded bars up to the simulated time (never touches the network).
+
+    Its bar store and the regime state of its config live in `workdir`, so components built
+    from the loader (regime detector and monitor) never read or write the live stores.
+    """
+    def __init__(self, scenario: Scenario, clock: ReplayClock, workdir):
+        self.scenario = scenario
+        self.clock = clock
+        config = copy.deepcopy(load_config())
+        config.setdefault('data_store', {})['path'] = os.path.join(workdir, "bars")
+        config.setdefault('regime', {})['path'] = os.path.join(workdir, "regime_state.json")
+        super().__init__(store=BarStore.from_config(config, backend=self._recorded_bars))
+        self.config = config
+        self.news_api_key = None
+
+    def _recorded_bars(self, ticker, interval="1d", start=None, period=None):
+        # Bar store backend: the recorded bars released by the simulated time
+        df = self.scenario.bars.get((ticker, interval))
+        if df is None:
+            return pd.DataFrame()
+        now = self.clock.now()
+        df = df.loc[:now if df.index.tz is not None else now.tz_localize(None)]
+        return df.loc[start:] if start is not None else df
+
+    def fetch_real_news(self, topic="energy trading", days_ago=0, page_size=5):
+        now = self.clock.now()
+        released = [article for article in self.scenario.articles() if _utc(article['publishedAt']) <= now]
+        return released[-page_size:]
+
+    def iter_news(self, topic="energy trading", start=None, end=None):
+        return iter(self.scenario.articles())
+
+    def fetch_bars(self, ticker, period="2y", interval="1d", refresh=True):
+        df = self.scenario.bars.get((ticker, interval))
+        if df is None:
+            return pd.DataFrame()
+        # Same lookback as the live loader, but relative to the simulated time
+        now = self.clock.now()
+        lookback = pd.Timestamp.now(tz="UTC").normalize() - period_start(period, tz="UTC")
+        tz = df.index.tz
+        start, end = (now - lookback, now) if tz is not None else ((now - lookback).tz_localize(None), now.tz_localize(None))
+        return df.loc[start:end]
+
+
+class ReplayLLM(FakeSignalLLM):
+    """
+    Local model answering with the recorded signals, at latencies drawn from the recorded ones.
+    Texts that were never recorded fall back to the keyword rules of `src.fakes`.
+
+    Args:
+        scenario (Scenario): Recorded answers and latencies.
+        latency_scale (float): Multiplies the recorded latencies (0 for an instant model).
+        latency (float): Used when the scenario has no recorded latency.
+    """
+    def __init__(self, scenario: Scenario, latency_scale=1.0, latency=0.0, seed=0, **faults):
+        super().__init__(responder=self._respond, latency=latency, model_name="replay", seed=seed, **faults)
+        self.scenario = scenario
+        self.latency_scale = latency_scale
+        self.misses = 0
+
+    def _respond(self, text):
+        signal = self.scenario.signal_for(text)
+        if signal is None:
+            self.misses += 1
+            return keyword_signal(text)
+        return signal
+
+    def _draw(self):
+        latency, fault = super()._draw()
+        if self.scenario.latencies:
+            latency = self._random.choice(self.scenario.latencies) * self.latency_scale
+        return latency, fault
+
+
+# ------------------------------------------------------------------------------
+# Replay driver
+# ------------------------------------------------------------------------------
+
+class ScenarioReplay:
+    """
+    Pushes recorded news and bars through the worker's classify and risk stages on a simulated
+    clock, and reports throughput, end-to-end latency percentiles and memory.
+
+    Articles are released at their publication time (scaled by `speedup`), price polls every
+    `price_interval` simulated seconds. The stages, queues (with their backpressure), dedup,
+    triage, agent, feed and signal stores are the production ones; only the data sources, the
+    LLM and the alert sinks are local, and the stores live in a temporary directory.
+
+    Args:
+        scenario (Scenario): Recorded session.
+        speedup (float): Simulated seconds per wall-clock second (None = as fast as possible).
+        latency_scale (float): Multiplies the recorded LLM latencies.
+        price_interval (float): Simulated seconds between price polls (defaults to the worker's).
+        trace_memory (bool): Also measure Python heap peaks with tracemalloc (slower).
+    """
+    def __init__(self, scenario: Scenario, speedup=None, latency_scale=1.0, price_interval=None,
+                 trace_memory=False, llm=None):
+        self.scenario = scenario
+        self.speedup = speedup
+        self.latency_scale = latency_scale
+        self.trace_memory = trace_memory
+        self.llm = llm or ReplayLLM(scenario, latency_scale=latency_scale)
+        self.config = load_config()
+        self.price_interval = price_interval or self.config.get('worker', {}).get('price_interval_seconds', 900)
+        self.latencies = []
+        self.published = 0
+
+    def _timeline(self, start, end):
+        """
+        (time, kind, payload) events in simulated-time order.
+        """
+        events = [(_utc(article['publishedAt']), 0, i, article) for i, article in enumerate(self.scenario.articles())]
+        poll, step = start, pd.Timedelta(seconds=self.price_interval)
+        while poll <= end:
+            events.append((poll, 1, len(events), None))
+            poll += step
+        heapq.heapify(events)
+        while events:
+            yield heapq.heappop(events)
+
+    def _on_published(self, article, signal, action):
+        self.published += 1
+        self.latencies.append(time.time() - article['received_at'])
+
+    async def _drive(self, worker, clock, articles, start, end):
+        tickers = list(worker.sentiment.tickers)
+        interval = self.config.get('sentiment', {}).get('interval', "1d")
+        fed = 0
+        for at, kind, _, article in self._timeline(start, end):
+            await clock.wait_until(at)
+            if kind == 0:
+                article = dict(article)
+                article['received_at'] = time.time()
+                # Blocks while downstream stages are busy (backpressure)
+                await articles.put(article)
+                fed += 1
+            else:
+                frames = {ticker: worker.loader.fetch_bars(ticker, period="2y", interval=interval) for ticker in tickers}
+                worker.sentiment.on_frames(frames, now=clock.now())
+        await articles.put(STOP)
+        return fed
+
+    async def _run(self, workdir):
+        start, end = self.scenario.span()
+        if start is None:
+            raise ValueError("The scenario has no recorded news")
+        clock = ReplayClock(start, self.speedup)
+
+        agent = EnergyTradingAgent(llm=self.llm, cache=False)
+        section = self.config.get('alerts', {})
+        # Alerts go through throttling and the dispatcher's event loop, but no sink
+        agent.dispatcher = AlertDispatcher(
+            [], throttle=AlertThrottle(section.get('throttle_window_seconds', 900), section.get('max_per_window', 3))
+        )
+        worker = SignalWorker(
+            loader=ReplayLoader(self.scenario, clock, workdir),
+            agent=agent,
+            feed=FeedStore(os.path.join(workdir, "feed.sqlite")),
+            signal_store=SignalStore(os.path.join(workdir, "signals")),
+            on_published=self._on_published
+        )
+
+        articles = asyncio.Queue(maxsize=worker.queue_size)
+        signals = asyncio.Queue(maxsize=worker.queue_size)
+        wall_start = time.perf_counter()
+        fed, _, _ = await asyncio.gather(
+            self._drive(worker, clock, articles, start, end),
+            worker.classify_stage(articles, signals),
+            worker.risk_stage(signals)
+        )
+        agent.dispatcher.flush(timeout=30)
+        wall = time.perf_counter() - wall_start
+
+        return {
+            "articles": fed,
+            "signals": self.published,
+            "wall_seconds": wall,
+            "simulated_seconds": (end - start).total_seconds(),
+            "throughput_articles_per_s": fed / wall if wall else None,
+            "throughput_signals_per_s": self.published / wall if wall else None,
+            "llm_calls": self.llm.calls,
+            "llm_misses": getattr(self.llm, 'misses', None),
+            "alerts": agent.dispatcher.stats(),
+            "dedup": worker.dedup.stats() if worker.dedup is not None else None,
+            "triage": worker.triage.stats() if worker.triage is not None else None,
+            "sentiment": worker.sentiment.snapshot()
+        }
+
+    def run(self) -> dict:
+        """
+        Replays the scenario once.
+
+        Returns:
+            dict: Throughput, latency percentiles (news arrival -> feed publication, seconds),
+                  peak memory and pipeline statistics.
+        """
+        self.latencies, self.published = [], 0
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            with tempfile.TemporaryDirectory(prefix="replay-") as workdir:
+                report = asyncio.run(self._run(workdir))
+            if self.trace_memory:
+                report['traced_peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+
+        latencies = np.array(self.latencies)
+        report['speedup'] = self.speedup
+        report['latency'] = {
+            f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 99)
+        } if len(latencies) else {}
+        if len(latencies):
+            report['latency']['max'] = float(latencies.max())
+        report['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return report
+
+
+def record_session(output, topic=None, start=None, end=None, tickers=None, periods=(("2y", "1d"),)):
+    """
+    Records a live session: a news backfill between `start` and `end`, the LLM answers for
+    every article, and the bars of every ticker.
+
+    Args:
+        output (str): Fixture path (.jsonl.gz).
+        topic (str): NewsAPI query (defaults to `agent.search_topic_default`).
+        start, end (datetime): Backfill window (None for the latest news).
+        periods (tuple): (period, interval) pairs of bars to record.
+    """
+    loader = MarketDataLoader()
+    config = loader.config
+    topic = topic or config['agent'].get('search_topic_default', "Natural Gas OR LNG")
+    scenario = Scenario({"topic": topic, "recorded_at": datetime.now(timezone.utc).isoformat()})
+    recorder = RecordingLoader(loader, scenario)
+
+    # 1. News
+    articles = list(recorder.iter_news(topic, start=start, end=end))
+    print(f"📰 Recorded {len(articles)} articles")
+
+    # 2. LLM answers, one call per article
+    agent = record_agent(EnergyTradingAgent(cache=False), scenario)
+    agent.analyze_many([article['text'] for article in articles])
+    print(f"🧠 Recorded {len(scenario.signals)} signals")
+
+    # 3. Bars
+    for ticker in tickers or loader.get_tickers():
+        for period, interval in periods:
+            recorder.fetch_bars(ticker, period=period, interval=interval)
+    print(f"📈 Recorded {len(scenario.bars)} bar series")
+
+    scenario.save(output)
+    print(f"✅ Scenario written to {output}")
+    return scenario
+
+
+def print_report(report: dict):
+    latency = report.get('latency', {})
+    speed = f"{report['speedup']:g}x" if report['speedup'] else "max"
+    print(f"⏱️ Replay ({speed}): {report['articles']} articles, {report['signals']} signals in {report['wall_seconds']:.2f}s "
+          f"({report['simulated_seconds'] / 3600:.1f}h simulated)")
+    print(f"   Throughput: {report['throughput_articles_per_s']:.1f} articles/s, {report['throughput_signals_per_s']:.1f} signals/s")
+    if latency:
+        print("   Latency: " + ", ".join(f"{name} {value * 1000:.0f} ms" for name, value in latency.items()))
+    print(f"   LLM calls: {report['llm_calls']} (unrecorded texts: {report['llm_misses']}), alerts: {report['alerts']}")
+    print(f"   Peak RSS: {report['peak_rss_bytes'] / 2**20:.0f} MiB" + (
+        f", traced heap peak: {report['traced_peak_bytes'] / 2**20:.1f} MiB" if 'traced_peak_bytes' in report else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record live sessions to fixtures, and replay them offline under load.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Record news, LLM answers and bars to a fixture.")
+    record.add_argument("output", help="Fixture path (e.g. data/scenarios/explosion.jsonl.gz).")
+    record.add_argument("--topic", help="NewsAPI query (defaults to agent.search_topic_default).")
+    record.add_argument("--start", type=datetime.fromisoformat, help="First day of the news backfill (YYYY-MM-DD).")
+    record.add_argument("--end", type=datetime.fromisoformat, help="Last day of the news backfill.")
+
+    replay = commands.add_parser("run", help="Replay a fixture through the pipeline and report.")
+    replay.add_argument("fixture", help="Fixture recorded with `record`.")
+    replay.add_argument("--speedup", default="max", help="Simulated seconds per second (e.g. 1, 60, 3600) or 'max'.")
+    replay.add_argument("--amplify", type=int, default=1, help="Publish every article N times as distinct stories (news storm).")
+    replay.add_argument("--syndicated", action="store_true", help="Amplify with verbatim copies instead (stresses dedup, not the LLM).")
+    replay.add_argument("--latency-scale", type=float, default=1.0, help="Multiplies the recorded LLM latencies.")
+    replay.add_argument("--trace-memory", action="store_true", help="Also report the traced Python heap peak.")
+    replay.add_argument("--output", help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record_session(args.output, topic=args.topic, start=args.start, end=args.end)
+    else:
+        scenario = Scenario.load(args.fixture)
+        if args.amplify > 1:
+            scenario = scenario.amplify(args.amplify, syndicated=args.syndicated)
+        speedup = None if args.speedup == "max" else float(args.speedup)
+        report = ScenarioReplay(scenario, speedup=speedup, latency_scale=args.latency_scale, trace_memory=args.trace_memory).run()
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2, default=str)
+            print(f"✅ Report written to {args.output}")
@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+# Timeframes derived from the intraday source (yfinance interval names)
+INTRADAY_WIDTHS = {"1h": pd.Timedelta(hours=1), "2h": pd.Timedelta(hours=2), "4h": pd.Timedelta(hours=4)}
+SESSION_TIMEFRAMES = ("1d", "1wk")
+
+# A bucket never starts more than this before the bars it contains
+MAX_BUCKET = pd.Timedelta(days=8)
+
+DAY_NS = 86_400 * 10**9
+
+
+def bucket_codes(index: pd.DatetimeIndex, timeframe: str, tz="America/New_York", session_offset="6h") -> np.ndarray:
+    """
+    Int64 bucket start of every bar, computed in one vectorized pass.
+
+    Intraday buckets are aligned on the UTC clock. Daily and weekly buckets follow the exchange
+    session: a bar belongs to the trade date of `local time + session_offset` (CME energy
+    sessions open at 18:00 New York time for the next trade date), and weeks start on Monday.
+
+    Args:
+        index (pd.DatetimeIndex): Bar timestamps (naive timestamps are read as UTC).
+        timeframe (str): '1h', '4h', '1d', '1wk', ...
+    """
+    utc = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+
+    if timeframe in INTRADAY_WIDTHS:
+        width = INTRADAY_WIDTHS[timeframe].value
+        return utc.as_unit("ns").asi8 // width * width
+
+    if timeframe not in SESSION_TIMEFRAMES:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+    local = utc.tz_convert(tz).tz_localize(None).as_unit("ns").asi8 + pd.Timedelta(session_offset).value
+    days = local // DAY_NS
+    if timeframe == "1wk":
+        # 1970-01-01 was a Thursday: step back to the Monday of each week
+        days = days - (days + 3) % 7
+    return days * DAY_NS
+
+
+def bucket_labels(codes: np.ndarray, timeframe: str, tz=None) -> pd.DatetimeIndex:
+    """
+    Index of the aggregated bars: intraday buckets keep the source timezone, daily and weekly
+    buckets are naive trade dates (like yfinance daily bars).
+    """
+    if timeframe in INTRADAY_WIDTHS:
+        labels = pd.DatetimeIndex(codes, tz="UTC")
+        return labels.tz_convert(tz) if tz is not None else labels.tz_localize(None)
+    return pd.DatetimeIndex(codes)
+
+
+def resample_bars(df: pd.DataFrame, timeframe: str, tz="America/New_York", session_offset="6h") -> pd.DataFrame:
+    """
+    Aggregates sorted OHLCV bars into `timeframe` buckets (first Open, max High, min Low,
+    last Close, summed Volume) with one `reduceat` per column instead of a pandas groupby.
+    """
+    if df.empty:
+        return df.copy()
+
+    codes = bucket_codes(df.index, timeframe, tz, session_offset)
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    ends = np.concatenate((starts[1:], [len(codes)])) - 1
+
+    columns = {
+        "Open": df['Open'].to_numpy(dtype=float)[starts],
+        "High": np.fmax.reduceat(df['High'].to_numpy(dtype=float), starts),
+        "Low": np.fmin.reduceat(df['Low'].to_numpy(dtype=float), starts),
+        "Close": df['Close'].to_numpy(dtype=float)[ends],
+    }
+    if 'Volume' in df.columns:
+        columns['Volume'] = np.add.reduceat(np.nan_to_num(df['Volume'].to_numpy(dtype=float)), starts)
+
+    index = bucket_labels(codes[starts], timeframe, df.index.tz)
+    index.name = df.index.name
+    return pd.DataFrame(columns, index=index)
+
+
+class BarResampler:
+    """
+    Derives every configured timeframe from a single intraday feed.
+
+    `merge` is incremental: when new source bars arrive, only the buckets they touch (in
+    practice the latest, still partial one) are recomputed; closed buckets are kept as stored.
+
+    Args:
+        source (str): Interval actually downloaded (e.g. '1h').
+        timeframes (tuple): Intervals served from it (e.g. ('1h', '4h', '1d', '1wk')).
+        source_period (str): History requested for the source (yfinance keeps ~730 days of 1h bars).
+        tz (str): Exchange timezone for session dates.
+        session_offset (str): Shift from local time to trade date (see `bucket_codes`).
+    """
+    def __init__(self, source="1h", timeframes=("1h", "4h", "1d", "1wk"), source_period="729d",
+                 tz="America/New_York", session_offset="6h"):
+        self.source = source
+        self.timeframes = tuple(timeframes)
+        self.source_period = source_period
+        self.tz = tz
+        self.session_offset = session_offset
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('resample', {})
+        return cls(
+            source=section.get('source', "1h"),
+            timeframes=section.get('timeframes', ("1h", "4h", "1d", "1wk")),
+            source_period=section.get('source_period', "729d"),
+            tz=section.get('timezone', "America/New_York"),
+            session_offset=section.get('session_offset', "6h")
+        )
+
+    def derives(self, timeframe) -> bool:
+        return timeframe in self.timeframes and timeframe != self.source
+
+    def resample(self, source_bars: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        return resample_bars(source_bars, timeframe, self.tz, self.session_offset)
+
+    def first_bucket(self, timestamp, timeframe, tz=None) -> pd.Timestamp:
+        """
+        Label of the bucket containing `timestamp`.
+        """
+        codes = bucket_codes(pd.DatetimeIndex([timestamp]), timeframe, self.tz, self.session_offset)
+        return bucket_labels(codes, timeframe, tz)[0]
+
+    def merge(self, stored: pd.DataFrame, source_bars: pd.DataFrame, changed_from, timeframe) -> pd.DataFrame:
+        """
+        Updates a stored aggregate after the source changed from `changed_from` onwards.
+
+        Args:
+            stored (pd.DataFrame): Current bars of `timeframe` (may be empty).
+            source_bars (pd.DataFrame): Full, sorted source bars after the update.
+            changed_from: First source timestamp added or revised.
+        """
+        first = self.first_bucket(changed_from, timeframe, source_bars.index.tz)
+
+        # 1. Re-aggregate only the source bars of the buckets touched by the update
+        tail = source_bars.loc[pd.Timestamp(changed_from) - MAX_BUCKET:]
+        fresh = self.resample(tail, timeframe)
+        fresh = fresh[fresh.index >= first]
+
+        # 2. Closed buckets are kept as they are
+        if stored.empty:
+            return fresh
+        return pd.concat([stored[stored.index < first], fresh])
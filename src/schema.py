@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Union
+from typing import List, Optional, Union
 from enum import Enum
 
 class EventCategory(str, Enum):
@@ -49,6 +49,12 @@ class MarketSignal(BaseModel):
     summary: str = Field(description="A concise technical summary.")
     trading_recommendation: str = Field(description="Actionable advice (e.g., 'Monitor spreads').")
 
+    # Optional: lets the execution layer escalate unsure answers to a larger model
+    confidence: Optional[float] = Field(
+        default=None, ge=0.0, le=1.0,
+        description="How certain the classification is, from 0.0 (guess) to 1.0 (unambiguous)."
+    )
+
     @field_validator('affected_assets', mode='before')
     @classmethod
     def parse_assets(cls, v):
@@ -58,4 +64,17 @@ class MarketSignal(BaseModel):
         """
         if isinstance(v, str):
             return [v]
-        return v
\ No newline at end of file
+        return v
+
+class IndexedMarketSignal(MarketSignal):
+    """
+    A MarketSignal tagged with the position of its article inside a packed request.
+    """
+    index: int = Field(description="Index of the article this signal refers to, exactly as given in brackets (e.g. 0 for [0]).")
+
+
+class MarketSignalBatch(BaseModel):
+    """
+    Wrapper schema used to classify several articles in a single LLM call.
+    """
+    signals: List[IndexedMarketSignal] = Field(description="Exactly one signal per input article, each with its index.")
@@ -0,0 +1,340 @@
+import heapq
+import math
+import numpy as np
+import pandas as pd
+from src.analytics import build_panel, volatility_arrays
+from src.backtest import SENTIMENT_DIRECTION, bar_close_times, map_asset
+from src.signal_store import normalize_sentiment
+
+# Price series correlated with the sentiment index, in the order of the correlation arrays
+TARGETS = ("returns", "vol_pct")
+
+
+def _seconds(value) -> float:
+    timestamp = pd.Timestamp(value)
+    timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp
+    return timestamp.value / 1e9
+
+
+class SentimentIndex:
+    """
+    Time-decayed sentiment per ticker: every signal adds +1 (Bullish) or -1 (Bearish),
+    and contributions fade exponentially with the configured half-life.
+
+    Each ticker only stores its value at a reference time (its latest signal), so adding a
+    signal or reading the index is O(1) per ticker, whatever the length of the history.
+
+    Args:
+        tickers (list): Tickers of the index (one column each).
+        half_life (str | pd.Timedelta): Time for a signal's weight to halve (e.g. "3D").
+    """
+    def __init__(self, tickers, half_life="3D"):
+        self.tickers = list(tickers)
+        self._ids = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.rate = math.log(2) / pd.Timedelta(half_life).total_seconds()
+        self._values = np.zeros(len(self.tickers))
+        self._times = np.full(len(self.tickers), -np.inf)
+
+    def add(self, ticker, direction: float, at):
+        """
+        Adds one contribution. Signals older than the ticker's latest one are folded in with
+        the weight they would have today, so arrival order does not change the result.
+        """
+        i = self._ids.get(ticker)
+        if i is None or not direction:
+            return
+        t = _seconds(at)
+        reference = max(self._times[i], t)
+        self._values[i] = self._values[i] * math.exp(-self.rate * (reference - self._times[i])) if self._values[i] else 0.0
+        self._values[i] += direction * math.exp(-self.rate * (reference - t))
+        self._times[i] = reference
+
+    def value(self, at=None) -> np.ndarray:
+        """
+        Index of every ticker at time `at` (defaults to now). Times before a ticker's latest
+        signal read its value at that signal.
+        """
+        t = _seconds(at if at is not None else pd.Timestamp.now(tz="UTC"))
+        elapsed = np.clip(t - self._times, 0, None)
+        with np.errstate(invalid="ignore"):
+            return np.where(self._values != 0, self._values * np.exp(-self.rate * elapsed), 0.0)
+
+
+class LeadLagCorrelation:
+    """
+    Rolling Pearson correlation between one driver series and several target series, for
+    every lag in [-max_lag, max_lag] and every column, updated in O(lags × columns) per bar.
+
+    A positive lag k pairs the driver at bar t-k with the targets at bar t (the driver leads);
+    a negative lag pairs the driver at bar t with the targets at bar t-|k| (the targets lead).
+    Running sums over a ring buffer are updated with the entering and leaving pairs of each
+    lag at once; they are re-summed from the buffer every `window` bars to clear drift.
+
+    Args:
+        n_columns (int): Number of series (e.g. tickers).
+        window (int): Pairs per correlation, in bars.
+        max_lag (int): Largest lead/lag, in bars.
+        n_targets (int): Number of target series per column.
+        min_periods (int): Pairs required before a correlation is reported.
+    """
+    def __init__(self, n_columns, window=60, max_lag=5, n_targets=1, min_periods=10):
+        self.window = window
+        self.max_lag = max_lag
+        self.min_periods = min_periods
+        self.lags = np.arange(-max_lag, max_lag + 1)
+        # Bars back of the driver / target of each lag's pair
+        self._x_back = np.maximum(self.lags, 0)
+        self._y_back = np.maximum(-self.lags, 0)
+
+        self._size = window + max_lag + 1
+        self._x = np.full((self._size, n_columns), np.nan)
+        self._y = np.full((n_targets, self._size, n_columns), np.nan)
+        self._t = -1
+
+        shape = (n_targets, len(self.lags), n_columns)
+        self._n = np.zeros(shape)
+        self._sx = np.zeros(shape)
+        self._sy = np.zeros(shape)
+        self._sxx = np.zeros(shape)
+        self._syy = np.zeros(shape)
+        self._sxy = np.zeros(shape)
+
+    def _pairs(self, t):
+        """
+        Driver (lags, columns) and targets (targets, lags, columns) of the pairs ending at bar t,
+        with NaN where either side is missing (or not observed yet).
+        """
+        x = self._x[(t - self._x_back) % self._size]
+        y = self._y[:, (t - self._y_back) % self._size]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        return np.where(valid, x, 0.0), np.where(valid, y, 0.0), valid
+
+    def _accumulate(self, x, y, valid, sign):
+        self._n += sign * valid
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._syy += sign * y * y
+        self._sxy += sign * x * y
+
+    def update(self, x, *targets):
+        """
+        Ingests one bar: the driver value and one value per target, each of shape (columns,).
+        """
+        self._t += 1
+        t = self._t
+        slot = t % self._size
+        self._x[slot] = x
+        self._y[:, slot] = targets
+
+        # 1. Pairs entering the window (slots never written are NaN, hence skipped)
+        self._accumulate(*self._pairs(t), 1.0)
+        # 2. Pairs leaving it (still in the buffer: it holds window + max_lag bars)
+        if t >= self.window:
+            self._accumulate(*self._pairs(t - self.window), -1.0)
+        # 3. Periodic exact re-sum
+        if t % self.window == self.window - 1:
+            self._resum()
+
+    def _resum(self):
+        for name in ("_n", "_sx", "_sy", "_sxx", "_syy", "_sxy"):
+            getattr(self, name)[:] = 0.0
+        for t in range(max(self._t - self.window + 1, 0), self._t + 1):
+            self._accumulate(*self._pairs(t), 1.0)
+
+    def correlation(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Shape (targets, lags, columns); NaN until `min_periods` pairs are
+                        available or when a series is constant over the window.
+        """
+        n = self._n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = n * self._sxy - self._sx * self._sy
+            var = (n * self._sxx - self._sx ** 2) * (n * self._syy - self._sy ** 2)
+            corr = cov / np.sqrt(var)
+        return np.where((n >= self.min_periods) & (var > 0), np.clip(corr, -1.0, 1.0), np.nan)
+
+
+class SentimentMonitor:
+    """
+    Keeps the sentiment index of the energy universe and its rolling, lead/lag correlation
+    with bar returns and Vol_Pct (as in `calculate_volatility`), incrementally.
+
+    Signals can arrive before the bars they precede: they wait in a heap and are applied
+    just before the first bar that closes after them, so every bar samples the index
+    exactly as it stood at its close.
+
+    Args:
+        tickers (list): Universe (columns of every output).
+        asset_tickers (dict): Asset keyword -> ticker (see `market.asset_tickers`).
+        half_life (str): Sentiment half-life.
+        window (int): Correlation window, in bars.
+        max_lag (int): Largest lead/lag, in bars.
+        interval (str): Bar size (used to compute bar close times).
+        timezone (str): Exchange timezone of daily and weekly bars.
+        session_close (str): Local close time of a daily bar (see `backtest.bar_close_times`).
+    """
+    def __init__(self, tickers, asset_tickers, half_life="3D", window=60, max_lag=5, interval="1d",
+                 timezone="America/New_York", session_close="17h"):
+        self.tickers = list(tickers)
+        self.asset_tickers = asset_tickers
+        self.index = SentimentIndex(self.tickers, half_life)
+        self.correlations = LeadLagCorrelation(len(self.tickers), window, max_lag, n_targets=len(TARGETS))
+        self.interval = interval
+        self.timezone = timezone
+        self.session_close = session_close
+
+        self.last_bar = None
+        self._watermark = -np.inf
+        self._prev_close = np.full(len(self.tickers), np.nan)
+        self._pending = []
+        self._sequence = 0
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('sentiment', {})
+        market = config['market']
+        tickers = list(dict.fromkeys([market['primary_ticker'], market['secondary_ticker'], *market.get('tickers', [])]))
+        return cls(
+            tickers, market.get('asset_tickers', {}),
+            half_life=section.get('half_life', "3D"),
+            window=section.get('window_bars', 60),
+            max_lag=section.get('max_lag_bars', 5),
+            interval=section.get('interval', "1d"),
+            timezone=config.get('resample', {}).get('timezone', "America/New_York")
+        )
+
+    def on_signal(self, signal, published_at):
+        """
+        Routes one MarketSignal to the tickers of its assets (its sentiment normalized as in
+        the SignalStore, so live and restored indexes agree).
+        """
+        direction = SENTIMENT_DIRECTION.get(normalize_sentiment(signal.sentiment), 0)
+        tickers = {map_asset(asset, self.asset_tickers) for asset in signal.affected_assets} - {None}
+        for ticker in tickers:
+            self.add(ticker, direction, published_at)
+
+    def add(self, ticker, direction, at):
+        t = _seconds(at)
+        if t <= self._watermark:
+            # Late signal: later samples include it, past ones are left as they were
+            self.index.add(ticker, direction, at)
+        else:
+            heapq.heappush(self._pending, (t, self._sequence, ticker, direction))
+            self._sequence += 1
+
+    def on_signals_frame(self, signals: pd.DataFrame):
+        """
+        Queues a `signals_frame` / `store_signals_frame` output (e.g. the recorded history at startup).
+        """
+        directions = signals['sentiment'].map(normalize_sentiment).map(SENTIMENT_DIRECTION).fillna(0).to_numpy()
+        times = pd.DatetimeIndex(signals['published_at']).as_unit("ns").asi8 / 1e9
+        for t, ticker, direction in zip(times, signals['ticker'], directions):
+            if direction:
+                self._pending.append((t, self._sequence, ticker, direction))
+                self._sequence += 1
+        heapq.heapify(self._pending)
+
+    def on_bar(self, at, high, low, close, close_time=None):
+        """
+        Ingests one aligned bar for every ticker (arrays of shape (tickers,), NaN if missing).
+        `close_time` defaults to the exchange close of the bar starting at `at` (see
+        `backtest.bar_close_times`).
+        """
+        if close_time is None:
+            close_time = self._close_times(pd.DatetimeIndex([pd.Timestamp(at)]))[0]
+        t = _seconds(close_time)
+
+        # 1. Signals published before the bar's close
+        while self._pending and self._pending[0][0] <= t:
+            signal_time, _, ticker, direction = heapq.heappop(self._pending)
+            self.index.add(ticker, direction, pd.Timestamp(signal_time, unit="s", tz="UTC"))
+        self._watermark = max(self._watermark, t)
+
+        # 2. Bar return and normalized True Range, against the previous close of each ticker
+        _, vol_pct = volatility_arrays(
+            np.vstack([np.full(len(close), np.nan), high]),
+            np.vstack([np.full(len(close), np.nan), low]),
+            np.vstack([self._prev_close, close])
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = close / self._prev_close - 1
+        self._prev_close = np.where(np.isnan(close), self._prev_close, close)
+
+        # 3. One correlation update for every ticker, lag and target
+        self.correlations.update(self.index.value(close_time), returns, vol_pct[1])
+        self.last_bar = pd.Timestamp(at)
+
+    def on_frames(self, frames: dict, now=None):
+        """
+        Feeds the closed bars of `frames` (ticker -> OHLC DataFrame) newer than the last one seen.
+        """
+        frames = {ticker: df for ticker, df in frames.items() if ticker in self.tickers and df is not None and not df.empty}
+        if not frames:
+            return 0
+        index, tickers, panel = build_panel(frames)
+        columns = [self.tickers.index(ticker) for ticker in tickers]
+
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        index_utc = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+        close_times = self._close_times(index)
+        closed = (close_times <= now)
+        if self.last_bar is not None:
+            closed &= index_utc > self.last_bar
+
+        bars = np.full((len(self.tickers), 3), np.nan)
+        for i in np.flatnonzero(closed):
+            bars[:] = np.nan
+            bars[columns] = panel[i, :, 1:]
+            self.on_bar(index_utc[i], bars[:, 0], bars[:, 1], bars[:, 2], close_times[i])
+        return int(closed.sum())
+
+    def _close_times(self, index) -> pd.DatetimeIndex:
+        # Same bar close as the event study: news after the settlement belongs to the next bar
+        return bar_close_times(index, self.interval, self.timezone, self.session_close)
+
+    def current(self, at=None) -> np.ndarray:
+        """
+        Index now, including signals still waiting for their bar.
+        """
+        at = at if at is not None else pd.Timestamp.now(tz="UTC")
+        values = self.index.value(at)
+        t = _seconds(at)
+        for signal_time, _, ticker, direction in self._pending:
+            if signal_time <= t:
+                values[self.tickers.index(ticker)] += direction * math.exp(-self.index.rate * (t - signal_time))
+        return values
+
+    def lead_lag(self, target="returns") -> pd.DataFrame:
+        """
+        Correlation of the index with `target` ('returns' or 'vol_pct'): lags × tickers.
+        Positive lags measure how well the index anticipates the target.
+        """
+        corr = self.correlations.correlation()[TARGETS.index(target)]
+        return pd.DataFrame(corr, index=pd.Index(self.correlations.lags, name="lag"), columns=self.tickers)
+
+    def snapshot(self) -> dict:
+        """
+        JSON-friendly state for the feed store (NaN -> None).
+        """
+        def clean(values):
+            return [None if np.isnan(v) else round(float(v), 4) for v in values]
+
+        corr = self.correlations.correlation()
+        return {
+            "tickers": self.tickers,
+            "lags": self.correlations.lags.tolist(),
+            "last_bar": self.last_bar.isoformat() if self.last_bar is not None else None,
+            "index": clean(self.current()),
+            "correlation": {target: [clean(row) for row in corr[i]] for i, target in enumerate(TARGETS)}
+        }
+
+
+def replay(monitor: SentimentMonitor, frames: dict, signals: pd.DataFrame, now=None) -> SentimentMonitor:
+    """
+    Runs a monitor over recorded history (e.g. `store_signals_frame` and stored bars).
+    """
+    monitor.on_signals_frame(signals)
+    monitor.on_frames(frames, now)
+    return monitor
@@ -0,0 +1,459 @@
+import glob
+import json
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from src.schema import MarketSignal, EventCategory
+
+# Fixed category codes: position in the enum (int8 column)
+CATEGORIES = list(EventCategory)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+# Sentiment codes (int8 column): the LLM's free-form answer is reduced to one of these
+SENTIMENTS = ["Bullish", "Bearish", "Neutral", "Other"]
+SENTIMENT_PATTERN = re.compile(r"\b(bullish|bearish|neutral)\b", re.IGNORECASE)
+
+# Largest dictionary code each column can hold
+MAX_ASSET_CODE = np.iinfo(np.int16).max
+
+# Text columns stay on disk; they are only read for the rows a caller asks for
+TEXT_COLUMNS = ["headline", "summary", "trading_recommendation", "cluster"]
+
+
+def normalize_sentiment(sentiment: str) -> str:
+    """
+    Reduces a free-form LLM sentiment ("Bearish (i)", "bullish for gas") to a SENTIMENTS name
+    (the first one mentioned, 'Other' if none is).
+    """
+    match = SENTIMENT_PATTERN.search(sentiment or "")
+    return match.group(1).capitalize() if match else "Other"
+
+
+class SignalStore:
+    """
+    Persistent, append-only columnar store of classified signals.
+
+    In memory, a signal is only a few bytes: an int64 UTC timestamp (ns), an int8 category
+    code, an int8 sentiment code and its assets as (row, interned asset id) pairs. Text
+    fields live on disk in Parquet segments and are read back only for the rows requested.
+
+    Indexes (built lazily, rebuilt after new rows arrive):
+        - time: row order sorted by timestamp,
+        - category and asset: posting lists of rows, each sorted by timestamp,
+    so a filtered range query is two binary searches on the most selective posting list
+    followed by vectorized filters on the other columns.
+
+    A single process (the worker) appends; readers such as the dashboard or a backtest
+    call `refresh()` to pick up the segments written since they opened the store.
+
+    Args:
+        path (str): Directory holding the segments and the dictionaries.
+        segment_rows (int): Buffered rows written per Parquet segment.
+    """
+    def __init__(self, path="data/signals", segment_rows=50_000):
+        self.path = path
+        self.segment_rows = segment_rows
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+
+        # Dictionaries (append-only, shared with the files on disk)
+        self.sentiments = []
+        self.assets = []
+        self._sentiment_ids = {}
+        self._asset_ids = {}
+
+        # Columns of every row in memory
+        self._ts = np.empty(0, dtype=np.int64)
+        self._category = np.empty(0, dtype=np.int8)
+        self._sentiment = np.empty(0, dtype=np.int8)
+        self._pair_row = np.empty(0, dtype=np.int32)
+        self._pair_asset = np.empty(0, dtype=np.int16)
+
+        # Segments already loaded: (file, first row, number of rows)
+        self._segments = []
+        # Rows appended since the last flush
+        self._buffer = []
+        # Buffered rows already merged into the columns
+        self._merged = 0
+        self._indexes = {}
+
+        self._load_dictionaries()
+        self.refresh()
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('signal_store', {})
+        return cls(path=section.get('path', "data/signals"), segment_rows=section.get('segment_rows', 50_000))
+
+    def __len__(self):
+        return len(self._ts) + len(self._buffer) - self._merged
+
+    # ------------------------------------------------------------------
+    # Dictionaries
+    # ------------------------------------------------------------------
+
+    def _dictionaries_path(self):
+        return os.path.join(self.path, "dictionaries.json")
+
+    def _load_dictionaries(self):
+        path = self._dictionaries_path()
+        if not os.path.exists(path):
+            return
+        with open(path, "r") as f:
+            data = json.load(f)
+        # Append-only: only names unknown to this process are added
+        for name in data['sentiments'][len(self.sentiments):]:
+            self._sentiment_ids[name] = len(self.sentiments)
+            self.sentiments.append(name)
+        for name in data['assets'][len(self.assets):]:
+            self._asset_ids[name] = len(self.assets)
+            self.assets.append(name)
+
+    def _save_dictionaries(self):
+        tmp_path = self._dictionaries_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sentiments": self.sentiments, "assets": self.assets}, f)
+        os.replace(tmp_path, self._dictionaries_path())
+
+    def _intern(self, name, ids, values, max_code=MAX_ASSET_CODE):
+        code = ids.get(name)
+        if code is None:
+            if len(values) > max_code:
+                raise ValueError(f"Signal store dictionary is full ({len(values)} names), cannot add {name!r}")
+            code = ids[name] = len(values)
+            values.append(name)
+        return code
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, signal: MarketSignal, published_at, cluster=None):
+        """
+        Appends one signal. It is queryable immediately and persisted at the next flush
+        (automatic every `segment_rows` rows).
+
+        Args:
+            signal (MarketSignal): Classified signal (its sentiment is stored normalized, see
+                                   `normalize_sentiment`).
+            published_at: Article publication time (naive values are taken as UTC).
+            cluster (str): Near-duplicate cluster id, so backtests can count each story once.
+        """
+        timestamp = pd.Timestamp(published_at)
+        timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+
+        with self._lock:
+            # Codes are checked before anything is buffered, so a rejected signal leaves the store writable
+            sentiment = self._intern(normalize_sentiment(signal.sentiment), self._sentiment_ids, self.sentiments)
+            assets = sorted({self._intern(asset.strip(), self._asset_ids, self.assets) for asset in signal.affected_assets})
+            self._buffer.append((
+                timestamp.value, CATEGORY_CODES[signal.category], sentiment, assets,
+                signal.headline, signal.summary, signal.trading_recommendation, cluster
+            ))
+            if len(self._buffer) >= self.segment_rows:
+                self.flush()
+
+    def _sync(self):
+        """
+        Moves the numeric part of buffered rows into the in-memory columns
+        (batched, so appending one signal at a time stays O(1) amortized).
+        """
+        pending = self._buffer[self._merged:]
+        if not pending:
+            return
+        first = len(self._ts)
+        ts, categories, sentiments, assets = zip(*(row[:4] for row in pending))
+        self._ts = np.concatenate([self._ts, np.asarray(ts, dtype=np.int64)])
+        self._category = np.concatenate([self._category, np.asarray(categories, dtype=np.int8)])
+        self._sentiment = np.concatenate([self._sentiment, np.asarray(sentiments, dtype=np.int8)])
+        counts = [len(ids) for ids in assets]
+        self._pair_row = np.concatenate([self._pair_row, np.repeat(np.arange(first, first + len(pending), dtype=np.int32), counts)])
+        self._pair_asset = np.concatenate([self._pair_asset, np.fromiter((a for ids in assets for a in ids), dtype=np.int16, count=sum(counts))])
+        self._merged = len(self._buffer)
+        self._indexes.clear()
+
+    def flush(self):
+        """
+        Writes the buffered rows as a new Parquet segment (atomic rename).
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+            self._sync()
+            first = len(self._ts) - len(self._buffer)
+            _, _, _, assets, headlines, summaries, recommendations, clusters = zip(*self._buffer)
+            rows = slice(first, len(self._ts))
+
+            table = pa.table({
+                "ts": pa.array(self._ts[rows], pa.int64()),
+                "category": pa.array(self._category[rows], pa.int8()),
+                "sentiment": pa.array(self._sentiment[rows], pa.int8()),
+                "assets": pa.array(assets, pa.list_(pa.int16())),
+                "headline": pa.array(headlines, pa.string()),
+                "summary": pa.array(summaries, pa.string()),
+                "trading_recommendation": pa.array(recommendations, pa.string()),
+                "cluster": pa.array(clusters, pa.string())
+            })
+
+            # Dictionaries first: a segment must never reference an unknown id
+            self._save_dictionaries()
+            name = os.path.join(self.path, f"segment-{first:012d}.parquet")
+            pq.write_table(table, name + ".tmp", compression="zstd")
+            os.replace(name + ".tmp", name)
+
+            self._segments.append((name, first, len(self._buffer)))
+            self._buffer = []
+            self._merged = 0
+
+    def refresh(self):
+        """
+        Loads the segments written since the last call (e.g. by the worker process).
+        """
+        with self._lock:
+            known = {name for name, _, _ in self._segments}
+            new_files = [f for f in sorted(glob.glob(os.path.join(self.path, "segment-*.parquet"))) if f not in known]
+            if not new_files or self._buffer:
+                return 0
+
+            self._load_dictionaries()
+            loaded = 0
+            for name in new_files:
+                table = pq.read_table(name, columns=["ts", "category", "sentiment", "assets"])
+                first = len(self._ts)
+                assets = table.column("assets").combine_chunks()
+
+                self._ts = np.concatenate([self._ts, table.column("ts").to_numpy()])
+                self._category = np.concatenate([self._category, table.column("category").to_numpy()])
+                self._sentiment = np.concatenate([self._sentiment, table.column("sentiment").to_numpy()])
+                parents = pc.list_parent_indices(assets).to_numpy().astype(np.int32) + first
+                self._pair_row = np.concatenate([self._pair_row, parents])
+                self._pair_asset = np.concatenate([self._pair_asset, pc.list_flatten(assets).to_numpy()])
+
+                self._segments.append((name, first, table.num_rows))
+                loaded += table.num_rows
+            self._indexes.clear()
+            return loaded
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    def _index(self, key):
+        """
+        Returns the rows of a posting list ('time', ('category', code) or ('asset', id)),
+        sorted by timestamp, together with their timestamps.
+        """
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        if key == "time":
+            rows = np.argsort(self._ts, kind="stable").astype(np.int32)
+        elif key[0] == "category":
+            order = self._index("time")[0]
+            rows = order[self._category[order] == key[1]]
+        else:
+            rows = self._pair_row[self._pair_asset == key[1]]
+            rows = rows[np.argsort(self._ts[rows], kind="stable")]
+
+        index = self._indexes[key] = (rows, self._ts[rows])
+        return index
+
+    def _asset_codes(self, asset):
+        lowered = asset.strip().lower()
+        return [code for name, code in self._asset_ids.items() if name.lower() == lowered]
+
+    def _sentiment_codes(self, sentiment):
+        # Stores written before sentiments were normalized may hold several spellings
+        wanted = normalize_sentiment(sentiment)
+        return [code for name, code in self._sentiment_ids.items() if normalize_sentiment(name) == wanted]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query(self, start=None, end=None, category=None, sentiment=None, asset=None) -> np.ndarray:
+        """
+        Returns the row ids matching every filter, sorted by time, without building any
+        Python object per signal.
+
+        Args:
+            start, end: Time bounds (inclusive start, exclusive end); anything pd.Timestamp accepts.
+            category (EventCategory | str): Category filter.
+            sentiment (str): 'Bullish', 'Bearish', ... (normalized, see `normalize_sentiment`).
+            asset (str): Asset name, case-insensitive (e.g. 'Natural Gas').
+
+        Example:
+            store.query(start=now - pd.Timedelta("24h"), category=EventCategory.SUPPLY_SHOCK,
+                        sentiment="Bullish", asset="Natural Gas")
+        """
+        with self._lock:
+            self._sync()
+            lo = _as_ns(start, np.iinfo(np.int64).min)
+            hi = _as_ns(end, np.iinfo(np.int64).max)
+
+            # 1. Pick the most selective posting list available, then slice it by time
+            if asset is not None:
+                parts = []
+                for code in self._asset_codes(asset):
+                    rows, ts = self._index(("asset", code))
+                    parts.append(rows[np.searchsorted(ts, lo, "left"):np.searchsorted(ts, hi, "left")])
+                rows = np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+                if len(parts) > 1:
+                    # Spelling variants ("Natural gas", "natural gas") of the same asset
+                    rows = np.unique(rows)
+                    rows = rows[np.argsort(self._ts[rows], kind="stable")]
+            elif category is not None:
+                rows, ts = self._index(("category", CATEGORY_CODES[EventCategory(category)]))
+                rows = rows[np.searchsorted(ts, lo, "left"):np.searchsorted(ts, hi, "left")]
+            else:
+                rows, ts = self._index("time")
+                rows = rows[np.searchsorted(ts, lo, "left"):np.searchsorted(ts, hi, "left")]
+
+            # 2. Remaining filters are vectorized on the categorical columns
+            if category is not None and asset is not None:
+                rows = rows[self._category[rows] == CATEGORY_CODES[EventCategory(category)]]
+            if sentiment is not None:
+                rows = rows[np.isin(self._sentiment[rows], self._sentiment_codes(sentiment))]
+            return rows
+
+    def count(self, **filters) -> int:
+        return len(self.query(**filters))
+
+    def aggregate(self, by="category", **filters) -> dict:
+        """
+        Counts the matching signals per 'category', 'sentiment' or 'asset'. Spellings that
+        `query` treats as one value (asset case, sentiment variants) are counted together,
+        under the first one stored.
+        """
+        rows = self.query(**filters)
+        with self._lock:
+            if by == "category":
+                counts, names = np.bincount(self._category[rows], minlength=len(CATEGORIES)), [c.value for c in CATEGORIES]
+            elif by == "sentiment":
+                groups, names = _groups(self.sentiments, normalize_sentiment)
+                counts = np.bincount(groups[self._sentiment[rows]], minlength=len(names))
+            elif by == "asset":
+                groups, names = _groups(self.assets, str.lower)
+                selected = np.zeros(len(self._ts), dtype=bool)
+                selected[rows] = True
+                mask = selected[self._pair_row]
+                # A signal listing two spellings of one asset still counts once
+                pairs = np.unique(self._pair_row[mask].astype(np.int64) * max(len(names), 1) + groups[self._pair_asset[mask]])
+                counts = np.bincount(pairs % max(len(names), 1), minlength=len(names))
+            else:
+                raise ValueError(f"Unknown aggregation field: {by}")
+        return {name: int(n) for name, n in zip(names, counts) if n}
+
+    # ------------------------------------------------------------------
+    # Materialization (only for the rows a caller actually needs)
+    # ------------------------------------------------------------------
+
+    def frame(self, rows=None, text=False, **filters) -> pd.DataFrame:
+        """
+        Returns the selected rows as a DataFrame with categorical columns.
+
+        Args:
+            rows (np.ndarray): Row ids (defaults to `query(**filters)`).
+            text (bool): Also read the text columns from disk.
+        """
+        rows = self.query(**filters) if rows is None else np.asarray(rows)
+        with self._lock:
+            self._sync()
+            df = pd.DataFrame({
+                "published_at": pd.to_datetime(self._ts[rows], utc=True),
+                "category": pd.Categorical.from_codes(self._category[rows], categories=[c.value for c in CATEGORIES]),
+                "sentiment": pd.Categorical.from_codes(self._sentiment[rows], categories=list(self.sentiments)),
+            }, index=pd.Index(rows, name="row"))
+        if text:
+            df = df.join(self._read_text(rows))
+        return df
+
+    def asset_pairs(self, rows) -> pd.DataFrame:
+        """
+        One (row, asset) line per affected asset of the selected rows.
+        """
+        with self._lock:
+            self._sync()
+            selected = np.zeros(len(self._ts), dtype=bool)
+            selected[rows] = True
+            mask = selected[self._pair_row]
+            return pd.DataFrame({
+                "row": self._pair_row[mask],
+                "asset": pd.Categorical.from_codes(self._pair_asset[mask], categories=list(self.assets))
+            })
+
+    def signals(self, rows) -> list:
+        """
+        Rebuilds MarketSignal objects for the given rows.
+        """
+        rows = np.asarray(rows)
+        df = self.frame(rows, text=True)
+        pairs = self.asset_pairs(rows)
+        assets = pairs.groupby("row", observed=True)["asset"].agg(list)
+        return [
+            MarketSignal(
+                headline=r.headline, affected_assets=[str(a) for a in assets.get(row, [])],
+                category=EventCategory(r.category), sentiment=r.sentiment,
+                summary=r.summary, trading_recommendation=r.trading_recommendation
+            )
+            for row, r in zip(df.index, df.itertuples())
+        ]
+
+    def _read_text(self, rows) -> pd.DataFrame:
+        with self._lock:
+            self._sync()
+            parts = []
+            rows = np.asarray(rows)
+            for name, first, count in self._segments:
+                local = rows[(rows >= first) & (rows < first + count)]
+                if len(local):
+                    table = pq.read_table(name, columns=TEXT_COLUMNS).take(pa.array(local - first))
+                    parts.append(table.to_pandas().set_index(pd.Index(local, name="row")))
+
+            # Rows not flushed yet are still in the buffer
+            buffered_from = len(self._ts) - len(self._buffer)
+            local = rows[rows >= buffered_from]
+            if len(local):
+                buffered = [self._buffer[i - buffered_from][4:] for i in local]
+                parts.append(pd.DataFrame(buffered, columns=TEXT_COLUMNS, index=pd.Index(local, name="row")))
+        if not parts:
+            return pd.DataFrame(columns=TEXT_COLUMNS, index=pd.Index([], name="row"))
+        return pd.concat(parts)
+
+    def memory_bytes(self) -> int:
+        """
+        Memory held by the columns and the built indexes.
+        """
+        self._sync()
+        columns = [self._ts, self._category, self._sentiment, self._pair_row, self._pair_asset]
+        indexes = [array for index in self._indexes.values() for array in index]
+        return sum(array.nbytes for array in columns + indexes)
+
+
+def _groups(names, key):
+    """
+    Maps dictionary codes to groups of names sharing the same `key`.
+
+    Returns:
+        tuple: (group id per code, first name of each group).
+    """
+    ids, labels = {}, []
+    for name in names:
+        if key(name) not in ids:
+            ids[key(name)] = len(labels)
+            labels.append(name)
+    return np.array([ids[key(name)] for name in names], dtype=np.int64), labels
+
+
+def _as_ns(value, default):
+    if value is None:
+        return default
+    timestamp = pd.Timestamp(value)
+    timestamp = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp
+    return np.int64(timestamp.value)
@@ -0,0 +1,115 @@
+import re
+from src.schema import EventCategory
+
+# Local keyword rules mirroring the category definitions of MarketSignal.category
+CATEGORY_KEYWORDS = {
+    EventCategory.SUPPLY_SHOCK: [
+        "explosion", "explode", "blast", "fire", "leak", "strike", "walkout", "embargo", "outage",
+        "shutdown", "shut down", "halt", "halts", "disruption", "force majeure", "production cut",
+        "output cut", "maintenance", "restart", "restarts", "pipeline", "refinery", "terminal", "opec"
+    ],
+    EventCategory.WEATHER_EVENT: [
+        "hurricane", "tropical storm", "storm", "cold snap", "cold spell", "freeze", "frost",
+        "heatwave", "heat wave", "polar vortex", "weather", "temperatures", "forecast"
+    ],
+    EventCategory.MACRO_ECONOMIC: [
+        "inflation", "gdp", "fed", "federal reserve", "central bank", "interest rate", "rate hike",
+        "rate cut", "recession", "economy", "carbon", "emissions", "pollution"
+    ],
+    EventCategory.INVENTORY: [
+        "eia", "storage", "inventory", "inventories", "stockpile", "stockpiles", "injection",
+        "withdrawal", "bcf", "stocks"
+    ],
+    EventCategory.GEOPOLITICAL: [
+        "war", "sanction", "sanctions", "treaty", "missile", "attack", "conflict", "tariff", "tariffs",
+        "export deal", "ceasefire", "invasion", "russia", "ukraine", "iran", "israel", "middle east"
+    ]
+}
+
+
+class NewsTriage:
+    """
+    Cheap local pre-filter that routes only plausibly relevant articles to the LLM.
+
+    All category keywords are compiled into a single regex alternation, so triage costs one
+    pass over the text. A small share of skipped articles (`audit_rate`) is still sent to
+    the LLM to measure, online, how often a skip was right (precision).
+
+    Args:
+        keywords (dict): EventCategory -> list of keywords (defaults to CATEGORY_KEYWORDS).
+        audit_rate (float): Fraction of skipped articles classified anyway for auditing.
+    """
+    def __init__(self, keywords=None, audit_rate=0.05):
+        keywords = keywords or CATEGORY_KEYWORDS
+        terms = sorted({term for terms in keywords.values() for term in terms}, key=len, reverse=True)
+        self._pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+        self.audit_every = round(1 / audit_rate) if audit_rate else 0
+
+        self.routed = 0
+        self.skipped = 0
+        self.audit_samples = 0
+        self.audited = 0
+        self.audited_noise = 0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+
+    @classmethod
+    def from_config(cls, config):
+        section = config.get('triage', {})
+        if not section.get('enabled', False):
+            return None
+        return cls(audit_rate=section.get('audit_rate', 0.05))
+
+    def is_relevant(self, text: str) -> bool:
+        return self._pattern.search(text) is not None
+
+    def route(self, articles):
+        """
+        Splits articles into those to classify and those to skip.
+
+        Returns:
+            tuple: (indices to send to the LLM, indices of those that are audit samples).
+        """
+        to_classify, audits = [], []
+        for i, article in enumerate(articles):
+            if self.is_relevant(article['text']):
+                self.routed += 1
+                to_classify.append(i)
+                continue
+
+            self.skipped += 1
+            if self.audit_every and self.skipped % self.audit_every == 0:
+                self.audit_samples += 1
+                to_classify.append(i)
+                audits.append(i)
+        return to_classify, audits
+
+    def record_audit(self, signal):
+        """
+        Records the LLM verdict on a skipped article (a correct skip is 'Other / Noise').
+        """
+        if signal is None:
+            return
+        self.audited += 1
+        if signal.category == EventCategory.OTHER:
+            self.audited_noise += 1
+
+    def record_llm_time(self, seconds: float, calls: int):
+        self.llm_seconds += seconds
+        self.llm_calls += calls
+
+    def stats(self) -> dict:
+        """
+        Returns the skip rate, the audited skip precision and the estimated LLM time saved.
+        Audit samples were sent to the LLM, so they do not count as skipped.
+        """
+        total = self.routed + self.skipped
+        not_classified = self.skipped - self.audit_samples
+        avg_call = self.llm_seconds / self.llm_calls if self.llm_calls else 0.0
+        return {
+            "articles": total,
+            "skipped": not_classified,
+            "skip_rate": not_classified / total if total else 0.0,
+            "precision": self.audited_noise / self.audited if self.audited else None,
+            "seconds_saved": not_classified * avg_call
+        }
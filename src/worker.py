@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from src.agent import get_agent
+from src import metrics
+from src.alerts import AlertDispatcher
+from src.backtest import store_signals_frame
+from src.data_loader import MarketDataLoader
+from src.dedup import NearDuplicateIndex
+from src.feed_store import FeedStore
+from src.pipeline import article_key, classify_articles
+from src.regime import RegimeDetector, format_event, update_from_store
+from src.sentiment import SentimentMonitor
+from src.signal_store import SignalStore
+from src.triage import NewsTriage
+
+# End-of-stream marker passed down the pipeline in --once mode
+STOP = None
+
+
+class SignalWorker:
+    """
+    Long-running background pipeline: fetch -> dedup/triage/classify -> evaluate_risk -> publish.
+
+    Stages are connected by bounded asyncio queues, so a slow LLM naturally slows down
+    ingestion (backpressure) instead of piling up articles in memory. Results are published
+    to the FeedStore and the BarStore, which the dashboard only reads; every signal is also
+    recorded in the SignalStore for backtesting.
+
+    Args:
+        loader (MarketDataLoader): Data source (defaults to the live loader).
+        agent (EnergyTradingAgent): Classifier (defaults to the live agent).
+        feed (FeedStore): Output store (defaults to `worker.feed_path`).
+        signal_store (SignalStore): Signal history (defaults to `signal_store.path`).
+        on_published (callable): Optional hook called with (article, signal, action) after each
+                                 signal is published (e.g. latency probes of the replay driver).
+    """
+    def __init__(self, loader=None, agent=None, feed=None, signal_store=None, on_published=None):
+        self.loader = loader or MarketDataLoader()
+        self.config = self.loader.config
+        self.agent = agent or get_agent()
+        self.regime = RegimeDetector.from_config(self.config)
+        if self.agent.dispatcher is None:
+            # Alerts are classified against the same online thresholds as the dashboard
+            self.agent.dispatcher = AlertDispatcher.from_config(self.config, self.loader, self.regime)
+        self.feed = feed or FeedStore.from_config(self.config)
+        self.signal_store = signal_store if signal_store is not None else SignalStore.from_config(self.config)
+        self.store_flush_interval = self.config.get('signal_store', {}).get('flush_interval_seconds', 3600)
+        self.sentiment = SentimentMonitor.from_config(self.config)
+        self.history_period = self.config.get('calibration', {}).get('history_period', "5y")
+        self.dedup = NearDuplicateIndex.from_config(self.config)
+        self.triage = NewsTriage.from_config(self.config)
+        self.on_published = on_published
+
+        section = self.config.get('worker', {})
+        self.news_interval = section.get('news_interval_seconds', 300)
+        self.price_interval = section.get('price_interval_seconds', 900)
+        self.batch_size = section.get('batch_size', 10)
+        self.page_size = section.get('news_page_size', 20)
+        self.queue_size = section.get('queue_size', 100)
+        self.seen_limit = section.get('seen_articles', 5000)
+
+        metrics.REGISTRY.configure(self.config)
+        self.metrics_port = self.config.get('metrics', {}).get('port')
+
+    async def news_stage(self, articles: asyncio.Queue, once=False):
+        """
+        Polls NewsAPI on schedule, or as soon as the dashboard requests a refresh.
+        """
+        default_topic = self.config['agent'].get('search_topic_default', "Natural Gas OR LNG")
+        last_poll, last_request = 0.0, 0.0
+
+        while True:
+            request = self.feed.get_status('refresh_request', {})
+            requested_at = request.get('requested_at', 0)
+
+            if time.time() - last_poll >= self.news_interval or requested_at > last_request:
+                last_poll, last_request = time.time(), max(last_request, requested_at)
+                topic = request.get('topic') or default_topic
+                try:
+                    news = await asyncio.to_thread(self.loader.fetch_real_news, topic=topic, page_size=self.page_size)
+
+                    # Articles ingested by a previous poll, run or restart are skipped
+                    by_key = {article_key(article): article for article in news}
+                    fresh = await asyncio.to_thread(self.feed.mark_seen, list(by_key), self.seen_limit)
+                    for key in fresh:
+                        article = by_key[key]
+                        article['received_at'] = time.time()
+                        # Blocks while downstream stages are busy (backpressure)
+                        await articles.put(article)
+
+                    self.feed.set_status('news_poll', {"topic": topic, "at": last_poll, "articles": len(news), "new": len(fresh)})
+                except Exception as e:
+                    self._stage_error("news", e)
+                if once:
+                    await articles.put(STOP)
+                    return
+            await asyncio.sleep(1)
+
+    async def classify_stage(self, articles: asyncio.Queue, signals: asyncio.Queue):
+        """
+        Drains articles in micro-batches and classifies them (triage, dedup, cache, packing).
+        """
+        while True:
+            batch = [await articles.get()]
+            while len(batch) < self.batch_size and not articles.empty():
+                batch.append(articles.get_nowait())
+
+            stop = any(article is STOP for article in batch)
+            batch = [article for article in batch if article is not STOP]
+            if batch:
+                try:
+                    with metrics.span("classify_batch"):
+                        results, clusters, failed = await asyncio.to_thread(classify_articles, self.agent, batch, self.dedup, self.triage)
+                    metrics.inc("articles_total", len(batch), help="Articles processed by the worker.")
+                    if failed:
+                        # Articles the LLM could not classify (outage, invalid answers) are ingested again by the next poll
+                        await self._forget([batch[i] for i in failed])
+                    for article, signal, cluster in zip(batch, results, clusters):
+                        if signal is not None:
+                            await signals.put((article, signal, cluster))
+                    self._publish_status()
+                except Exception as e:
+                    self._stage_error("classify", e)
+                    await self._forget(batch)
+
+            if stop:
+                await signals.put(STOP)
+                return
+
+    async def risk_stage(self, signals: asyncio.Queue):
+        """
+        Evaluates each signal's risk, publishes it to the feed store and records it.
+        """
+        last_flush = time.time()
+        try:
+            while True:
+                item = await signals.get()
+                if item is STOP:
+                    return
+
+                article, signal, cluster = item
+                try:
+                    await self._publish_signal(article, signal, cluster)
+                    # Full segments are written on append; a partial one at most every flush interval
+                    if time.time() - last_flush >= self.store_flush_interval:
+                        await asyncio.to_thread(self.signal_store.flush)
+                        last_flush = time.time()
+                except Exception as e:
+                    self._stage_error("risk", e)
+                    await self._forget([article])
+        finally:
+            # Also on Ctrl-C or cancellation, so buffered signals are not lost
+            self.signal_store.flush()
+
+    async def _publish_signal(self, article, signal, cluster):
+        # Syndicated copies of an already published story are counted, not re-evaluated or recorded again
+        new_story = not await asyncio.to_thread(self.feed.contains, cluster)
+        action = await asyncio.to_thread(self.agent.evaluate_risk, signal, article) if new_story else None
+        await asyncio.to_thread(self.feed.publish, cluster, signal, article.get('publishedAt', ''), action)
+        metrics.observe("signal_latency_seconds", time.time() - article['received_at'], help="News arrival to feed publication.")
+        if self.on_published is not None:
+            self.on_published(article, signal, action)
+
+        if new_story:
+            published_at = article.get('publishedAt') or datetime.fromtimestamp(article['received_at'], timezone.utc)
+            await asyncio.to_thread(self.signal_store.append, signal, published_at, cluster)
+            self.sentiment.on_signal(signal, published_at)
+
+    async def price_stage(self, once=False):
+        """
+        Refreshes the local bar store for the whole universe on schedule, then feeds the
+        newly closed bars to the sentiment monitor and the regime detector.
+        """
+        market = self.config['market']
+        tickers = list(dict.fromkeys([market['primary_ticker'], market['secondary_ticker'], *self.loader.get_tickers()]))
+
+        while True:
+            try:
+                frames = {}
+                for ticker in tickers:
+                    frames[ticker] = await asyncio.to_thread(self.loader.fetch_bars, ticker, period="2y")
+                self.feed.set_status('price_poll', {"at": time.time(), "tickers": tickers})
+                self.sentiment.on_frames(frames)
+                self.feed.set_status('sentiment', self.sentiment.snapshot())
+
+                # Thresholds recalibrate per bar (new tickers bootstrap once from the stored history)
+                events = await asyncio.to_thread(update_from_store, self.regime, self.loader, tickers, self.history_period)
+                for event in events:
+                    print(f"🔀 Regime event: {format_event(event)}")
+                await asyncio.to_thread(self.regime.save)
+                self.feed.set_status('regime', self.regime.snapshot())
+            except Exception as e:
+                self._stage_error("price", e)
+            if once:
+                return
+            await asyncio.sleep(self.price_interval)
+
+    async def _forget(self, articles):
+        try:
+            await asyncio.to_thread(self.feed.unmark_seen, [article_key(article) for article in articles])
+        except Exception as e:
+            self._stage_error("news", e)
+
+    def _stage_error(self, stage, error):
+        # A failed poll or batch is logged and dropped; the stage keeps running
+        print(f"⚠️ Worker {stage} stage failed: {error!r}")
+        metrics.inc("errors_total", source=f"worker_{stage}")
+
+    def _publish_status(self):
+        status = {"at": time.time()}
+        if self.triage is not None:
+            status['triage'] = self.triage.stats()
+        if self.dedup is not None:
+            status['dedup'] = self.dedup.stats()
+        if self.agent.cache is not None:
+            status['cache'] = self.agent.cache.stats()
+        status['alerts'] = self.agent.dispatcher.stats()
+        self.feed.set_status('pipeline', status)
+        self.feed.set_status('sentiment', self.sentiment.snapshot())
+
+    async def run(self, once=False):
+        """
+        Runs every stage concurrently (forever, or for a single cycle with `once`).
+        """
+        if metrics.REGISTRY.enabled and self.metrics_port:
+            metrics.start_http_server(self.metrics_port)
+            print(f"📊 Metrics available at http://127.0.0.1:{self.metrics_port}/metrics")
+
+        # Recorded signals over the bar history seed the sentiment index and its correlations
+        start = datetime.now(timezone.utc) - timedelta(days=730)
+        self.sentiment.on_signals_frame(store_signals_frame(self.signal_store, self.config['market']['asset_tickers'], start=start))
+
+        articles = asyncio.Queue(maxsize=self.queue_size)
+        signals = asyncio.Queue(maxsize=self.queue_size)
+        await asyncio.gather(
+            self.news_stage(articles, once),
+            self.classify_stage(articles, signals),
+            self.risk_stage(signals),
+            self.price_stage(once)
+        )
+
+        # Let in-flight alerts reach their sinks before exiting
+        self.agent.dispatcher.flush(timeout=30)
+        self._publish_status()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background news and price pipeline for the dashboard.")
+    parser.add_argument("--once", action="store_true", help="Run a single polling cycle, then exit.")
+    args = parser.parse_args()
+
+    print("⚙️ Starting signal worker...")
+    asyncio.run(SignalWorker().run(once=args.once))
@@ -0,0 +1,163 @@
+import asyncio
+import re
+import pytest
+from src.agent import EnergyTradingAgent
+from src.alerts import AlertDispatcher
+from src.fakes import FakeSignalLLM
+
+TEXTS = [f"Storm {i} forces shutdown of offshore gas platforms." for i in range(10)]
+
+
+class CountingLLM(FakeSignalLLM):
+    """
+    Tracks the peak number of LLM calls in flight at once.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.in_flight = 0
+        self.peak = 0
+
+    def _draw(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        return super()._draw()
+
+    def _answer(self, *args, **kwargs):
+        try:
+            return super()._answer(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class ReversedLLM(FakeSignalLLM):
+    """
+    Answers the calls started first last.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.finished = []
+
+    def _draw(self):
+        _, fault = super()._draw()
+        return 0.01 * (len(TEXTS) - self.calls), fault
+
+    def _answer(self, text, *args, **kwargs):
+        signal = super()._answer(text, *args, **kwargs)
+        with self._lock:
+            self.finished.append(TEXTS.index(text))
+        return signal
+
+
+class PackedLLM(FakeSignalLLM):
+    """
+    Records the articles of every packed and single-article request, and corrupts the
+    packed answers with `corrupt` (answer dict -> answer dict).
+    """
+    def __init__(self, corrupt=None, **kwargs):
+        super().__init__(**kwargs)
+        self.corrupt = corrupt
+        self.packed = []
+        self.single = []
+
+    def _answer(self, text, packed=False, fault=None):
+        if not packed:
+            self.single.append(text)
+            return super()._answer(text, packed, fault)
+        self.packed.append(re.findall(r"^\[\d+\] (.*)$", text, flags=re.MULTILINE))
+        answer = super()._answer(text, packed, fault)
+        return self.corrupt(answer) if self.corrupt else answer
+
+
+def make_agent(llm, packing=False):
+    agent = EnergyTradingAgent(llm=llm, cache=False, dispatcher=AlertDispatcher([]))
+    agent.executor.max_retries = 0
+    if not packing:
+        agent.packing = {**agent.packing, "enabled": False}
+    return agent
+
+
+def analyze(agent, texts, mode, max_concurrency=None):
+    if mode == "async":
+        return asyncio.run(agent.aanalyze_many(texts, max_concurrency=max_concurrency))
+    return agent.analyze_many(texts, max_concurrency=max_concurrency)
+
+
+def headlines(signals):
+    return [signal.headline if signal is not None else None for signal in signals]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_results_keep_the_input_order(mode):
+    llm = ReversedLLM()
+    signals = analyze(make_agent(llm), TEXTS, mode)
+    assert llm.finished != sorted(llm.finished)
+    assert headlines(signals) == [text.split(".")[0] for text in TEXTS]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize("max_concurrency", [1, 3])
+def test_in_flight_calls_are_bounded(mode, max_concurrency):
+    llm = CountingLLM(latency=0.05)
+    signals = analyze(make_agent(llm), TEXTS, mode, max_concurrency)
+    assert all(signal is not None for signal in signals)
+    assert llm.peak == max_concurrency
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_default_concurrency_comes_from_settings(mode):
+    llm = CountingLLM(latency=0.05)
+    agent = make_agent(llm)
+    analyze(agent, TEXTS, mode)
+    assert 1 < llm.peak <= agent.max_concurrency
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+@pytest.mark.parametrize("packing", [False, True])
+def test_a_failed_item_only_voids_its_own_slot(mode, packing):
+    failing = {TEXTS[2], TEXTS[7]}
+    llm = FakeSignalLLM(fail_on=lambda text: text in failing)
+    signals = analyze(make_agent(llm, packing), TEXTS, mode)
+    assert headlines(signals) == [None if text in failing else text.split(".")[0] for text in TEXTS]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_items_missing_from_a_partial_pack_are_retried_alone(mode):
+    failing = {TEXTS[2], TEXTS[9]}
+    llm = PackedLLM(fail_on=lambda text: text in failing)
+    signals = analyze(make_agent(llm, packing=True), TEXTS, mode)
+
+    # 10 articles: packs of 8 and 2, then one single call per article left out
+    assert [len(pack) for pack in llm.packed] == [8, 2]
+    assert sorted(llm.single) == sorted(failing)
+    assert headlines(signals) == [None if text in failing else text.split(".")[0] for text in TEXTS]
+
+
+def malformed(answer):
+    items = answer['signals']
+    # Item 1 loses required fields, item 0 comes back twice, and an unknown index is added
+    broken = [item for item in items if item['index'] != 1] + [{"index": 1, "headline": "truncated"}]
+    extra = [{**items[0], "headline": "duplicate"}, {**items[0], "index": 99}]
+    return {"signals": broken + extra}
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_invalid_items_of_a_malformed_pack_are_retried_alone(mode):
+    llm = PackedLLM(corrupt=malformed)
+    signals = analyze(make_agent(llm, packing=True), TEXTS, mode)
+
+    # Only the invalid item of each pack is classified again
+    assert len(llm.packed) == 2
+    assert sorted(llm.single) == sorted(pack[1] for pack in llm.packed)
+    assert headlines(signals) == [text.split(".")[0] for text in TEXTS]
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_a_pack_without_an_answer_is_retried_item_by_item(mode):
+    llm = PackedLLM(corrupt=lambda answer: None)
+    signals = analyze(make_agent(llm, packing=True), TEXTS[:4], mode)
+
+    assert llm.packed == [TEXTS[:4]]
+    assert sorted(llm.single) == sorted(TEXTS[:4])
+    assert headlines(signals) == [text.split(".")[0] for text in TEXTS[:4]]
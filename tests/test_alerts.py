@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import pytest
+from src.alerts import Alert, AlertDispatcher, RegimeMonitor, WebhookSink
+from src.regime import RegimeDetector
+
+
+class WebhookStub:
+    """
+    Local HTTP endpoint recording every POSTed alert; the first `failures` requests get a 500.
+    """
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = []
+        self.received = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                stub.attempts.append(time.monotonic())
+                if len(stub.attempts) <= stub.failures:
+                    self.send_response(500)
+                else:
+                    stub.received.append(json.loads(body))
+                    self.send_response(200)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(failures=0):
+        created.append(WebhookStub(failures))
+        return created[-1]
+
+    yield make
+    for stub in created:
+        stub.close()
+
+
+def make_alert(headline="Pipeline explosion halts LNG exports"):
+    return Alert(
+        category="Supply Shock", sentiment="Bullish", headline=headline, affected_assets=["Natural Gas"],
+        summary="Explosion at a Gulf Coast terminal.", trading_recommendation="Buy NG front month"
+    )
+
+
+def test_webhook_delivers_alert(stubs):
+    stub = stubs()
+    dispatcher = AlertDispatcher([WebhookSink(stub.url, timeout=2)], backoff_base=0.01)
+
+    assert dispatcher.submit(make_alert())
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    assert [payload['headline'] for payload in stub.received] == ["Pipeline explosion halts LNG exports"]
+    assert dispatcher.stats()['delivered'] == 1
+
+
+def test_webhook_retries_with_exponential_backoff(stubs):
+    stub = stubs(failures=2)
+    dispatcher = AlertDispatcher([WebhookSink(stub.url, timeout=2)], max_retries=3, backoff_base=0.1)
+
+    dispatcher.submit(make_alert())
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    assert len(stub.attempts) == 3 and len(stub.received) == 1
+    gaps = np.diff(stub.attempts)
+    # Backoff of 0.1s, then 0.2s
+    assert gaps[0] >= 0.1 and gaps[1] >= 0.2
+    assert dispatcher.stats()['delivered'] == 1
+
+
+def test_webhook_gives_up_after_max_retries(stubs):
+    stub = stubs(failures=100)
+    dispatcher = AlertDispatcher([WebhookSink(stub.url, timeout=2)], max_retries=2, backoff_base=0.01)
+
+    dispatcher.submit(make_alert())
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    assert len(stub.attempts) == 3
+    assert dispatcher.stats()['failed'] == 1
+
+
+def test_failing_sink_does_not_block_other_sinks(stubs):
+    healthy, broken = stubs(), stubs(failures=100)
+    dispatcher = AlertDispatcher(
+        [WebhookSink(broken.url, timeout=2), WebhookSink(healthy.url, timeout=2)], max_retries=3, backoff_base=0.3
+    )
+
+    start = time.monotonic()
+    dispatcher.submit(make_alert())
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    # The healthy sink got the alert right away, while the broken one was still backing off (0.3 + 0.6 + 1.2s)
+    assert len(healthy.received) == 1
+    assert len(healthy.attempts) == 1 and healthy.attempts[0] - start < 0.5
+    assert len(broken.attempts) == 4
+    assert dispatcher.stats()['failed'] == 1
+
+
+def test_failed_enrichment_still_delivers_the_alert(stubs):
+    stub = stubs()
+
+    def enrich(alert):
+        raise RuntimeError("Bar store unavailable")
+
+    dispatcher = AlertDispatcher([WebhookSink(stub.url, timeout=2)], enrich=enrich, backoff_base=0.01)
+    assert dispatcher.submit(make_alert())
+    assert dispatcher.flush(timeout=10)
+    dispatcher.stop()
+
+    assert [payload['regime'] for payload in stub.received] == [None]
+    assert dispatcher.stats()['delivered'] == 1
+
+
+class FrameLoader:
+    """
+    Loader stand-in serving a fixed daily frame from memory.
+    """
+    def __init__(self, bars, config):
+        self.bars = bars
+        self.config = config
+        self.store = self
+
+    def version(self, ticker, interval="1d"):
+        return 0.0
+
+    def fetch_bars(self, ticker, period="1mo", interval="1d", refresh=True):
+        return self.bars
+
+
+def test_regime_monitor_uses_online_thresholds():
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range("2022-01-03", periods=400)
+    close = 3.0 * np.exp(np.cumsum(rng.normal(0, 0.02, len(index))))
+    bars = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close}, index=index)
+    config = {
+        "market": {"primary_ticker": "NG=F", "asset_tickers": {"natural gas": "NG=F"}},
+        # Static thresholds that would call every reading 'critical'
+        "volatility_thresholds": {"critical": 0.01, "high": 0.005, "noise": 0.001}
+    }
+    detector = RegimeDetector(min_bars=60)
+    detector.on_frame("NG=F", bars)
+    monitor = RegimeMonitor(FrameLoader(bars, config), detector)
+
+    thresholds = detector.thresholds("NG=F")
+    assert monitor.thresholds_for("NG=F") == thresholds
+
+    alert = monitor.enrich(make_alert())
+    assert alert.ticker == "NG=F"
+    assert alert.regime == detector.classify("NG=F", alert.vol_pct)
+    assert alert.regime != "critical"
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from benchmarks.data import synthetic_ohlc
+from benchmarks.run import dashboard_rsi
+from src.analytics import VolatilityStream, analyze_panel, calculate_volatility
+
+THRESHOLDS = {"critical": 6.0, "high": 4.0, "noise": 2.0}
+
+
+@pytest.fixture
+def bars():
+    return synthetic_ohlc(1_000, seed=3)
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 250, 1_000])
+def test_stream_matches_the_bulk_calculation(bars, chunk):
+    expected = calculate_volatility(bars)
+    stream = VolatilityStream(windows=(22, 100))
+
+    values = []
+    for start in range(0, len(bars), chunk):
+        part = bars.iloc[start:start + chunk]
+        if chunk == 1:
+            values.append(stream.update(part['High'].iloc[0], part['Low'].iloc[0], part['Close'].iloc[0]))
+        else:
+            values.extend(stream.update_many(part['High'], part['Low'], part['Close']))
+
+    assert np.isnan(values[0])
+    np.testing.assert_allclose(values[1:], expected['Vol_Pct'])
+    assert stream.count == len(expected)
+    assert stream.true_range == pytest.approx(expected['True_Range'].iloc[-1])
+    for window in (22, 100):
+        assert stream.rolling_mean(window) == pytest.approx(expected['Vol_Pct'].iloc[-window:].mean())
+
+
+def test_regime_thresholds_from_the_constructor_or_the_call(bars):
+    stream = VolatilityStream()
+    stream.update_many(bars['High'], bars['Low'], bars['Close'])
+    stream.vol_pct = 5.0
+
+    with pytest.raises(ValueError):
+        stream.regime()
+    assert stream.regime(THRESHOLDS) == "high"
+
+    stream.thresholds = THRESHOLDS
+    assert stream.regime() == "high"
+    assert stream.regime({**THRESHOLDS, "high": 5.5}) == "normal"
+
+
+def test_panel_rsi_follows_each_ticker_calendar():
+    gas = synthetic_ohlc(300, seed=1, freq="D")
+    # Oil skips every 7th day, so the aligned panel has gaps
+    oil = synthetic_ohlc(300, seed=2, freq="D").iloc[lambda df: np.arange(len(df)) % 7 != 3]
+    rsi = analyze_panel({"NG=F": gas, "CL=F": oil})['rsi']
+
+    for ticker, bars in (("NG=F", gas), ("CL=F", oil)):
+        expected = dashboard_rsi(bars['Close'])
+        np.testing.assert_allclose(rsi[ticker].loc[bars.index], expected, rtol=1e-9)
+    assert rsi['CL=F'].drop(oil.index).isna().all()
@@ -0,0 +1,95 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.agent import EnergyTradingAgent
+from src.alerts import AlertDispatcher
+from src.backtest import (align_to_bars, bar_close_times, event_study, forward_metrics, hit_rates,
+                          read_articles, read_bars, run_backtest, signals_frame)
+from src.fakes import FakeSignalLLM, keyword_signal
+from src.schema import EventCategory
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+ASSET_TICKERS = {"natural gas": "NG=F", "crude": "CL=F"}
+
+
+@pytest.fixture
+def bars():
+    return read_bars(os.path.join(FIXTURES, "bars.csv"))
+
+
+def signal(sentiment, asset="Natural Gas"):
+    return keyword_signal("Pipeline explosion halts LNG exports.").model_copy(
+        update={"sentiment": sentiment, "affected_assets": [asset]}
+    )
+
+
+def test_signals_align_to_the_first_bar_closing_strictly_after():
+    closes = pd.DatetimeIndex(["2025-01-06 22:00", "2025-01-07 22:00", "2025-01-08 22:00"], tz="UTC").asi8
+    signals = pd.DatetimeIndex(["2025-01-06 10:00", "2025-01-06 22:00", "2025-01-07 23:00", "2025-01-09 00:00"], tz="UTC").asi8
+    assert list(align_to_bars(signals, closes)) == [0, 1, 2, 3]
+
+
+def test_forward_metrics_measure_from_the_last_close_before_the_news():
+    close = np.array([10.0, 11.0, 12.0, 9.0, 10.0])
+    vol_pct = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    metrics = forward_metrics(close, vol_pct, np.array([1, 3, 0, 5]), horizons=(1, 2))
+
+    np.testing.assert_allclose(metrics['ret_1'], [11 / 10 - 1, 9 / 12 - 1, np.nan, np.nan])
+    np.testing.assert_allclose(metrics['ret_2'], [12 / 10 - 1, 10 / 12 - 1, np.nan, np.nan])
+    np.testing.assert_allclose(metrics['vol_2'], [2.5, 4.5, np.nan, np.nan])
+
+
+def test_daily_bars_close_at_the_new_york_settlement():
+    index = pd.DatetimeIndex(["2025-01-10", "2025-07-10"])
+    assert list(bar_close_times(index)) == [pd.Timestamp("2025-01-10 22:00", tz="UTC"), pd.Timestamp("2025-07-10 21:00", tz="UTC")]
+    assert bar_close_times(index[:1], "1wk")[0] == pd.Timestamp("2025-01-16 22:00", tz="UTC")
+    assert bar_close_times(pd.DatetimeIndex(["2025-01-10 14:00"], tz="UTC"), "1h")[0] == pd.Timestamp("2025-01-10 15:00", tz="UTC")
+
+
+def test_free_form_sentiments_are_scored_by_their_direction(bars):
+    classified = [
+        ({"publishedAt": "2025-01-07T23:30:00Z"}, signal("Bearish (short-term)")),
+        ({"publishedAt": "2025-01-07T23:30:00Z"}, signal("bullish", "Brent crude")),
+        ({"publishedAt": "2025-01-07T23:30:00Z"}, signal("Bearish", "TTF")),
+        ({"publishedAt": "2025-01-07T23:30:00Z"}, None),
+    ]
+    signals = signals_frame(classified, ASSET_TICKERS)
+    assert list(signals['sentiment']) == ["Bearish", "Bullish"]
+
+    # Both markets fell on the next bar: the bearish call hits, the bullish one misses
+    results = event_study(signals, bars, horizons=(1,)).set_index("ticker")
+    assert results.loc["NG=F", "hit_1"] == 1 and results.loc["CL=F", "hit_1"] == 0
+
+
+def test_event_study_without_bars_keeps_the_result_columns(bars):
+    signals = signals_frame([({"publishedAt": "2025-01-07T12:00:00Z"}, signal("Bullish", "Crude"))], ASSET_TICKERS)
+    results = event_study(signals, {"NG=F": bars["NG=F"]}, horizons=(1, 5))
+    assert results.empty
+    assert {"ret_1", "vol_1", "hit_1", "ret_5", "vol_5", "hit_5"} <= set(results.columns)
+
+
+def test_offline_backtest_from_recorded_fixtures(bars):
+    agent = EnergyTradingAgent(llm=FakeSignalLLM(), cache=False, dispatcher=AlertDispatcher([]))
+    articles = read_articles(os.path.join(FIXTURES, "articles.jsonl"))
+    results, report = run_backtest(articles, agent, bars, ASSET_TICKERS, batch_size=4)
+
+    assert len(results) == 7 and set(results['ticker']) == {"NG=F"}
+    results = results.set_index("headline")
+    # Published before the first close (no reference price) or after the last one
+    assert results.filter(like="Freeport", axis=0)['ret_1'].isna().all()
+    assert results.filter(like="Pipeline explosion", axis=0)['ret_1'].isna().all()
+
+    strike = results.filter(like="Strike", axis=0).iloc[0]
+    assert strike['ret_1'] == pytest.approx(3.06 / 3.03 - 1)
+    assert strike['ret_10'] == pytest.approx(3.20 / 3.03 - 1)
+    # 18:30 New York: after the 2025-01-07 settlement
+    fed = results.filter(like="Fed", axis=0).iloc[0]
+    assert fed['ret_1'] == pytest.approx(2.94 / 3.00 - 1) and fed['hit_1'] == 1
+    assert results.filter(like="EIA", axis=0).iloc[0]['hit_1'] == 1
+    assert results.filter(like="Hurricane", axis=0).iloc[0]['hit_1'] == 0
+
+    assert report.loc[(EventCategory.SUPPLY_SHOCK.value, "Bullish"), "signals"] == 3
+    assert report.loc[(EventCategory.SUPPLY_SHOCK.value, "Bullish"), "hit_rate_1"] == 1.0
+    assert report.loc[(EventCategory.OTHER.value, "Neutral"), "hit_rate_1"] == 0.0
+    assert report.equals(hit_rates(results.reset_index()))
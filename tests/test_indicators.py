@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.data import synthetic_ohlc, synthetic_pair
+from benchmarks.run import dashboard_rsi
+from src import indicators
+
+N_BARS = 5_000
+WINDOW = 14
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def backend(request, monkeypatch):
+    """
+    Runs each check on the NumPy fallback and, when installed, on the compiled Numba loops.
+    """
+    if request.param == "numba":
+        if not indicators.NUMBA_AVAILABLE:
+            pytest.skip("numba is not installed")
+        monkeypatch.setattr(indicators, "USE_NUMBA", True)
+        monkeypatch.setattr(indicators, "NUMBA_MIN_BARS", 0)
+    else:
+        monkeypatch.setattr(indicators, "USE_NUMBA", False)
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def bars():
+    return synthetic_ohlc(N_BARS)
+
+
+def assert_matches(actual, expected, rtol=1e-9, atol=1e-8):
+    np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(expected, dtype=float), rtol=rtol, atol=atol)
+
+
+def pandas_true_range(bars):
+    prev_close = bars['Close'].shift()
+    ranges = [bars['High'] - bars['Low'], (bars['High'] - prev_close).abs(), (bars['Low'] - prev_close).abs()]
+    return pd.concat(ranges, axis=1).max(axis=1, skipna=False)
+
+
+def pandas_wilder_rsi(close, window=WINDOW):
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / window, adjust=False).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+
+def test_rsi_sma_matches_dashboard_reference(backend, bars):
+    assert_matches(indicators.rsi(bars['Close'].to_numpy()), dashboard_rsi(bars['Close']))
+
+
+def test_rsi_wilder_matches_pandas_ewm(backend, bars):
+    result = indicators.rsi(bars['Close'].to_numpy(), WINDOW, method="wilder")
+    assert np.isnan(result[:WINDOW]).all()
+    assert_matches(result[WINDOW:], pandas_wilder_rsi(bars['Close'])[WINDOW:])
+
+
+@pytest.mark.parametrize("method", ["wilder", "sma"])
+def test_atr_matches_pandas(backend, bars, method):
+    true_range = pandas_true_range(bars)
+    if method == "wilder":
+        expected = true_range.ewm(alpha=1 / WINDOW, adjust=False).mean()
+    else:
+        expected = true_range.rolling(WINDOW).mean()
+    result = indicators.atr(*(bars[c].to_numpy() for c in ("High", "Low", "Close")), WINDOW, method=method)
+    assert np.isnan(result[:WINDOW]).all()
+    assert_matches(result[WINDOW:], expected[WINDOW:])
+
+
+@pytest.mark.parametrize("alpha", [0.5, 1 / 14, 0.01, 0.001])
+def test_ewm_matches_pandas(backend, bars, alpha):
+    close = bars['Close']
+    assert_matches(indicators.ewm(close.to_numpy(), alpha), close.ewm(alpha=alpha, adjust=False).mean())
+
+
+def test_rolling_corr_matches_pandas(backend):
+    gas, oil = synthetic_pair(N_BARS)
+    gas = gas.loc[oil.index]
+    x, y = gas['Close'].pct_change().iloc[1:], oil['Close'].pct_change().iloc[1:]
+    assert_matches(indicators.rolling_corr(x.to_numpy(), y.to_numpy(), 30), x.rolling(30).corr(y))
+
+
+def test_bollinger_and_zscore_match_pandas(backend, bars):
+    close = bars['Close']
+    mean, std = close.rolling(20).mean(), close.rolling(20).std()
+    middle, upper, lower = indicators.bollinger(close.to_numpy(), 20)
+    assert_matches(middle, mean)
+    assert_matches(upper, mean + 2 * std)
+    assert_matches(lower, mean - 2 * std)
+    assert_matches(indicators.zscore(close.to_numpy(), 20), (close - mean) / std)
+
+
+@pytest.mark.parametrize("tail", [1, 90, N_BARS - 5, N_BARS + 10])
+def test_tail_matches_full_history(backend, bars, tail):
+    high, low, close = (bars[c].to_numpy() for c in ("High", "Low", "Close"))
+    gas, oil = synthetic_pair(N_BARS)
+    x = gas.loc[oil.index]['Close'].pct_change().to_numpy()[1:]
+    y = oil['Close'].pct_change().to_numpy()[1:]
+    expected_length = min(tail, N_BARS)
+
+    # Rolling windows are exact; exponential smoothing only forgets a negligible warm-up weight
+    pairs = [
+        (indicators.rsi(close, tail=tail), indicators.rsi(close)),
+        (indicators.rsi(close, method="wilder", tail=tail), indicators.rsi(close, method="wilder")),
+        (indicators.atr(high, low, close, tail=tail), indicators.atr(high, low, close)),
+        (indicators.atr(high, low, close, method="sma", tail=tail), indicators.atr(high, low, close, method="sma")),
+        (indicators.bollinger(close, tail=tail)[1], indicators.bollinger(close)[1]),
+        (indicators.zscore(close, tail=tail), indicators.zscore(close)),
+    ]
+    for partial, full in pairs:
+        assert len(partial) == expected_length
+        assert_matches(partial, full[-expected_length:], rtol=1e-7)
+
+    partial = indicators.rolling_corr(x, y, 30, tail=tail)
+    assert len(partial) == min(tail, len(x))
+    assert_matches(partial, indicators.rolling_corr(x, y, 30)[-len(partial):], rtol=1e-7)
+
+
+def test_short_inputs_are_all_nan(backend):
+    close = np.array([3.0, 3.1, 3.05])
+    assert np.isnan(indicators.rsi(close)).all() and len(indicators.rsi(close)) == 3
+    assert np.isnan(indicators.rsi(close, method="wilder")).all()
+    assert np.isnan(indicators.rolling_corr(close, close, 30)).all()
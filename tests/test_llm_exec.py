@@ -0,0 +1,118 @@
+import asyncio
+import time
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from src.fakes import FakeSignalLLM
+from src.llm_exec import LLMExecutor, LLMTimeout
+from src.schema import MarketSignal
+
+NEWS = {"news": "Pipeline explosion halts LNG exports from the Gulf Coast."}
+PROMPT = ChatPromptTemplate.from_messages([("human", "{news}")])
+
+
+def route(name, llm):
+    return name, PROMPT | llm.with_structured_output(MarketSignal)
+
+
+def executor(*llms, **options):
+    defaults = dict(timeout=2.0, deadline=5.0, max_retries=2, backoff_base=0.01, hedge=False, seed=0)
+    return LLMExecutor([route(f"model-{i}", llm) for i, llm in enumerate(llms)], **{**defaults, **options})
+
+
+class FirstCallSlowLLM(FakeSignalLLM):
+    """
+    The first call takes `slow_latency`, every later one `latency` (a straggler to hedge).
+    """
+    def _draw(self):
+        latency, fault = super()._draw()
+        return (self.slow_latency if self.calls == 1 else latency), fault
+
+
+class FlakyLLM(FakeSignalLLM):
+    """
+    The first `failures` calls raise a transient error, then every call succeeds.
+    """
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def _draw(self):
+        latency, fault = super()._draw()
+        return latency, ("error" if self.calls <= self.failures else fault)
+
+
+@pytest.mark.parametrize("max_retries", [0, 2])
+def test_max_retries_is_honoured_per_route(max_retries):
+    small, large = FakeSignalLLM(error_rate=1.0), FakeSignalLLM(error_rate=1.0)
+
+    with pytest.raises(RuntimeError):
+        executor(small, large, max_retries=max_retries).invoke(NEWS)
+    assert small.calls == large.calls == max_retries + 1
+
+
+def test_transient_error_is_retried():
+    llm = FlakyLLM(failures=2)
+
+    result = executor(llm, max_retries=2).invoke(NEWS)
+    assert isinstance(result, MarketSignal)
+    assert llm.calls == 3
+
+
+def test_total_time_is_bounded_by_deadline():
+    llm = FakeSignalLLM(latency=0.5)
+    start = time.monotonic()
+
+    with pytest.raises(LLMTimeout):
+        executor(llm, FakeSignalLLM(latency=0.5), timeout=0.2, deadline=0.6, max_retries=10).invoke(NEWS)
+    assert time.monotonic() - start <= 0.6 + 0.15
+
+
+def test_hedged_request_wins_over_straggler():
+    llm = FirstCallSlowLLM(latency=0.01, slow_latency=2.0)
+    start = time.monotonic()
+
+    result = executor(llm, hedge=True, hedge_initial=0.1, hedge_min=0.05).invoke(NEWS)
+    assert isinstance(result, MarketSignal)
+    assert llm.calls == 2
+    assert time.monotonic() - start < 1.0
+
+
+def test_invalid_answer_escalates_to_next_route():
+    small, large = FakeSignalLLM(invalid_rate=1.0), FakeSignalLLM()
+
+    result = executor(small, large).invoke(NEWS)
+    assert isinstance(result, MarketSignal)
+    # An invalid answer is not retried on the same model
+    assert small.calls == 1 and large.calls == 1
+
+
+def test_confident_answer_does_not_escalate():
+    small, large = FakeSignalLLM(confidence=0.9), FakeSignalLLM(confidence=0.95)
+
+    result = executor(small, large, min_confidence=0.6).invoke(NEWS)
+    assert result.confidence == 0.9
+    assert large.calls == 0
+
+
+def test_low_confidence_returns_best_candidate():
+    small, large = FakeSignalLLM(confidence=0.3), FakeSignalLLM(confidence=0.5)
+
+    result = executor(small, large, min_confidence=0.6).invoke(NEWS)
+    assert result.confidence == 0.5
+    assert small.calls == 1 and large.calls == 1
+
+
+def test_async_path_follows_the_same_policy():
+    small, large = FakeSignalLLM(invalid_rate=1.0), FakeSignalLLM(confidence=0.4)
+    assert asyncio.run(executor(small, large, min_confidence=0.6).ainvoke(NEWS)).confidence == 0.4
+    assert small.calls == 1 and large.calls == 1
+
+    failing = FakeSignalLLM(error_rate=1.0)
+    with pytest.raises(RuntimeError):
+        asyncio.run(executor(failing, max_retries=2).ainvoke(NEWS))
+    assert failing.calls == 3
+
+    start = time.monotonic()
+    with pytest.raises(LLMTimeout):
+        asyncio.run(executor(FakeSignalLLM(latency=0.5), timeout=0.2, deadline=0.6, max_retries=10).ainvoke(NEWS))
+    assert time.monotonic() - start <= 0.6 + 0.15
@@ -0,0 +1,137 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src.market_store import BarStore, period_start
+from src.resample import BarResampler, resample_bars
+
+
+def ohlcv(index, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 3.0 * np.exp(np.cumsum(rng.normal(0, 0.005, len(index))))
+    return pd.DataFrame({
+        "Open": close * 0.999, "High": close * 1.002, "Low": close * 0.997, "Close": close,
+        "Volume": rng.integers(100, 1000, len(index)).astype(float)
+    }, index=index)
+
+
+class Backend:
+    """
+    Serves bars from in-memory frames (interval -> DataFrame) and records every request.
+    """
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def __call__(self, ticker, interval="1d", start=None, period=None):
+        self.calls.append((interval, "incremental" if start is not None else period))
+        df = self.bars.get(interval, pd.DataFrame())
+        if df.empty:
+            return df
+        if start is not None:
+            return df.loc[start:]
+        return df.loc[period_start(period, tz=df.index.tz):]
+
+
+@pytest.fixture
+def hourly():
+    end = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(hours=6)
+    return ohlcv(pd.date_range(end=end, periods=24 * 20, freq="h"))
+
+
+@pytest.fixture
+def daily():
+    return ohlcv(pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=400), seed=1)
+
+
+def age(store, ticker, interval):
+    # Makes the stored bars stale, as if the last refresh was long ago
+    path = store._path(ticker, interval) + ".json"
+    with open(path) as f:
+        meta = json.load(f)
+    with open(path, "w") as f:
+        json.dump({**meta, "fetched_at": 0}, f)
+
+
+def test_refresh_only_requests_bars_since_the_last_stored_one(tmp_path, hourly):
+    backend = Backend({"1h": hourly.iloc[:-5]})
+    store = BarStore(str(tmp_path), backend=backend)
+    first = store.get("NG=F", "1h", period="5d")
+    assert backend.calls == [("1h", "5d")]
+
+    # Five new bars, and the last stored one was still partial
+    revised = hourly.copy()
+    revised.iloc[-6, revised.columns.get_loc("Close")] *= 1.01
+    backend.bars["1h"] = revised
+    assert store.refresh("NG=F", "1h", period="5d") == 5
+    assert backend.calls[-1] == ("1h", "incremental")
+
+    stored = store.read("NG=F", "1h")
+    expected = revised.loc[first.index[0]:]
+    np.testing.assert_allclose(stored['Close'], expected['Close'])
+    assert stored.index.equals(expected.index)
+
+
+def test_longer_period_extends_the_covered_history(tmp_path, daily):
+    backend = Backend({"1d": daily})
+    store = BarStore(str(tmp_path), backend=backend)
+
+    assert len(store.get("NG=F", "1d", period="1mo")) < 30
+    assert not store.covers("NG=F", "1d", period="1y")
+    assert len(store.get("NG=F", "1d", period="1y")) > 240
+    assert backend.calls == [("1d", "1mo"), ("1d", "1y")]
+
+    # Fresh and covered: served from disk
+    store.get("NG=F", "1d", period="6mo")
+    assert len(backend.calls) == 2
+
+
+def test_empty_fetch_still_marks_the_bars_fresh(tmp_path, daily):
+    backend = Backend({"1d": daily})
+    store = BarStore(str(tmp_path), backend=backend)
+    store.get("NG=F", "1d", period="1mo")
+    version = store.version("NG=F", "1d")
+
+    # e.g. the market is closed: nothing new since the last stored bar
+    backend.bars["1d"] = pd.DataFrame()
+    age(store, "NG=F", "1d")
+    for _ in range(3):
+        assert not store.get("NG=F", "1d", period="1mo").empty
+    assert backend.calls == [("1d", "1mo"), ("1d", "incremental")]
+    assert store.version("NG=F", "1d") == version
+
+    # An empty download of a longer history is retried
+    for _ in range(2):
+        store.get("NG=F", "1d", period="1y")
+    assert backend.calls[-2:] == [("1d", "1y"), ("1d", "1y")]
+    assert not store.covers("NG=F", "1d", period="1y")
+
+
+def test_derived_timeframes_follow_the_source_feed(tmp_path, hourly, daily):
+    backend = Backend({"1h": hourly.iloc[:-30], "1d": daily})
+    resampler = BarResampler(source="1h", timeframes=("1h", "4h", "1d"), source_period="10d")
+    store = BarStore(str(tmp_path), backend=backend, resampler=resampler)
+
+    bars = store.get("NG=F", "1d", period="1y")
+    assert backend.calls == [("1h", "10d"), ("1d", "1y")]
+
+    source = store.read("NG=F", "1h")
+    aggregated = resample_bars(source, "1d")
+    # Aggregated bars where the source exists, native history before it
+    pd.testing.assert_frame_equal(store.read("NG=F", "1d").loc[aggregated.index[0]:], aggregated)
+    older = bars[bars.index < aggregated.index[0]]
+    pd.testing.assert_frame_equal(older, daily.loc[older.index], check_freq=False, check_names=False)
+
+    # New source bars only touch the latest buckets
+    backend.bars["1h"] = hourly
+    age(store, "NG=F", "1h")
+    age(store, "NG=F", "1d")
+    store.get("NG=F", "1d", period="1y")
+    assert backend.calls[-1] == ("1h", "incremental")
+    assert [call for call in backend.calls if call[0] == "1d"] == [("1d", "1y")]
+
+    source = store.read("NG=F", "1h")
+    assert source.index[-1] == hourly.index[-1]
+    for timeframe in ("4h", "1d"):
+        expected = resample_bars(source, timeframe)
+        pd.testing.assert_frame_equal(store.read("NG=F", timeframe).loc[expected.index[0]:], expected)
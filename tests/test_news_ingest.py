@@ -0,0 +1,99 @@
+import threading
+import time
+from datetime import datetime
+import requests
+from src.news_ingest import NewsIngestor
+
+
+class Response:
+    def __init__(self, payload):
+        self.payload = payload
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+
+class Session:
+    """
+    Answers NewsAPI queries from memory: `pages` articles per day (one per page), with
+    `failures[day]` failed calls before a day's first page succeeds. Calls for the days in
+    `blocked` wait on `release`.
+    """
+    def __init__(self, pages=2, failures=None, blocked=(), release=None):
+        self.pages = pages
+        self.failures = dict(failures or {})
+        self.blocked = set(blocked)
+        self.release = release
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, params=None, timeout=None):
+        day, page = params['from'], params['page']
+        with self._lock:
+            self.calls.append((day, page))
+            failing = page == 1 and self.failures.get(day, 0) > 0
+            if failing:
+                self.failures[day] -= 1
+        if day in self.blocked:
+            self.release.wait()
+        if failing:
+            raise requests.ConnectionError(f"Simulated outage for {day}")
+        article = {"title": f"Gas news {day} #{page}", "description": "LNG", "publishedAt": f"{day}T12:00:00Z",
+                   "url": f"https://news.example/{day}/{page}"}
+        return Response({"status": "ok", "totalResults": self.pages, "articles": [article]})
+
+
+def ingestor(session, workers=4):
+    return NewsIngestor("key", page_size=1, max_pages=5, max_retries=0, rate_per_sec=1000, burst=1000,
+                        workers=workers, backoff_base=0, session=session)
+
+
+def urls(articles):
+    return sorted(article['url'] for article in articles)
+
+
+def test_days_whose_first_page_failed_are_retried():
+    session = Session(failures={"2025-01-11": 1})
+    news = ingestor(session)
+    articles = list(news.iter_articles("gas", start=datetime(2025, 1, 10), end=datetime(2025, 1, 12)))
+
+    assert urls(articles) == [f"https://news.example/2025-01-{day}/{page}" for day in (10, 11, 12) for page in (1, 2)]
+    assert session.calls.count(("2025-01-11", 1)) == 2
+    assert news.failed_days == []
+
+
+def test_days_that_keep_failing_are_reported(capsys):
+    session = Session(failures={"2025-01-11": 10})
+    news = ingestor(session)
+    articles = list(news.iter_articles("gas", start=datetime(2025, 1, 10), end=datetime(2025, 1, 12)))
+
+    assert len(articles) == 4
+    assert session.calls.count(("2025-01-11", 1)) == 2
+    assert news.failed_days == ["2025-01-11"]
+    assert "2025-01-11" in capsys.readouterr().out
+
+
+def test_closing_the_stream_early_does_not_wait_for_pending_pages():
+    release = threading.Event()
+    days = [f"2025-01-{day:02d}" for day in range(11, 21)]
+    session = Session(blocked=days, release=release)
+    stream = ingestor(session, workers=2).iter_articles("gas", start=datetime(2025, 1, 10), end=datetime(2025, 1, 20))
+
+    # Never blocks the suite for long, even if close() waits for the blocked requests
+    timer = threading.Timer(2.0, release.set)
+    timer.start()
+    try:
+        assert next(stream)['url'].startswith("https://news.example/2025-01-10/")
+        started = time.monotonic()
+        stream.close()
+        assert time.monotonic() - started < 0.5
+    finally:
+        release.set()
+        timer.cancel()
+    # Only the requests already in flight ran; the other days were cancelled
+    time.sleep(0.05)
+    assert len(session.calls) <= 4
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.regime import Cusum, RegimeDetector, update_from_store
+
+N_BARS = 1800
+SHOCK = slice(1200, 1300)
+
+
+def volatile_bars(seed=0, n=N_BARS, shock=SHOCK, factor=3.0):
+    """
+    Daily OHLC random walk with 2% daily volatility, `factor` times higher during `shock`.
+    """
+    rng = np.random.default_rng(seed)
+    vol = np.full(n, 0.02)
+    vol[shock] *= factor
+    close = 3.0 * np.exp(np.cumsum(rng.normal(0, vol)))
+    prev = np.concatenate(([3.0], close[:-1]))
+    wick = np.abs(rng.normal(0, vol / 2, (2, n)))
+    return pd.DataFrame({
+        "Open": prev,
+        "High": np.maximum(prev, close) * (1 + wick[0]),
+        "Low": np.minimum(prev, close) * (1 - wick[1]),
+        "Close": close
+    }, index=pd.bdate_range("2018-01-01", periods=n))
+
+
+def transitions(events):
+    return [event for event in events if event['type'] == "transition"]
+
+
+def test_hysteresis_margin_is_needed_to_leave_a_regime():
+    detector = RegimeDetector(hysteresis=0.1)
+    thresholds = {"critical": 10.0, "high": 8.0, "noise": 5.0}
+
+    assert detector._with_hysteresis(8.5, thresholds, "normal") == "normal"
+    assert detector._with_hysteresis(9.0, thresholds, "normal") == "high"
+    assert detector._with_hysteresis(7.5, thresholds, "high") == "high"
+    assert detector._with_hysteresis(7.0, thresholds, "high") == "normal"
+    # Jumps straight over several regimes
+    assert detector._with_hysteresis(11.5, thresholds, "calm") == "critical"
+    assert detector._with_hysteresis(8.5, thresholds, None) == "high"
+
+    detector.hysteresis = 0.0
+    assert detector._with_hysteresis(8.5, thresholds, "normal") == "high"
+    assert detector._with_hysteresis(7.5, thresholds, "high") == "normal"
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_volatility_shock_raises_few_transitions(seed):
+    bars = volatile_bars(seed)
+    events = RegimeDetector(min_bars=60).on_frame("NG=F", bars)
+
+    found = transitions(events)
+    assert 1 <= len(found) <= 6
+    # Only moves into or out of high / critical volatility are reported
+    assert all({"high", "critical"} & {event['previous'], event['regime']} for event in found)
+    shock_start, shock_end = bars.index[SHOCK.start], bars.index[SHOCK.stop + 60]
+    assert any(shock_start <= pd.Timestamp(event['at']).tz_localize(None) <= shock_end for event in found)
+
+
+def test_hysteresis_and_confirmation_reduce_flapping():
+    bars = volatile_bars(0)
+    steady = transitions(RegimeDetector(min_bars=60).on_frame("NG=F", bars))
+    flapping = transitions(RegimeDetector(min_bars=60, hysteresis=0.0, confirm_bars=1).on_frame("NG=F", bars))
+    assert len(flapping) > 10 * len(steady)
+
+
+def test_cusum_flags_a_volatility_shift():
+    rng = np.random.default_rng(0)
+    values = np.exp(rng.normal(0, 0.3, 400))
+    values[300:] *= 3
+
+    cusum = Cusum(baseline_bars=60)
+    signals = np.array([cusum.update(value) for value in values])
+    assert not signals[:300].any()
+    first = np.flatnonzero(signals)[0]
+    assert 300 <= first < 320 and signals[first] == 1
+
+
+def test_detector_reports_changepoints_around_the_shock():
+    bars = volatile_bars(0)
+    events = RegimeDetector(min_bars=60).on_frame("NG=F", bars)
+
+    ups = [pd.Timestamp(event['at']).tz_localize(None) for event in events if event['type'] == "changepoint" and event['direction'] == "up"]
+    assert any(bars.index[SHOCK.start] <= at <= bars.index[SHOCK.start + 20] for at in ups)
+
+
+def test_restart_resumes_without_duplicate_events(tmp_path):
+    bars = volatile_bars(0)
+    path = str(tmp_path / "regime_state.json")
+
+    first = RegimeDetector(min_bars=60, path=path)
+    before = first.on_frame("NG=F", bars.iloc[:1250])
+    first.save()
+
+    restarted = RegimeDetector(min_bars=60, path=path)
+    assert restarted.load()
+    after = restarted.on_frame("NG=F", bars)
+
+    continuous = RegimeDetector(min_bars=60)
+    assert continuous.on_frame("NG=F", bars) == before + after
+    assert restarted.thresholds("NG=F") == continuous.thresholds("NG=F")
+    assert restarted.regime_thresholds("NG=F") == continuous.regime_thresholds("NG=F")
+    assert restarted.state["NG=F"]['regime'] == continuous.state["NG=F"]['regime']
+    assert list(restarted.events) == list(continuous.events)[-restarted.events.maxlen:]
+
+    # Bars already processed are never fed twice
+    assert restarted.on_frame("NG=F", bars) == []
+
+
+def test_state_saved_with_other_windows_is_rebuilt(tmp_path):
+    path = str(tmp_path / "regime_state.json")
+    detector = RegimeDetector(min_bars=60, path=path)
+    detector.on_frame("NG=F", volatile_bars(0, n=200))
+    detector.save()
+
+    assert not RegimeDetector(windows={"long_term": 365}, path=path).load()
+
+
+class StoreLoader:
+    """
+    Records the bar store reads of `update_from_store`.
+    """
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+
+    def fetch_bars(self, ticker, period="2y", interval="1d", refresh=True):
+        self.calls.append((ticker, period, refresh))
+        start = pd.Timestamp.now().normalize() - pd.Timedelta(days=int(period[:-1]) if period.endswith("d") else 3650)
+        return self.bars[self.bars.index >= start]
+
+
+def test_update_from_store_bootstraps_then_reads_since_last_bar():
+    bars = volatile_bars(0, n=400)
+    bars.index = pd.bdate_range(end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=len(bars))
+    detector = RegimeDetector(min_bars=60)
+    loader = StoreLoader(bars.iloc[:300])
+
+    update_from_store(detector, loader, ["NG=F"], history_period="5y")
+    assert loader.calls == [("NG=F", "5y", True)]
+    assert pd.Timestamp(detector.state["NG=F"]['last_bar']) == bars.index[299]
+
+    # After an outage of 100 bars, every missed bar is read from the store
+    loader.bars = bars
+    update_from_store(detector, loader, ["NG=F"], history_period="5y")
+    ticker, period, refresh = loader.calls[-1]
+    assert not refresh and int(period[:-1]) >= (bars.index[-1] - bars.index[299]).days
+    assert pd.Timestamp(detector.state["NG=F"]['last_bar']) == bars.index[-1]
+    # The first bar only provides the previous close
+    assert detector.state["NG=F"]['cusum'].bars == len(bars) - 1
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import worker as worker_module
+from src.alerts import RegimeMonitor
+from src.fakes import keyword_signal
+from src.regime import RegimeDetector, update_from_store
+from src.replay import ReplayClock, ReplayLoader, Scenario, ScenarioReplay
+
+HEADLINES = [
+    "Pipeline explosion halts LNG exports from the Gulf Coast",
+    "Hurricane forces shutdown of offshore natural gas platforms",
+    "Strike at Norwegian gas field cuts supply to Europe",
+    "EIA storage report shows a larger than expected inventory build",
+    "Freeze in Texas sends Henry Hub spot prices higher",
+    "Sanctions on Russian LNG tighten European supply",
+]
+
+
+def daily_bars(n=300, end="2025-01-10"):
+    rng = np.random.default_rng(0)
+    close = 3.0 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.02, "Low": close * 0.98, "Close": close, "Volume": 1000.0},
+        index=pd.bdate_range(end=end, periods=n)
+    )
+
+
+@pytest.fixture
+def scenario():
+    scenario = Scenario({"topic": "natural gas"})
+    published = pd.date_range("2025-01-10 08:00", periods=len(HEADLINES), freq="40min", tz="UTC")
+    articles = [
+        {"text": f"{headline}.", "publishedAt": at.isoformat(), "url": f"https://news.example/replay/{i}"}
+        for i, (headline, at) in enumerate(zip(HEADLINES, published))
+    ]
+    scenario.add_news(articles)
+    # The first articles have recorded answers, the others fall back to the keyword rules
+    for article in articles[:4]:
+        scenario.add_signal(article['text'], keyword_signal(article['text']), latency=0.01)
+    for ticker in ("NG=F", "CL=F", "TTF=F", "BZ=F"):
+        scenario.add_bars(ticker, "1d", daily_bars())
+    return scenario
+
+
+def test_replay_publishes_every_recorded_article(scenario, monkeypatch):
+    regime_paths = []
+    from_config = RegimeDetector.from_config.__func__
+
+    def recording_from_config(cls, config):
+        regime_paths.append(config['regime']['path'])
+        return from_config(cls, config)
+
+    monkeypatch.setattr(worker_module.RegimeDetector, "from_config", classmethod(recording_from_config))
+    report = ScenarioReplay(scenario, latency_scale=0, price_interval=3600).run()
+
+    assert report['articles'] == len(HEADLINES)
+    assert report['signals'] == len(HEADLINES)
+    assert report['llm_misses'] == 2
+    assert set(report['latency']) == {"p50", "p90", "p99", "max"}
+    # The worker's regime state lived in the replay's temporary directory
+    assert regime_paths and all("replay-" in path for path in regime_paths)
+
+
+def test_replay_loader_serves_the_regime_components(scenario, tmp_path):
+    clock = ReplayClock(pd.Timestamp("2025-01-08 12:00", tz="UTC"))
+    loader = ReplayLoader(scenario, clock, str(tmp_path))
+    assert loader.config['regime']['path'] == str(tmp_path / "regime_state.json")
+
+    # Only the bars released by the simulated time
+    assert loader.fetch_bars("NG=F", period="1mo").index[-1] == pd.Timestamp("2025-01-08")
+    assert loader.store.get("NG=F", "1d", period="max").index[-1] == pd.Timestamp("2025-01-08")
+
+    detector = RegimeDetector.from_config(loader.config)
+    update_from_store(detector, loader, ["NG=F"])
+    assert pd.Timestamp(detector.state["NG=F"]['last_bar']) == pd.Timestamp("2025-01-08")
+
+    regime, vol_pct = RegimeMonitor(loader, detector).current("NG=F")
+    assert regime in {"calm", "normal", "high", "critical"} and vol_pct > 0
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.backtest import store_signals_frame
+from src.fakes import keyword_signal
+from src.sentiment import LeadLagCorrelation, SentimentIndex, SentimentMonitor
+from src.signal_store import SignalStore
+
+ASSET_TICKERS = {"natural gas": "NG=F", "crude": "CL=F"}
+
+
+def daily_bars(n=120, seed=0, start="2025-01-02"):
+    rng = np.random.default_rng(seed)
+    close = 3.0 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {"Open": close, "High": close * 1.01, "Low": close * 0.99, "Close": close},
+        index=pd.bdate_range(start, periods=n)
+    )
+
+
+def signal(sentiment, asset="Natural Gas"):
+    return keyword_signal("Pipeline explosion halts LNG exports.").model_copy(
+        update={"sentiment": sentiment, "affected_assets": [asset]}
+    )
+
+
+def test_index_decays_with_half_life():
+    index = SentimentIndex(["NG=F"], half_life="3D")
+    at = pd.Timestamp("2025-01-10", tz="UTC")
+    index.add("NG=F", 1, at)
+
+    assert index.value(at)[0] == pytest.approx(1.0)
+    assert index.value(at + pd.Timedelta("3D"))[0] == pytest.approx(0.5)
+    assert index.value(at + pd.Timedelta("6D"))[0] == pytest.approx(0.25)
+    # Unknown tickers and neutral signals are ignored
+    index.add("XX", 1, at)
+    index.add("NG=F", 0, at)
+    assert index.value(at)[0] == pytest.approx(1.0)
+
+
+def test_index_does_not_depend_on_arrival_order():
+    start = pd.Timestamp("2025-01-10", tz="UTC")
+    contributions = [(1, start), (-1, start + pd.Timedelta("1D")), (1, start + pd.Timedelta("5h")), (1, start - pd.Timedelta("2D"))]
+    at = start + pd.Timedelta("4D")
+
+    values = []
+    for order in ([0, 1, 2, 3], [3, 2, 1, 0], [1, 3, 0, 2]):
+        index = SentimentIndex(["NG=F"])
+        for i in order:
+            index.add("NG=F", *contributions[i])
+        values.append(index.value(at)[0])
+    assert values == pytest.approx([values[0]] * 3)
+
+
+@pytest.mark.parametrize("window, max_lag", [(20, 3), (60, 5)])
+def test_lead_lag_correlation_matches_pandas(window, max_lag):
+    rng = np.random.default_rng(0)
+    n = 400
+    x = rng.normal(size=(n, 2))
+    returns = np.roll(x, 2, axis=0) * 2 + rng.normal(size=(n, 2))
+    vol = rng.normal(size=(n, 2))
+    correlations = LeadLagCorrelation(2, window, max_lag, n_targets=2)
+
+    for t in range(n):
+        correlations.update(x[t], returns[t], vol[t])
+        if t < window + max_lag or t % 37:
+            continue
+        corr = correlations.correlation()
+        for target, y in enumerate((returns, vol)):
+            for i, lag in enumerate(correlations.lags):
+                for column in range(2):
+                    driver, series = pd.Series(x[:t + 1, column]), pd.Series(y[:t + 1, column])
+                    # A positive lag pairs the driver at t - lag with the target at t
+                    pair = (driver.shift(lag), series) if lag >= 0 else (driver, series.shift(-lag))
+                    expected = pair[0].rolling(window).corr(pair[1]).iloc[-1]
+                    assert corr[target, i, column] == pytest.approx(expected, abs=1e-9)
+
+    # The index leads returns by 2 bars
+    assert np.argmax(correlations.correlation()[0, :, 0]) == list(correlations.lags).index(2)
+
+
+def test_live_and_restored_indexes_agree_on_free_form_sentiments(tmp_path):
+    bars = {"NG=F": daily_bars(seed=0), "CL=F": daily_bars(seed=1)}
+    now = pd.Timestamp("2025-07-01", tz="UTC")
+    published = pd.date_range("2025-01-06 15:00", periods=40, freq="3D", tz="UTC")
+    sentiments = ["Bullish", "Bearish (short-term)", "bearish", "Neutral/Bullish", "Bullish for crude"]
+    classified = [
+        ({"publishedAt": at.isoformat()}, signal(sentiments[i % len(sentiments)], "Natural Gas" if i % 3 else "Crude Oil"))
+        for i, at in enumerate(published)
+    ]
+
+    # The worker feeds signals live and records them; a restart seeds the index from the store
+    store = SignalStore(str(tmp_path / "signals"))
+    live = SentimentMonitor(["NG=F", "CL=F"], ASSET_TICKERS, window=20, max_lag=2)
+    for article, item in classified:
+        live.on_signal(item, article['publishedAt'])
+        store.append(item, article['publishedAt'])
+    live.on_frames(bars, now=now)
+
+    restored = SentimentMonitor(["NG=F", "CL=F"], ASSET_TICKERS, window=20, max_lag=2)
+    restored.on_signals_frame(store_signals_frame(store, ASSET_TICKERS))
+    restored.on_frames(bars, now=now)
+
+    assert live.current(now) == pytest.approx(restored.current(now))
+    assert live.current(now)[0] != 0
+    pd.testing.assert_frame_equal(live.lead_lag("returns"), restored.lead_lag("returns"))
+
+
+def test_daily_bar_closes_at_the_exchange_session_close():
+    bars = {"NG=F": daily_bars(n=7, start="2025-01-06")}
+    monitor = SentimentMonitor(["NG=F"], ASSET_TICKERS)
+    # 16:30 New York, before the 17:00 settlement of the 2025-01-10 trade date
+    monitor.on_signal(signal("Bullish"), "2025-01-10T21:30:00Z")
+    # 17:30 New York: belongs to the next trade date
+    monitor.on_signal(signal("Bearish"), "2025-01-10T22:30:00Z")
+
+    now = pd.Timestamp("2025-01-11T00:00:00Z")
+    assert monitor.on_frames(bars, now=now) == 5
+    assert monitor.last_bar == pd.Timestamp("2025-01-10", tz="UTC")
+    assert monitor.index.value(now)[0] > 0
+    # Still waiting for the next bar, but already part of the current reading
+    assert monitor.current(now)[0] == pytest.approx(monitor.index.value(now)[0] - np.exp(-monitor.index.rate * 5400))
@@ -0,0 +1,104 @@
+import pandas as pd
+import pytest
+from src.schema import EventCategory, MarketSignal
+from src.signal_store import MAX_ASSET_CODE, SignalStore, normalize_sentiment
+
+
+def make_signal(sentiment="Bullish", assets=("Natural Gas",), category=EventCategory.SUPPLY_SHOCK, headline="Pipeline explosion"):
+    return MarketSignal(
+        headline=headline, affected_assets=list(assets), category=category, sentiment=sentiment,
+        summary=f"{headline} summary", trading_recommendation="Monitor spreads"
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SignalStore(str(tmp_path / "signals"), segment_rows=3)
+    start = pd.Timestamp("2025-01-10", tz="UTC")
+    rows = [
+        make_signal("Bullish", ["Natural Gas"], headline="Pipeline explosion"),
+        make_signal("Bearish (short-term)", ["natural gas", "Crude Oil"], EventCategory.MACRO_ECONOMIC, "Recession fears"),
+        make_signal("bearish", ["Crude Oil"], EventCategory.GEOPOLITICAL, "Export deal signed"),
+        make_signal("Neutral/Bearish", ["Natural Gas", "natural gas"], EventCategory.INVENTORY, "Storage build"),
+        make_signal("Mixed", ["TTF"], EventCategory.WEATHER_EVENT, "Mild forecast"),
+    ]
+    for hours, signal in enumerate(rows):
+        store.append(signal, start + pd.Timedelta(hours=hours), cluster=f"cluster-{hours}")
+    return store
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Bullish", "Bullish"), ("bearish", "Bearish"), ("Bearish (short-term)", "Bearish"),
+    ("Neutral/Bearish", "Neutral"), ("Mixed", "Other"), ("", "Other"), (None, "Other"),
+])
+def test_normalize_sentiment(raw, expected):
+    assert normalize_sentiment(raw) == expected
+
+
+def test_query_filters(store):
+    start = pd.Timestamp("2025-01-10", tz="UTC")
+    assert list(store.query()) == [0, 1, 2, 3, 4]
+    assert list(store.query(start=start + pd.Timedelta(hours=1), end=start + pd.Timedelta(hours=3))) == [1, 2]
+    assert list(store.query(category=EventCategory.GEOPOLITICAL)) == [2]
+    assert list(store.query(asset="NATURAL GAS")) == [0, 1, 3]
+    assert list(store.query(asset="crude oil", category="Macro Economic")) == [1]
+
+
+@pytest.mark.parametrize("sentiment", ["Bearish", "bearish", "Bearish (i)"])
+def test_sentiment_filter_is_normalized(store, sentiment):
+    assert list(store.query(sentiment=sentiment)) == [1, 2]
+
+
+def test_aggregates_merge_spelling_variants(store):
+    assert store.aggregate(by="sentiment") == {"Bullish": 1, "Bearish": 2, "Neutral": 1, "Other": 1}
+    # Row 3 lists both spellings of natural gas, but is one signal
+    assert store.aggregate(by="asset") == {"Natural Gas": 3, "Crude Oil": 2, "TTF": 1}
+    assert store.aggregate(by="category", asset="natural gas")[EventCategory.INVENTORY.value] == 1
+    assert sum(store.aggregate(by="asset", sentiment="bearish").values()) == 3
+    with pytest.raises(ValueError):
+        store.aggregate(by="headline")
+
+
+def test_flushed_segments_survive_a_reopen(store, tmp_path):
+    # segment_rows=3: one segment written on append, two rows still buffered
+    assert len(store._segments) == 1 and len(store._buffer) == 2
+    store.flush()
+
+    reopened = SignalStore(str(tmp_path / "signals"))
+    assert len(reopened) == 5
+    assert reopened.aggregate(by="asset") == store.aggregate(by="asset")
+    frame = reopened.frame(text=True)
+    assert list(frame['headline']) == ["Pipeline explosion", "Recession fears", "Export deal signed", "Storage build", "Mild forecast"]
+    assert list(frame['cluster']) == [f"cluster-{i}" for i in range(5)]
+    assert [signal.sentiment for signal in reopened.signals([1, 4])] == ["Bearish", "Other"]
+
+
+def test_reader_picks_up_new_segments(store, tmp_path):
+    store.flush()
+    reader = SignalStore(str(tmp_path / "signals"))
+    store.append(make_signal(headline="Hurricane"), "2025-01-11T00:00:00Z")
+    store.flush()
+
+    assert reader.refresh() == 1
+    assert reader.count(asset="Natural Gas") == 4
+
+
+def test_buffered_rows_are_queryable_with_text(store):
+    rows = store.query(start="2025-01-10T03:00:00Z")
+    assert list(store.frame(rows, text=True)['headline']) == ["Storage build", "Mild forecast"]
+
+
+def test_full_dictionary_rejects_the_signal_without_breaking_the_store(tmp_path):
+    store = SignalStore(str(tmp_path / "signals"))
+    # One free code left
+    for i in range(MAX_ASSET_CODE):
+        store._intern(f"Asset {i}", store._asset_ids, store.assets)
+
+    store.append(make_signal(assets=["Natural Gas"]), "2025-01-10")
+    with pytest.raises(ValueError):
+        store.append(make_signal(assets=["Crude Oil"]), "2025-01-10")
+    store.append(make_signal(assets=["Natural Gas"]), "2025-01-10")
+
+    store.flush()
+    assert len(SignalStore(str(tmp_path / "signals"))) == 2
+    assert list(store.query(asset="Natural Gas")) == [0, 1]
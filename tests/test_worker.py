@@ -0,0 +1,116 @@
+import asyncio
+import copy
+import pytest
+from src import worker as worker_module
+from src.agent import EnergyTradingAgent
+from src.alerts import AlertDispatcher
+from src.config import load_config
+from src.fakes import FakeSignalLLM
+from src.feed_store import FeedStore
+from src.signal_store import SignalStore
+from src.worker import SignalWorker
+
+ARTICLES = [
+    {"text": "Pipeline explosion halts LNG exports from the Gulf Coast.", "url": "https://news.example/1",
+     "publishedAt": "2025-01-10T08:00:00Z"},
+    {"text": "Hurricane forces shutdown of offshore natural gas platforms.", "url": "https://news.example/2",
+     "publishedAt": "2025-01-10T09:00:00Z"},
+    {"text": "Strike at Norwegian gas field cuts supply to Europe.", "url": "https://news.example/3",
+     "publishedAt": "2025-01-10T10:00:00Z"},
+]
+
+
+class NewsLoader:
+    """
+    Serves the same page of articles on every poll.
+    """
+    def __init__(self, config, articles):
+        self.config = config
+        self.articles = articles
+
+    def fetch_real_news(self, topic="energy trading", days_ago=0, page_size=5):
+        return [dict(article) for article in self.articles]
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = copy.deepcopy(load_config())
+    config['regime']['path'] = str(tmp_path / "regime_state.json")
+    config['metrics']['enabled'] = False
+    return config
+
+
+def make_worker(config, tmp_path, llm):
+    agent = EnergyTradingAgent(llm=llm, cache=False, dispatcher=AlertDispatcher([]))
+    agent.executor.max_retries = 0
+    return SignalWorker(
+        loader=NewsLoader(config, ARTICLES),
+        agent=agent,
+        feed=FeedStore(str(tmp_path / "feed.sqlite")),
+        signal_store=SignalStore(str(tmp_path / "signals"))
+    )
+
+
+def poll(worker):
+    async def cycle():
+        articles, signals = asyncio.Queue(), asyncio.Queue()
+        await asyncio.gather(
+            worker.news_stage(articles, once=True),
+            worker.classify_stage(articles, signals),
+            worker.risk_stage(signals)
+        )
+    asyncio.run(cycle())
+    return worker.feed.get_status('news_poll')
+
+
+def test_articles_failed_by_the_llm_are_retried_by_the_next_poll(config, tmp_path):
+    outage = {"on": True}
+    worker = make_worker(config, tmp_path, FakeSignalLLM(fail_on=lambda text: outage["on"]))
+
+    assert poll(worker)['new'] == 3
+    assert worker.feed.latest() == []
+
+    outage["on"] = False
+    assert poll(worker)['new'] == 3
+    assert len(worker.feed.latest()) == 3
+
+    # Published articles stay seen, across restarts too
+    assert poll(worker)['new'] == 0
+    restarted = make_worker(config, tmp_path, FakeSignalLLM())
+    assert poll(restarted)['new'] == 0
+
+
+def test_articles_of_a_failed_batch_are_retried(config, tmp_path, monkeypatch):
+    worker = make_worker(config, tmp_path, FakeSignalLLM())
+    classify = worker_module.classify_articles
+
+    def crash(*args):
+        raise RuntimeError("Simulated classification crash")
+
+    monkeypatch.setattr(worker_module, "classify_articles", crash)
+    assert poll(worker)['new'] == 3
+    assert worker.feed.latest() == []
+
+    monkeypatch.setattr(worker_module, "classify_articles", classify)
+    assert poll(worker)['new'] == 3
+    assert len(worker.feed.latest()) == 3
+
+
+def test_cancelled_worker_flushes_buffered_signals(config, tmp_path):
+    worker = make_worker(config, tmp_path, FakeSignalLLM())
+
+    async def publish_then_cancel():
+        articles, signals = asyncio.Queue(), asyncio.Queue()
+        for article in ARTICLES:
+            await articles.put({**article, "received_at": 0.0})
+        classify = asyncio.create_task(worker.classify_stage(articles, signals))
+        risk = asyncio.create_task(worker.risk_stage(signals))
+        while len(worker.signal_store) < len(ARTICLES):
+            await asyncio.sleep(0.01)
+        # e.g. Ctrl-C on the long-running worker
+        for task in (classify, risk):
+            task.cancel()
+        await asyncio.gather(classify, risk, return_exceptions=True)
+
+    asyncio.run(publish_then_cancel())
+    assert len(SignalStore(str(tmp_path / "signals"))) == len(ARTICLES)